@@ -1,15 +1,7 @@
 # Dependencies
+import importlib
 import streamlit as st
 import home
-import research_page
-import videos_page
-import model.mdp_solver as genSolver
-import model.preprocessing as prepProcess
-import model.states as custSegm
-import model.transitions_probabilities as custDyn
-import model.mcp_solver as solveCamp
-import model_dependencies.google_sheet as db
-import model.rewards as car
 
 st.set_page_config(
      page_title="Ex-stream-ly Cool App",
@@ -27,56 +19,39 @@ st.set_page_config(
 # Here I define everything related
 # to controlling a user through his 
 # user experience
+
+# Module and function displaying every page. Modules are only
+# imported once their page is opened, such that the heavy
+# dependencies of one page (sklearn, plotly, mdptoolbox, gspread, ...)
+# never slow down the start of the app or the other pages.
+PAGES = {
+    'Home Page': ('home', 'display_home'),
+    'Preprocessing': ('model.preprocessing', 'display_preprocessing'),
+    '1. States': ('model.states', 'display_customer_segmentation'),
+    '2. Transitional Probabilities': ('model.transitions_probabilities', 'display_customer_dynammics'),
+    '3. Transitional Rewards': ('model.rewards', 'display_input_rewards_actions'),
+    '4. MDP Solver': ('model.mdp_solver', 'solver'),
+    '5. Marketing Campaign Planner': ('model.mcp_solver', 'display_campaing_planner_page'),
+    'Simulation History': ('model_dependencies.google_sheet', 'display_simulation_history'),
+    'Documentation': ('research_page', 'display_research_page'),
+    'Videos': ('videos_page', 'display_video_page'),
+}
+
 class Router:
 
     # Router attributes
     def display_router(self):
-        self.features = ['Home Page', 'Preprocessing', '1. States', '2. Transitional Probabilities', '3. Transitional Rewards', '4. MDP Solver', '5. Marketing Campaign Planner', 'Simulation History', 'Documentation', 'Videos']
+        self.features = list(PAGES)
         self.page = st.sidebar.selectbox('Select Page', self.features)
         st.sidebar.markdown('---')
 
     # Router routing
     def route(self):
 
-         # HOME PAGE
-        if self.page == self.features[0]:
-            home.display_home()
-
-        #  PREPROCESSING PAGE
-        if self.page == self.features[1]:
-            prepProcess.display_preprocessing()
-
-        # CUSTOMER SEGMENTATION
-        if self.page == self.features[2]:
-            custSegm.display_customer_segmentation()
-
-        # CUSTOMER DYNAMICS
-        if self.page == self.features[3]:
-            custDyn.display_customer_dynammics()
-
-        # REWARDS
-        if self.page == self.features[4]:
-            car.display_input_rewards_actions()
-
-        # MDP SOLVER PAGE
-        if self.page == self.features[5]:
-            genSolver.solver()
-
-        # CAMPAIGN PLANNER PAGE
-        if self.page == self.features[6]:
-            solveCamp.display_campaing_planner_page()
-            
-        # SIMULATION HISTORY PAGE
-        if self.page == self.features[7]:
-            db.display_simulation_history()
-
-         # DOCUMENTATION PAGE
-        if self.page == self.features[8]:
-            research_page.display_research_page()
-
-        # VIDEOS PAGE
-        if self.page == self.features[9]:
-            videos_page.display_video_page()
+        # Resolve the page module on demand, later reruns reuse the imported module
+        module_name, function_name = PAGES[self.page]
+        page = importlib.import_module(module_name)
+        getattr(page, function_name)()
             
 # Initiating class
 route = Router()
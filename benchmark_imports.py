@@ -0,0 +1,142 @@
+# Dependencies
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# <<     FEATURE: IMPORT BENCHMARK       >>
+# Times the import of every page of the app in fresh interpreters,
+# such that a heavy import creeping back into a page shows up:
+#
+#   python benchmark_imports.py --runs 7
+#   python benchmark_imports.py --importtime 15 --pages "4. MDP Solver"
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Packages which only the pages using them should import
+HEAVY_MODULES = ['sklearn', 'mdptoolbox', 'gspread', 'gsheetsdb', 'graphviz', 'plotly', 'scipy.stats']
+
+# Streamlit is loaded before the clock starts, as every page needs it and the app has it loaded anyway
+PROBE = '''
+import importlib, json, sys, time
+import streamlit
+loaded = set(sys.modules)
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - started
+print(json.dumps({"Time": elapsed, "Modules": [name for name in sys.argv[2:] if name in sys.modules and name not in loaded]}))
+'''
+
+def read_pages(path=os.path.join(ROOT, 'app.py')):
+
+    """
+    read_pages(...) reads the PAGES table of app.py without running the
+    app, which would start drawing Streamlit elements.
+
+    :return: dict of page name to (module, function)
+    """
+
+    with open(path) as file:
+        module = ast.parse(file.read())
+
+    for node in module.body:
+        if (isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == 'PAGES' for target in node.targets)):
+            return ast.literal_eval(node.value)
+
+    raise ValueError('{} has no PAGES table.'.format(path))
+
+def probe_import(module, heavy_modules=HEAVY_MODULES):
+
+    """
+    probe_import(...) imports one module in a fresh interpreter.
+
+    :param module: dotted module name, e.g. model.states
+    :param heavy_modules: packages reported if the import, not streamlit, loaded them
+
+    :return: dict with "Time", "Modules" (heavy modules loaded) and "Error" (None if the import worked)
+    """
+
+    completed = subprocess.run([sys.executable, '-c', PROBE, module] + list(heavy_modules), cwd=ROOT, capture_output=True, text=True)
+
+    if (completed.returncode != 0):
+        lines = completed.stderr.strip().splitlines()
+        return {"Time": None, "Modules": [], "Error": lines[-1] if (len(lines) > 0) else 'exit code {}'.format(completed.returncode)}
+
+    return {**json.loads(completed.stdout.strip().splitlines()[-1]), "Error": None}
+
+def measure_import(module, runs=7, heavy_modules=HEAVY_MODULES):
+
+    """
+    measure_import(...) takes the median import time over several fresh interpreters.
+
+    :return: dict from probe_import(...) with the median "Time"
+    """
+
+    probes = [probe_import(module, heavy_modules) for _ in range(runs)]
+
+    if (any(probe["Error"] is not None for probe in probes)):
+        return next(probe for probe in probes if (probe["Error"] is not None))
+
+    return {**probes[0], "Time": statistics.median(probe["Time"] for probe in probes)}
+
+def importtime_report(module, top=15):
+
+    """
+    importtime_report(...) lists the imports of one module with the largest
+    cumulative time, from python -X importtime.
+
+    :return: list of (cumulative microseconds, imported package)
+    """
+
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)], cwd=ROOT, capture_output=True, text=True)
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if (not line.startswith('import time:')):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if (len(fields) == 3 and fields[1].strip().isdigit()):
+            entries.append((int(fields[1]), fields[2].rstrip()))
+
+    return sorted(entries, reverse=True)[:top]
+
+def parse_arguments(arguments=None):
+
+    """parse_arguments(...) reads the command line"""
+
+    parser = argparse.ArgumentParser(description='Time the import of every page of the app in fresh interpreters.')
+
+    parser.add_argument('--runs', type=int, default=7, help='fresh interpreters per page, the median is reported')
+    parser.add_argument('--pages', nargs='+', default=None, help='page names of app.py, by default all')
+    parser.add_argument('--importtime', type=int, default=0, metavar='TOP', help='also list the TOP slowest imports of every page')
+
+    return parser.parse_args(arguments)
+
+def main(arguments=None):
+
+    """main(...) prints the import time and the heavy modules of every page"""
+
+    arguments = parse_arguments(arguments)
+    pages = read_pages()
+    names = list(pages) if (arguments.pages is None) else arguments.pages
+
+    print('{:<32} {:<36} {:>9}  {}'.format('Page', 'Module', 'Import', 'Heavy modules'))
+
+    for name in names:
+        module = pages[name][0]
+        result_dict = measure_import(module, arguments.runs)
+
+        if (result_dict["Error"] is not None):
+            print('{:<32} {:<36} {:>9}  {}'.format(name, module, 'failed', result_dict["Error"]))
+            continue
+
+        print('{:<32} {:<36} {:>8.2f}s  {}'.format(name, module, result_dict["Time"], ', '.join(result_dict["Modules"]) or '-'))
+
+        for cumulative, package in importtime_report(module, arguments.importtime) if (arguments.importtime > 0) else []:
+            print('{:>78.3f}s  {}'.format(cumulative / 1e6, package))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Dependencies
+import argparse
+import json
+import os
+import pandas as pd
+from model_dependencies import bellman_dependencies
+from model_dependencies import pipeline_dependencies
+
+# <<     FEATURE: HEADLESS PIPELINE       >>
+# Runs the whole MCP workflow on files on disk, without
+# Streamlit, e.g. for scheduled batch runs:
+#
+#   python cli.py data/datasets/official/customer_dynamics/transitions_input.csv \
+#                 data/datasets/official/actions/actions_cost.csv --output results
+
+def parse_arguments(arguments=None):
+
+    """parse_arguments(...) reads the command line"""
+
+    parser = argparse.ArgumentParser(description='Estimate transitions, build rewards, solve the MDP and simulate the optimal marketing campaign.')
+
+    parser.add_argument('transitions', help='csv log with one (state, action, follow-up state) row per observed transition')
+    parser.add_argument('costs', help='csv with the cost of every action, e.g. actions_cost.csv')
+    parser.add_argument('--output', default=None, help='directory the results are written to')
+    parser.add_argument('--columns', nargs=3, default=None, metavar=('STATE', 'ACTION', 'FOLLOW_UP_STATE'), help='columns of the log')
+    parser.add_argument('--reward-factor', type=float, default=0.5, help='weight of the CLV change against the action cost')
+    parser.add_argument('--wacc', type=float, default=0.07, help='yearly weighted average cost of capital')
+    parser.add_argument('--decision-periods', type=int, default=12, help='decision periods per year')
+    parser.add_argument('--solver', default='Policy Iteration', choices=list(bellman_dependencies.SOLVERS), help='MDP solver')
+    parser.add_argument('--periods', type=int, default=12, help='periods the campaign runs')
+    parser.add_argument('--initial-state', default=None, help='CLV state of the customer, by default the first state')
+    parser.add_argument('--mode', default=pipeline_dependencies.CAMPAIGN_MODES[0], choices=pipeline_dependencies.CAMPAIGN_MODES, help='how the campaign is evaluated')
+    parser.add_argument('--simulations', type=int, default=1000, help='simulated customers')
+    parser.add_argument('--seed', type=int, default=None, help='seed for reproducible simulations')
+    parser.add_argument('--sparse', action='store_true', help='store the transition matrices sparsely')
+    parser.add_argument('--workers', type=int, default=1, help='processes for estimation and simulation')
+    parser.add_argument('--no-cache', action='store_true', help='neither read nor write the MDP solution cache')
+    parser.add_argument('--save-intermediate', action='store_true', help='also write the probabilities and rewards as csv')
+
+    return parser.parse_args(arguments)
+
+def write_results(result_dict, output, save_intermediate=False):
+
+    """
+    write_results(...) writes the optimal policy, the campaign summary and
+    the timings to the output directory, in the shape the app offers them.
+    """
+
+    os.makedirs(output, exist_ok=True)
+
+    result_dict["Solution"]["Optimal Policy Frame"].to_csv(os.path.join(output, 'mcp_optimal_policy.csv'))
+    result_dict["Campaign"]["Summary"].to_csv(os.path.join(output, 'campaign_summary.csv'), index=False)
+    result_dict["Campaign"]["Averages"].to_csv(os.path.join(output, 'averages.csv'))
+
+    if (save_intermediate):
+        result_dict["Probabilities"].to_csv(os.path.join(output, 'probabilities_mdp.csv'))
+        result_dict["Rewards"]["Frame"].to_csv(os.path.join(output, 'mdp_rewards.csv'))
+
+    with open(os.path.join(output, 'timings.json'), 'w') as file:
+        json.dump(result_dict["Timings"], file, indent=2)
+
+def report(result_dict):
+
+    """report(...) prints the outcome of the run and the time of every stage"""
+
+    solution, campaign = result_dict["Solution"], result_dict["Campaign"]
+
+    print('Discount factor: {:.6f}'.format(result_dict["Discount Factor"]))
+    print('Optimal policy ({} iterations{}):'.format(solution.get("Iterations"), ', cached' if solution.get("Cached") else ''))
+    print(solution["Optimal Policy Frame"].to_string())
+    print('Campaign from state {}: CLV change {:.4f}, total cost {:.4f}'.format(campaign["Initial State"], campaign["CLV Delta"], campaign["Total Cost"]))
+
+    print('')
+    print('{:<24}{:>10}'.format('Stage', 'Seconds'))
+    for stage, seconds in result_dict["Timings"].items():
+        print('{:<24}{:>10.3f}'.format(stage, seconds))
+    print('{:<24}{:>10.3f}'.format('Total', sum(result_dict["Timings"].values())))
+
+def main(arguments=None):
+
+    """main(...) runs the pipeline for the command line arguments"""
+
+    arguments = parse_arguments(arguments)
+
+    options = dict()
+    if (arguments.columns is not None):
+        options["columns"] = arguments.columns
+
+    result_dict = pipeline_dependencies.run_pipeline(arguments.transitions, pd.read_csv(arguments.costs),
+                                                     reward_factor=arguments.reward_factor,
+                                                     wacc=arguments.wacc,
+                                                     decision_periods=arguments.decision_periods,
+                                                     method=arguments.solver,
+                                                     campaign_periods=arguments.periods,
+                                                     initial_state=arguments.initial_state,
+                                                     mode=arguments.mode,
+                                                     simulations=arguments.simulations,
+                                                     seed=arguments.seed,
+                                                     sparse=arguments.sparse,
+                                                     workers=arguments.workers,
+                                                     cache=not arguments.no_cache,
+                                                     **options)
+
+    report(result_dict)
+
+    if (arguments.output is not None):
+        write_results(result_dict, arguments.output, arguments.save_intermediate)
+
+    return result_dict
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,5 @@
 # Dependencies
 import streamlit as st
-import pandas as pd
 from inform import Descriptions
 
 def display_home():
@@ -36,7 +36,9 @@ class Descriptions:
         dataset that ressembles industry standard.s The generated code snippet should then be applied locally to classify own data."
 
     CART_INPUT = "__Input:__ Dataframe with Comparable's CLV & Comparable's RFM, and Dataframe with own RFM"
-    CART_OUTPUT = '__Output:__ Code Snippet (Runnable Locally)'
+    CART_STREAM = 'Name of a csv file in the streaming directory of the server (MCP_STREAM_DIRECTORY). The CART is fitted on a stratified sample of it, after which every customer is segmented chunk by chunk and written to a new csv file, such that the file never has to fit into memory.'
+    CART_TUNING = 'Cross-validates every combination of the picked parameters in parallel and fits the CART with the best one. Scores and fitted trees are cached, such that the same data and parameters are never fitted twice.'
+    CART_OUTPUT = '__Output:__ Segmented Dataframe, Tree (.npz) & Code Snippet (Runnable Locally)'
 
     # CUSTOMER DYNAMICS PAGE
 
@@ -45,6 +47,9 @@ class Descriptions:
     PROBABILITY_INPUT = '__Input:__ Dataframe with State and Action sets'
     PROBABILITY_OUTPUT = '__Output:__ Dataframe with Transition Probabilities'
 
+    PROBABILITY_COUNTS = 'Counts downloaded from an earlier run. The uploaded data is added to them as a new batch, without the full history.'
+    PROBABILITY_DECAY = 'Weight of the saved counts relative to the new batch. With a factor below 1 a batch observed k updates ago weighs factor^k, such that recent behaviour dominates.'
+
     # REWARD PAGE
 
     REWARD_ABOUT = "Here the reward for all Triples (S, A, S') is calculated. It calculates the Delta CLV between states, automatically incurs action cost and considers a weighting factor."
@@ -52,6 +57,8 @@ class Descriptions:
     REWARD_INPUT = '__Input:__ Dataframe with State and Action sets, Dataframe with Action Costs and Weighting Factor'
     REWARD_OUTPUT = '__Output:__ Dataframe with Rewards'
 
+    REWARD_SWEEP = 'Solves the MDP for evenly spaced reward factors between 0.01 and 1 at once, using the transition probabilities of the input. Shows which reward factors lead to which optimal policy.'
+
     # MARKOV DECISION PROCESS PAGE
 
     MDP_ABOUT = 'A Markov Decision Process is a set of {States, Inputs, Trans. Prob, Rewards and Discount Factor}.\
@@ -62,12 +69,22 @@ class Descriptions:
 
     SOLVERS = 'Different MDP solvers yield different results. Pick your solver, e.g. Value Iteration.'
 
+    MDP_SENSITIVITY = 'Solves the MDP for a grid of WACC values and decision periods per year. Every solve starts from the solution of its neighbouring grid point, and the maps show where the optimal policy changes.'
+
+    SPARSE_MODEL = 'Stores only the observed (S, A, S\') triples. Recommended for large segmentations in which customers only move between a few neighbouring states.'
+
     # MARKETING CAMPAIGN PLANNER PAGE
 
     CAMPAIGN_PLANNER_ABOUT = 'In this section, a plan of the average optimal campaign over N simulations is computed.'
     CAMPAIGN_PLANNER_INPUT = '__Input:__ Action Cost, Initial State, Optimal Policy, N simulations'
     CAMPAIGN_PLANNER_OUTPUT = '__Output:__  N optimal campaigns, Total Cost, Total CLV Change, Action Sequence'
 
+    CAMPAIGN_MODE = 'Monte Carlo simulates N customers. Target Precision simulates customers in batches until the averages are as precise as requested. Exact Expectation computes the average over infinitely many customers directly from the state distribution in every period, without sampling noise.'
+
+    CAMPAIGN_WORKERS = 'Simulations, and in the Target Precision mode every batch of them, are split into fixed chunks of customers which are spread over the given number of processes. Every chunk has its own random stream, hence more cores make a run faster without changing its result.'
+
+    CAMPAIGN_PRECISION = 'Simulations stop as soon as the confidence intervals of all average action shares and of the average CLV change are narrower than the given half-widths, or when the time budget is spent.'
+
     # SIMULATION HISTORY
 
     SIMULATION_LOG_HISTORY = 'Here users can find the history of all marketing campaigns ever run using MCP. One optimal marketing campaign and its respective Key Performance Indicators (KPIs) is one row of the summary table below.'
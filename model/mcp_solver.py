@@ -2,13 +2,15 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-from numpy.linalg import matrix_power
 import csv
-from random import sample
+import os
 from inform import Descriptions
-import plotly.graph_objects as go
-import plotly.express as px
-import model_dependencies.google_sheet as googleSheet
+import model_dependencies.mdp_dependencies as mdpDependencies
+import model_dependencies.simulation_dependencies as simulationDependencies
+import model_dependencies.data_dependencies as dataDependencies
+
+# Actions the database of store_run(...) has a column for, in the order of its arguments
+STORED_ACTIONS = ['agent', 'call', 'email', 'mail', 'no contact', 'tv']
 
 def display_campaing_planner_page():
     """
@@ -45,21 +47,33 @@ def display_campaing_planner_page():
         # SIMULATIONS
         simulations = int(c1.number_input('Insert the number of simulations to be consider', value = 1, step = 1))
 
+        # SPARSE MODEL
+        sparse = c1.checkbox("Use sparse transition model", help = Descriptions.SPARSE_MODEL)
+
+        # EVALUATION MODE
+        mode = c1.radio('How should the campaign be evaluated?', ['Monte Carlo Simulation', 'Target Precision', 'Exact Expectation'], help = Descriptions.CAMPAIGN_MODE)
+        precision = precision_inputs(c1) if (mode == 'Target Precision') else None
+
+        # CPU CORES
+        workers = 1
+        if (mode != 'Exact Expectation'):
+            workers = int(c1.number_input('Insert the number of CPU cores to simulate on', value = 1, min_value = 1, max_value = os.cpu_count() or 1, step = 1, help = Descriptions.CAMPAIGN_WORKERS))
+
         if (upload_transition is not None and upload_optimal_policy is not None):
             
             # Desired DF Shape
-            transition_probabilities = pd.read_csv(upload_transition).iloc[: , 1:]
-            optimal_policy = pd.read_csv(upload_optimal_policy).iloc[: , 1:]
+            transition_probabilities = dataDependencies.load_upload(upload_transition)
+            optimal_policy = dataDependencies.load_upload(upload_optimal_policy)
 
             # STATES 
             # states_df = pd.DataFrame(transition_probabilities[['state', 'state_category', 'follow_up_state', 'follow_up_state_category']])
-            states_intermediary = transition_probabilities.groupby(['state', 'state_category']).count().reset_index()
+            states_intermediary = transition_probabilities.groupby(['state', 'state_category'], observed=True).count().reset_index()
             states_df = pd.DataFrame(columns=['States', 'States Category'])
             states_df['States'] = states_intermediary['state']
             states_df['States Category'] = states_intermediary['state_category']
 
             # ACTIONS
-            actions_df_intermediary = transition_probabilities.groupby(['action', 'action_category']).count().reset_index()
+            actions_df_intermediary = transition_probabilities.groupby(['action', 'action_category'], observed=True).count().reset_index()
             actions_df = pd.DataFrame(columns=['Actions', 'Actions Category'])
             actions_df['Actions'] = actions_df_intermediary['action']
             actions_df['Actions Category'] = actions_df_intermediary['action_category']
@@ -71,7 +85,10 @@ def display_campaing_planner_page():
             display_all_inputs(transition_probabilities, states_df, actions_df, optimal_policy)
 
             # Solving the MCP 
-            run_mcp_solver(states_df, actions_df, transition_probabilities, optimal_policy, periods, initial_state, simulations)
+            if (mode == 'Exact Expectation'):
+                run_exact_campaign(states_df, actions_df, transition_probabilities, optimal_policy, periods, initial_state, sparse)
+            else:
+                run_mcp_solver(states_df, actions_df, transition_probabilities, optimal_policy, periods, initial_state, simulations, sparse, precision, workers)
 
         else:
             st.markdown('---')
@@ -86,21 +103,33 @@ def display_campaing_planner_page():
         # SIMULATIONS
         simulations = int(c1.number_input('Insert the number of simulations to be consider', value = 1, step = 1))
 
+        # SPARSE MODEL
+        sparse = c1.checkbox("Use sparse transition model", help = Descriptions.SPARSE_MODEL)
+
+        # EVALUATION MODE
+        mode = c1.radio('How should the campaign be evaluated?', ['Monte Carlo Simulation', 'Target Precision', 'Exact Expectation'], help = Descriptions.CAMPAIGN_MODE)
+        precision = precision_inputs(c1) if (mode == 'Target Precision') else None
+
+        # CPU CORES
+        workers = 1
+        if (mode != 'Exact Expectation'):
+            workers = int(c1.number_input('Insert the number of CPU cores to simulate on', value = 1, min_value = 1, max_value = os.cpu_count() or 1, step = 1, help = Descriptions.CAMPAIGN_WORKERS))
+
         # TRANSITION PROBABILITIES
-        transition_probabilities = pd.read_csv('data/datasets/official/full_example/mcp_input.csv')
+        transition_probabilities = dataDependencies.load_dataset('data/datasets/official/full_example/mcp_input.csv')
 
         # OPTIMAL POLICY
-        optimal_policy = pd.read_csv('data/datasets/official/full_example/mcp_optimal_policy.csv')
+        optimal_policy = dataDependencies.load_dataset('data/datasets/official/full_example/mcp_optimal_policy.csv')
     
         # STATES 
         # states_df = pd.DataFrame(transition_probabilities[['state', 'state_category', 'follow_up_state', 'follow_up_state_category']])
-        states_intermediary = transition_probabilities.groupby(['state', 'state_category']).count().reset_index()
+        states_intermediary = transition_probabilities.groupby(['state', 'state_category'], observed=True).count().reset_index()
         states_df = pd.DataFrame(columns=['States', 'States Category'])
         states_df['States'] = states_intermediary['state']
         states_df['States Category'] = states_intermediary['state_category']
 
         # ACTIONS
-        actions_df_intermediary = transition_probabilities.groupby(['action', 'action_category']).count().reset_index()
+        actions_df_intermediary = transition_probabilities.groupby(['action', 'action_category'], observed=True).count().reset_index()
         actions_df = pd.DataFrame(columns=['Actions', 'Actions Category'])
         actions_df['Actions'] = actions_df_intermediary['action']
         actions_df['Actions Category'] = actions_df_intermediary['action_category']
@@ -112,7 +141,10 @@ def display_campaing_planner_page():
         display_all_inputs(transition_probabilities, states_df, actions_df, optimal_policy)
 
         # Solving the MCP 
-        run_mcp_solver(states_df, actions_df, transition_probabilities, optimal_policy, periods, initial_state, simulations)
+        if (mode == 'Exact Expectation'):
+            run_exact_campaign(states_df, actions_df, transition_probabilities, optimal_policy, periods, initial_state, sparse)
+        else:
+            run_mcp_solver(states_df, actions_df, transition_probabilities, optimal_policy, periods, initial_state, simulations, sparse, precision, workers)
 
 def display_all_inputs(transition_probabilities, states, actions, optimal_policy):
     st.markdown('---')
@@ -143,7 +175,25 @@ def display_all_inputs(transition_probabilities, states, actions, optimal_policy
     c5.write(transition_probabilities.iloc[: , 1:].drop(['state_category', 'Probability Triple', 'action_category', 'follow_up_state_category'], axis = 1))
 
 
-def run_mcp_solver(states, actions, transition_probabilities, optimal_policy, periods, initial_state, simulations):
+def precision_inputs(container):
+
+    """
+    precision_inputs(...) asks for the targets of the Target Precision mode.
+
+    :param container: streamlit container to render the inputs in
+
+    :return: dict with "Action Frequency", "Average CLV Change", "Confidence" and "Time Budget"
+    """
+
+    precision = dict()
+    precision["Action Frequency"] = container.number_input('Insert the allowed half-width of the average action shares', value = 0.005, min_value = 0.0, step = 0.001, format = '%.4f', help = Descriptions.CAMPAIGN_PRECISION)
+    precision["Average CLV Change"] = container.number_input('Insert the allowed half-width of the average CLV change', value = 0.5, min_value = 0.0, step = 0.1)
+    precision["Confidence"] = container.selectbox('Insert the confidence level of the intervals', [0.9, 0.95, 0.99], index = 1)
+    precision["Time Budget"] = container.number_input('Insert the maximum number of seconds to simulate', value = 30.0, min_value = 1.0, step = 5.0)
+
+    return precision
+
+def run_mcp_solver(states, actions, transition_probabilities, optimal_policy, periods, initial_state, simulations, sparse=False, precision=None, workers=1):
 
     """
     run_mcp_solver(...) is the algorithm that apply the respective optimal 
@@ -157,189 +207,164 @@ def run_mcp_solver(states, actions, transition_probabilities, optimal_policy, pe
     :param periods: enumber of decision periods
     :param initial_state: customer initial state
     :param simulations: number of simulations
+    :param sparse: whether the transition matrices should be stored sparsely
+    :param precision: targets from precision_inputs(...); if given, simulations are
+        run in batches until the targets are met and the number of simulations is ignored
+    :param workers: number of processes the simulations are spread over
 
     """
 
-    st.write('---')
-    st.write('## Marketing Campaign over {} Simulations Result'.format(simulations))
-    st.info('Here N simulations are calculated using the inputs of MCP. The user sees below a summary table as well as some visualizations.')
-
-    matrix_prob = input_to_probability_matrix(transition_probabilities, len(actions), len(states))
+    matrix_prob, report = mdpDependencies.get_transition_tensor(transition_probabilities, len(actions), len(states), sparse)
     
     # [CURRENT STATE] Here I optimize UX by providing him the real
-    # CLV state, e.g. 50, then I encode back to {1, 2, ..., N} such that 
-    # it fits the optimal campaing planner algorithm in apply_optimal_policy(....)
-    intermediary_state_variable = 0
-    state_map = dict([(i,[a]) for i, a in zip(states['States'], states['States Category'])])
-    user_state_selection = initial_state
-    for key in state_map:
-        if (key == user_state_selection):
-            intermediary_state_variable = state_map.get(key)
-
-    current_state = intermediary_state_variable[0]
-    #st.write(current_state)
-
+    # CLV state, e.g. 50, then I encode back to {0, 1, ..., N - 1} such that 
+    # it fits the simulation of the optimal campaign
     states = states.sort_values(by=['States Category'])
-    opt_policy = optimal_policy['action'].to_list()
-    states['action'] = opt_policy
+    state_values = states['States'].to_numpy(dtype=float)
+    current_state = int(states.loc[states['States'] == initial_state, 'States Category'].iloc[0])
 
-    opt_to_map = states.copy()
-    action_cat = optimal_policy["action_category"]
-    opt_to_map["action_category"] = action_cat 
-    
-    # st.write('Opt Map')
-    # st.write(opt_to_map)
-
-    # [MAPs]  Maps to encode categories
-    optimal_states_cat_to_action_cat_map = dict([(i,[a]) for i, a in zip(opt_to_map['States Category'], opt_to_map['action_category'])])
-    optimal_state_cat_to_state_map = dict([(i,[a]) for i, a in zip(opt_to_map['States Category'], opt_to_map['States'])])
-    optimal_action_cat_to_action = dict([(i,[a]) for i, a in zip(opt_to_map['action_category'], opt_to_map['action'])])
+    # The optimal policy lists one action category per state category, row i for category i
+    policy = optimal_policy['action_category'].to_numpy()
+    action_costs = campaign_action_costs(transition_probabilities, len(actions))
 
     # SIMULATIONS
+    # Trajectories are simulated in chunks and dropped, only their statistics are kept
+    if (precision is None):
+        campaign_statistics = simulationDependencies.simulate_campaign_statistics(matrix_prob, policy, current_state, periods, simulations, state_values, action_costs, workers = workers)
+    else:
+        campaign_statistics, stop_reason = simulationDependencies.simulate_to_precision(matrix_prob, policy, current_state, periods, state_values, action_costs,
+                                                                                         precision["Action Frequency"], precision["Average CLV Change"],
+                                                                                         confidence = precision["Confidence"], time_budget = precision["Time Budget"], workers = workers)
+        simulations = campaign_statistics.count
 
-    # Action Control Structure 
-    action_storage = []
-    state_storage = []
+    statistics = campaign_statistics.summary()
 
-    for s in range(simulations):
+    st.write('---')
+    st.write('## Marketing Campaign over {} Simulations Result'.format(simulations))
+    st.info('Here N simulations are calculated using the inputs of MCP. The user sees below a summary table as well as some visualizations.')
 
-        action_simulation_number = []
-        state_transition = []
+    result, averages, total_cost = simulationDependencies.build_campaign_summary(statistics.get("Action Shares"), statistics.get("Average CLV Change"), actions, action_costs)
 
-        delta_clv_count = 0
-    
-        counter = 0
-        while counter < periods:
-            
-            current_action = optimal_states_cat_to_action_cat_map.get(current_state)[0]
-            action_simulation_number.append(current_action)
-        
-            prob_matrix_current = matrix_prob[current_action]
-            # c1.write('[START] For period {} the state is {} and the matrix considered is {}'.format(count, current_state, current_action))
-            # c1.write(prob_matrix_current)
+    display_campaign_summary(result, averages, total_cost)
 
-            random_sample = sample(list(enumerate(sorted(prob_matrix_current[current_state]))), 1)
-            current_state = random_sample[0][0]
-            state_transition.append(current_state)
-            # if (count == 0):
-            #     c1.write('[END] For period {} the follow up state is {} with prob. of {} from sample {}'.format(count, current_state, random_sample[0][1], random_sample,0))
-            # else:
-            #     c1.write('[END] For period {} the follow up state is {} with prob. of {} from sample {}'.format(count, current_state, random_sample[0][1], random_sample, 0))
+    st.metric(label="Average CLV Change from Start to End", value = round(statistics.get("CLV Delta"), 3))
 
-            # c1.markdown('---')
+    if (precision is not None):
+        display_precision(campaign_statistics, precision, stop_reason, averages.index[:len(actions)].to_list())
 
-            counter = counter + 1        
+    # Store Run
+    store_campaign(simulations, initial_state, averages, total_cost, len(actions))
 
-        action_storage.append(action_simulation_number)
-        state_storage.append(state_transition)
-            
-        # # [FORMATING RESULT -> RESULT DATAFRAME]
-        campaign_df = pd.DataFrame(state_storage[s], columns = ["States"])
-        campaign_df['Period'] = campaign_df.index
-        campaign_df['Period'] = campaign_df['Period'].apply(lambda x: x + 1)
-        first_column = campaign_df.pop('Period')
-        campaign_df.insert(0, 'Period', first_column)
-
-        campaign_df = campaign_df.replace({"States": optimal_state_cat_to_state_map})
-        campaign_df['Best Actions'] = action_storage[s]
-        
-        campaign_df = campaign_df.replace({"States": optimal_state_cat_to_state_map})
+def display_precision(campaign_statistics, precision, stop_reason, action_names):
 
-        # Total cost of Actions
-        cost_action_map = dict([(i,[a]) for i, a in zip(transition_probabilities['action_category'], transition_probabilities['cost'])])
-        campaign_df['Costs'] = campaign_df['Best Actions']
-        campaign_df = campaign_df.replace({"Costs": cost_action_map})
-        campaign_df = campaign_df.replace({"Best Actions": optimal_action_cat_to_action})
+    """
+    display_precision(...) renders the confidence intervals achieved
+    by the Target Precision mode next to the requested ones.
 
-        # Delva CLV
-        clvs = campaign_df['States'].to_list()
-        delta_clv = clvs[len(clvs) - 1]- clvs[0]
-        delta_clv_count = delta_clv_count + delta_clv
+    :param campaign_statistics: CampaignStatistics of the run
+    :param precision: targets from precision_inputs(...)
+    :param stop_reason: why the simulation stopped
+    :param action_names: names of the actions in category order
+    """
 
-        # c1.markdown('#### Result Table')
-        # c1.table(campaign_df)
+    half_widths = campaign_statistics.half_widths(precision["Confidence"])
+    summary = campaign_statistics.summary()
 
-        # simulation_backlog['Marketing Campaign'] = campaign_df['Best Actions'].to_list()
+    st.markdown('#### Achieved Precision')
+    if (stop_reason == "Precision Reached"):
+        st.success('The requested precision was reached after {} simulations.'.format(campaign_statistics.count))
+    else:
+        st.warning('The simulation stopped ({}) after {} simulations before the requested precision was reached.'.format(stop_reason.lower(), campaign_statistics.count))
 
-        # st.write(simulation_backlog)
+    frequency = summary.get("Action Shares").mean(axis=0)
+    clv_change = summary.get("Average CLV Change").mean()
 
-        # st.write(state_transition)
-        # st.write(action_storage)
+    precision_df = pd.DataFrame({
+        'Average': np.append(frequency, clv_change),
+        'Half-Width': np.append(half_widths["Action Frequency"], half_widths["Average CLV Change"]),
+        'Target Half-Width': [precision["Action Frequency"]] * len(frequency) + [precision["Average CLV Change"]]
+    }, index = action_names + ['Average CLV Change'])
+    precision_df['Lower'] = precision_df['Average'] - precision_df['Half-Width']
+    precision_df['Upper'] = precision_df['Average'] + precision_df['Half-Width']
 
-        # c1.write('[END] In Simulation Number {}'.format(s))
+    st.write(precision_df)
 
-    # st.write(action_storage)
-    # st.write(state_storage)
+def run_exact_campaign(states, actions, transition_probabilities, optimal_policy, periods, initial_state, sparse=False):
 
-    list_summary = ['Period']
+    """
+    run_exact_campaign(...) is the exact mode of run_mcp_solver(...). Instead of
+    simulating customers it propagates the state distribution of the customer
+    through the Markov chain induced by the optimal policy, which gives the
+    expected action shares, CLV and cost without sampling noise.
 
-    for a in range(len(actions['Actions'].to_list())):
-        list_summary.append(actions['Actions'].to_list()[a])
+    :param states: set states
+    :param actions: set actions
+    :param transition_probabilities: transition probabilities & rewards combined
+    :param optimal_policy: optimal policy from MDP
+    :param periods: enumber of decision periods
+    :param initial_state: customer initial state
+    :param sparse: whether the transition matrices should be stored sparsely
+    """
 
-    summary_df = pd.DataFrame(columns = list_summary)
+    st.write('---')
+    st.write('## Expected Marketing Campaign')
+    st.info('Here the expected campaign is calculated exactly from the state distribution of the customer in every period, i.e. the result of infinitely many simulations.')
 
-    for c in range(len(list_summary)):
-        zeros = np.zeros(periods)
-        summary_df[list_summary[c]] = zeros
+    matrix_prob, report = mdpDependencies.get_transition_tensor(transition_probabilities, len(actions), len(states), sparse)
 
-    summary_df['Period'] = summary_df.index
-    summary_df['Period'] = summary_df['Period'].apply(lambda x: x + 1)
+    states = states.sort_values(by=['States Category'])
+    state_values = states['States'].to_numpy(dtype=float)
+    current_state = int(states.loc[states['States'] == initial_state, 'States Category'].iloc[0])
 
-    for y in range(len(action_storage)):
-        intermediary = pd.DataFrame(action_storage[y], columns = ['Best Actions']).replace({"Best Actions": optimal_action_cat_to_action})
-        for z in range(periods):
-            for x in range(1, len(summary_df.columns)):
-                if (intermediary['Best Actions'][z] == summary_df.columns[x]):
-                   summary_df[summary_df.columns[x]][z] = summary_df[summary_df.columns[x]][z] + 1
-            
-    
-    summary_df = summary_df.apply(lambda x: x * 1/simulations)
-    summary_df['Period'] = summary_df['Period'].apply(lambda x: x * simulations).astype(int)
+    policy = optimal_policy['action_category'].to_numpy()
+    action_costs = campaign_action_costs(transition_probabilities, len(actions))
+
+    expected = simulationDependencies.expected_campaign(matrix_prob, policy, current_state, periods, state_values, action_costs)
+
+    result, averages, total_cost = simulationDependencies.build_campaign_summary(expected.get("Action Shares"), expected.get("Expected CLV Change"), actions, action_costs)
 
-    summary_df = summary_df.drop(['Period'], axis = 1)
-    summary_df['Overall Best Action'] = summary_df.idxmax(axis=1)
-    summary_df['Period'] = summary_df.index
-    summary_df['Period'] = summary_df['Period'].apply(lambda x: x + 1)
+    display_campaign_summary(result, averages, total_cost)
 
-    summary_df.insert(0, 'Period', summary_df.pop('Period'))
+    c1, c2 = st.columns(2)
+    c1.metric(label="Expected Total Cost of the Campaign", value = round(expected.get("Expected Total Cost"), 3))
+    c2.metric(label="Expected CLV after {} Periods".format(periods), value = round(expected.get("Expected CLV")[-1], 3), delta = round(expected.get("Expected CLV")[-1] - state_values[current_state], 3))
 
-    cost_action_name_map = dict([(i,[a]) for i, a in zip(transition_probabilities['action'], transition_probabilities['cost'])])
-    summary_df['Cost Overall Best Action'] = summary_df['Overall Best Action']
-    summary_df = summary_df.replace({"Cost Overall Best Action": cost_action_name_map})
+    st.markdown('#### Expected CLV')
+    st.line_chart(pd.DataFrame({'Expected CLV': expected.get("Expected CLV")}, index = range(1, periods + 1)))
 
-    for u in range(len(state_storage)):
-        intermediary_clv = pd.DataFrame(state_storage[u], columns = ['Average CLV Change']).replace({"Average CLV Change": optimal_state_cat_to_state_map})
-        for v in range(periods - 1):
-                intermediary_clv['Average CLV Change'][v] = intermediary_clv['Average CLV Change'][v] + state_storage[u][v + 1] - state_storage[u][v]
+    display_overview(periods, [str(s) for s in states['States']], expected.get("State Distributions"), result['Overall Best Action'].to_list())
 
-    av_start_end = 0
-    for q in range(len(state_storage)):
-        intermediary_clv_two = pd.DataFrame(state_storage[q], columns = ['CLV']).replace({"CLV": optimal_state_cat_to_state_map})
-        # st.write(intermediary_clv_two['CLV'][periods-1])
-        av_start_end = av_start_end + intermediary_clv_two['CLV'][periods-1]
+    # Store Run, an exact campaign simulates no customers
+    store_campaign(0, initial_state, averages, total_cost, len(actions))
 
-    av_start_end = (av_start_end / simulations) - state_storage[0][0]
-    # st.write(av_start_end)
+def campaign_action_costs(transition_probabilities, number_actions):
 
-    intermediary_clv['Average CLV Change'] = intermediary_clv['Average CLV Change'] .apply(lambda x: x * 1 / simulations)
-    result = pd.concat([summary_df, intermediary_clv], axis=1)
+    """
+    campaign_action_costs(...) reads the cost of every action category
+    from the MCP input.
 
-    overall_action_set = result['Overall Best Action'].to_list()
-    # st.write(overall_action_set)
+    :return: (A,) array
+    """
 
-    result = result.drop(['Period', 'Overall Best Action'], axis = 1)
+    costs = transition_probabilities.groupby('action_category')['cost'].first()
 
-    averages = result.mean(axis = 0)
-    # st.write(averages)
+    return costs.reindex(range(number_actions)).fillna(0).to_numpy(dtype=float)
 
-    total_cost = result['Cost Overall Best Action'].sum()
+def display_campaign_summary(result, averages, total_cost):
 
-    result['Overall Best Action'] = overall_action_set
-    result['Period'] = result.index
-    result['Period'] = result['Period'].apply(lambda x: x + 1)
+    """
+    display_campaign_summary(...) renders the summary table,
+    the averages and the visualizations of a campaign.
+
+    :param result: summary table per period
+    :param averages: averages of the summary table
+    :param total_cost: Total Cost of Overall Best Campaign
+    """
+
+    # plotly is only needed once a campaign was simulated
+    import plotly.express as px
+    import plotly.graph_objects as go
 
-    result = result.reindex(columns=['Period','agent', 'call', 'email', 'mail', 'no contact', 'tv', 'Overall Best Action', 'Cost Overall Best Action'])
-    
     st.markdown('#### Table Summary')
     st.write(result)
     st.download_button(
@@ -355,8 +380,8 @@ def run_mcp_solver(states, actions, transition_probabilities, optimal_policy, pe
     avg_values = averages.to_list()
     # st.write(avg_values)
 
-    c3, c4, c5, c6, c7, c8, c9, c10, c11 = st.columns([1,1,1,1,1,1,1,1,2])
-    avg_cols = [c3, c4, c5, c6, c7, c8, c9, c10]
+    avg_cols = st.columns([1] * len(avg_index) + [2])
+    c11 = avg_cols[-1]
 
     for m in range(len(avg_index)):
         avg_cols[m].metric(avg_index[m].title(), round(avg_values[m], 3))
@@ -374,12 +399,14 @@ def run_mcp_solver(states, actions, transition_probabilities, optimal_policy, pe
     st.markdown('## Visualizations')
     c15, c16, c17 = st.columns(3)
 
-    plot3d = go.Figure(data=[go.Surface(x = result['Period'], z =result[['agent', 'call', 'email', 'mail', 'no contact', 'tv']])])
+    action_names = result.columns[1:-2].to_list()
+
+    plot3d = go.Figure(data=[go.Surface(x = result['Period'], z =result[action_names])])
     plot3d.update_layout(title='Action Distribution over Periods', autosize=False,
                 width=500, height=500)
     c15.plotly_chart(plot3d)  
 
-    pie = px.pie(values=avg_values[0:5], names= avg_index[0:5])
+    pie = px.pie(values=avg_values[0:len(action_names)], names= avg_index[0:len(action_names)])
     pie.update_traces(textposition='inside')
     pie.update_layout(title='Average Action (%)', autosize=False, uniformtext_minsize=12, uniformtext_mode='hide', width=500, height=500)      
     c16.plotly_chart(pie)
@@ -388,8 +415,25 @@ def run_mcp_solver(states, actions, transition_probabilities, optimal_policy, pe
     hist.update_layout(title='Average Action Distribution', autosize=False, width=500, height=500 )
     c17.plotly_chart(hist)
 
-    # Store Run
-    store_run(simulations,	initial_state,	avg_values[0], avg_values[1], avg_values[2], avg_values[3], avg_values[4], 	avg_values[5], 	avg_values[6], 	avg_values[7], total_cost)
+def store_campaign(simulations, initial_state, averages, total_cost, number_actions):
+
+    """
+    store_campaign(...) offers to store a campaign of any mode through
+    store_run(...). The database only has columns for the actions of the
+    authors' data, hence the averages are picked by name and other
+    action sets cannot be shared.
+
+    :param simulations: number of simulated customers
+    :param initial_state: customer initial state
+    :param averages: averages from build_campaign_summary(...)
+    :param total_cost: total cost of the overall best campaign
+    :param number_actions: number of actions of the campaign
+    """
+
+    if (set(averages.index[:number_actions].astype(str)) == set(STORED_ACTIONS)):
+        store_run(simulations, initial_state, *[averages.get(action) for action in STORED_ACTIONS], averages.get('Cost Overall Best Action'), averages.get('Average CLV Change'), total_cost)
+    else:
+        st.info('Only campaigns over the actions {} can be shared.'.format(', '.join(STORED_ACTIONS)))
 
 def store_run(simulations,	initial_state,	agent_average,	call_average, email_average, mail_average, no_contact_average, tv_average, cost_overall_best_action, average_clv_change, total_cost_of_overall_best_campaign):
     
@@ -409,6 +453,9 @@ def store_run(simulations,	initial_state,	agent_average,	call_average, email_ave
     :param average_clv_change: Average CLV Change
     :param total_cost_of_overall_best_campaign: Total Cost of Overall Best Campaign
     """ 
+
+    # The database client is only needed once a run is shared
+    import model_dependencies.google_sheet as googleSheet
     
     store = ['Dont Share', 'Share Simulation']
     store_choice = st.radio('Let the world know about this Simulation', store)
@@ -442,125 +489,6 @@ def display_matrix_probability(path):
 
     return matrix_prob
 
-def input_to_probability_matrix(data, number_actions, number_states):
-
-    """
-    input_to_probability_matrix(...) transforms the dataframe of
-    transition prob. into a list of matrices for each action.
-
-    :param data: Trans. Probabilitites Dataframe
-    :param number_actions: Number Actions
-    :param number_states: Number of States
-
-    :return: List of Matrices
-    """ 
-
-    # Probability Matrix
-    transition_matrices = []
-
-    for i in range(number_actions):
-
-        action_transition_matrix = np.zeros((number_states,number_states))
-
-        for j in range(number_states):
-            for h in range (number_states):
-
-                coordinate = (j, i, h)
-
-                for l in range (len(data.index)):
-                    cooperator = (data['state_category'][l], data['action_category'][l], data['follow_up_state_category'][l])
-
-                    if (cooperator[0] == coordinate[0] and cooperator[1] == coordinate[1] and cooperator[2] == coordinate[2]):
-                        action_transition_matrix[j][h] = data['Probability Triple'][l]
-
-        transition_matrices.append(action_transition_matrix)
-
-    return transition_matrices
-
-def calculate_probability_distributions(matrix_prob, current_state, periods, action):
-
-    """
-    calculate_probability_distributions(...) calculates the 
-    probability distributions for every state for every given 
-    period.
-
-    :param matrix_prob: transition probabilities from Customer Dynammics
-    :param current_state: initial state of customer
-    :param periods: number of periods
-    :param action: list of possible actions
-
-    :return: 3D list containing the state probabilities, List of optimal actions
-    """ 
-
-    #st.write('---')
-    #st.write('## Calculating Probability Distributions')
-
-    num_rows, num_cols = matrix_prob.shape
-
-    init_vector = np.zeros(num_rows)
-    init_vector[current_state - 1] = 1
-
-    state_vector = list()
-    state_vector.append(init_vector.reshape((1, 3)))
-
-    for j in range(1, periods):
-        result = np.zeros(num_rows) 
-
-        result = np.matmul(state_vector[0].reshape((1, 3)), matrix_power(matrix_prob, j))
-    
-        state_vector.append(result)
-
-    # st.write(state_vector)
-
-    for i in range(len(state_vector)):
-        state_vector[i] = np.array(state_vector[i])
-
-    # st.write(state_vector)
-
-    max_values = np.zeros(periods)
-    campaign = ""
-
-    for h in range(periods):
-
-        count = 0
-        for k in range(num_cols):
-            if (state_vector[h][0][k] > max_values[h]):
-                # st.write('New Max {}'.format(state_vector[h][0][k]))
-                max_values[h] = state_vector[h][0][k]
-                count = k
-
-                # st.write('Count {} and Action {}'.format(count, action[count]))
-            
-        campaign = campaign + "," + action[count]
-                
-    campaign_recommendation = campaign.split(",")
-    campaign_recommendation.pop(0)
-    
-    #st.write('Corresponding Marketing Campaign {}'.format(campaign_recommendation))
-    return state_vector, campaign_recommendation
-
-def get_state_vector_coeffiecients(state_vector, periods, num_cols):
-
-    """
-    get_state_vector_coeffiecients(...) reduces the dimensionality of
-    state_vector datastructure to 2d datastructure.
-
-    :param state_vector: 3D datastructure
-    :param periods: number of periods
-    :param num_cols: number of states
-    :return: 2D list containing the state probabilities
-    """ 
-
-    vector_coefficients = np.zeros((periods, num_cols))
-
-    for h in range(periods):
-            for k in range(num_cols):
-                vector_coefficients[h][k] = state_vector[h][0][k]
-
-    #st.write(vector_coefficients)
-
-    return vector_coefficients 
-
 def display_overview(periods, states, state_vectors_prob, campaign_recommendation):
 
     """
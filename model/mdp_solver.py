@@ -1,11 +1,11 @@
 # Dependencies
 import streamlit as st
-import mdptoolbox
-import mdptoolbox.example
 import pandas as pd
 import numpy as np
 from inform import Descriptions
 from model_dependencies import mdp_dependencies
+from model_dependencies import tensor_dependencies
+from model_dependencies import data_dependencies
 
 def solver():
 
@@ -37,11 +37,11 @@ def solver():
         transitions = c1.file_uploader("Upload Transition Probability Dataframe", type=["csv"], key='transitions_mdp')
 
         if (rewards is not None and transitions is not None):
-            data_rewards = pd.read_csv(rewards).iloc[: , 1:]
-            data_transitions= pd.read_csv(transitions).iloc[: , 1:]
+            data_rewards = data_dependencies.load_upload(rewards)
+            data_transitions = data_dependencies.load_upload(transitions)
 
             # How to solve the model
-            solver_options = ['Policy Iteration', 'Value Iteration', 'Q-Learnings']
+            solver_options = ['Policy Iteration', 'Value Iteration', 'Modified Policy Iteration', 'Gauss-Seidel Value Iteration', 'Q-Learnings']
             solver_chosen = c1.selectbox("How should the problem be solved?", solver_options, help = Descriptions.SOLVERS)
 
             if (solver_chosen == "Q-Learnings"):
@@ -50,11 +50,12 @@ def solver():
                 number_iterations = 0.0
             
             discount_factor = get_discount_factor(c1, solver_chosen)
+            sparse = c1.checkbox("Use sparse transition model", help = Descriptions.SPARSE_MODEL)
                 
             display_data(data_rewards, data_transitions)
 
-            reward_matrix, number_actions, number_states = input_to_reward_matrix(data_rewards)
-            probability_matrix = input_to_probability_matrix(data_transitions, number_actions, number_states)
+            reward_matrix, number_actions, number_states = input_to_reward_matrix(data_rewards, sparse)
+            probability_matrix = input_to_probability_matrix(data_transitions, number_actions, number_states, sparse)
 
             result_dict = mdp_dependencies.solve_markov_decision_process(probability_matrix, reward_matrix, discount_factor, solver_chosen, number_iterations)
             optimal_policy = pd.DataFrame(list(result_dict.get("Optimal Policy")), columns = ['action_category']) 
@@ -67,6 +68,9 @@ def solver():
             st.write(optimal_policy)  
             # csv = convert_df(optimal_policy)
 
+            if c1.checkbox("Run WACC & decision period sensitivity analysis", help = Descriptions.MDP_SENSITIVITY):
+                mdp_dependencies.display_sensitivity_analysis(probability_matrix, reward_matrix, solver_chosen, transition_action_map)
+
             rewards_list = data_rewards['Reward (state, action, follow_up_state)'].to_list()
             action_cost_list = data_rewards['cost'].to_list()
             data_transitions['Reward (state, action, follow_up_state)'] = rewards_list
@@ -95,11 +99,11 @@ def solver():
     else: 
 
         # Own Data
-        data_rewards = pd.read_csv('data/datasets/official/markov_decision_process/mdp_rewards.csv')
-        data_transitions = pd.read_csv('data/datasets/official/markov_decision_process/mdp_transitions.csv')
+        data_rewards = data_dependencies.load_dataset('data/datasets/official/markov_decision_process/mdp_rewards.csv')
+        data_transitions = data_dependencies.load_dataset('data/datasets/official/markov_decision_process/mdp_transitions.csv')
 
         # How to solve the model
-        solver_options = ['Policy Iteration', 'Value Iteration', 'Q-Learnings']
+        solver_options = ['Policy Iteration', 'Value Iteration', 'Modified Policy Iteration', 'Gauss-Seidel Value Iteration', 'Q-Learnings']
         solver_chosen = c1.selectbox("How should the problem be solved?", solver_options, help = Descriptions.SOLVERS)
 
         if (solver_chosen == "Q-Learnings"):
@@ -108,11 +112,12 @@ def solver():
             number_iterations = 0.0
         
         discount_factor = get_discount_factor(c1, solver_chosen)
+        sparse = c1.checkbox("Use sparse transition model", help = Descriptions.SPARSE_MODEL)
             
         display_data(data_rewards, data_transitions)
 
-        reward_matrix, number_actions, number_states = input_to_reward_matrix(data_rewards)
-        probability_matrix = input_to_probability_matrix(data_transitions, number_actions, number_states)
+        reward_matrix, number_actions, number_states = input_to_reward_matrix(data_rewards, sparse)
+        probability_matrix = input_to_probability_matrix(data_transitions, number_actions, number_states, sparse)
 
         result_dict = mdp_dependencies.solve_markov_decision_process(probability_matrix, reward_matrix, discount_factor, solver_chosen, number_iterations)
         optimal_policy = pd.DataFrame(list(result_dict.get("Optimal Policy")), columns = ['action_category']) 
@@ -125,6 +130,9 @@ def solver():
         st.write(optimal_policy)  
         # csv = convert_df(optimal_policy)
 
+        if c1.checkbox("Run WACC & decision period sensitivity analysis", help = Descriptions.MDP_SENSITIVITY):
+            mdp_dependencies.display_sensitivity_analysis(probability_matrix, reward_matrix, solver_chosen, transition_action_map)
+
         rewards_list = data_rewards['Reward (state, action, follow_up_state)'].to_list()
         action_cost_list = data_rewards['cost'].to_list()
         data_transitions['Reward (state, action, follow_up_state)'] = rewards_list
@@ -146,115 +154,119 @@ def solver():
             key='mcp-csv'
         )
     
-def input_to_reward_matrix(data):
+def input_to_reward_matrix(data, sparse=False):
 
     """
     input_to_reward_matrix(data)
-    transforms dataframe of rewards into a list of matrices with rewards for every 
+    transforms dataframe of rewards into an (A,S,S) array with rewards for every 
     specific action.
 
     :param data: Rewards Dataframe
+    :param sparse: whether a list of sparse matrices should be built instead
 
-    :return reward_matrices: list of reward matrices
+    :return reward_matrices: (A,S,S) array (or list of sparse matrices) of reward matrices
+    :return number_actions: Number Actions
+    :return number_states: Number States
     """
 
     st.markdown('---')
     st.markdown('## Input Transformation: Rewards')
 
-    # Action Count
-    action_count = data["action_category"].value_counts(normalize=True)
-    number_actions = len(action_count)
-
-    # State Count
-    state_count = data["state_category"].value_counts(normalize=True)
-    number_states = len(state_count)
-
-    c1, c2 = st.columns(2)
-
-    c1.markdown("#### Reward Matrices (S,A,S')")
-
-    # REWARD Matrix
-    reward_matrices = []
-
-    for i in range(number_actions):
-
-        action_reward_matrix = np.zeros((number_states,number_states))
-
-        for j in range(number_states):
-            for h in range (number_states):
-
-                coordinate = (j, i, h)
-
-                for l in range (len(data.index)):
-                    cooperator = (data['state_category'][l], data['action_category'][l], data['follow_up_state_category'][l])
-
-                    if (cooperator[0] == coordinate[0] and cooperator[1] == coordinate[1] and cooperator[2] == coordinate[2]):
-                        action_reward_matrix[j][h] = data['Reward (state, action, follow_up_state)'][l]
-
-                        # st.write('Constructed ({})'.format(cooperator))
-    
-            
-        c1.write('Action {} Matrix'.format(i))
-        c1.write(action_reward_matrix)
-
-        reward_matrices.append(action_reward_matrix)
+    reward_matrices, report = tensor_dependencies.build_reward_tensor(data, sparse=sparse)
+    number_actions, number_states = len(reward_matrices), reward_matrices[0].shape[0]
 
-    c2.markdown('#### Storage')
-    c2.write(reward_matrices)
+    display_tensor_report(report)
+    display_matrices("#### Reward Matrices (S,A,S')", reward_matrices)
 
     return reward_matrices, number_actions, number_states
 
-def input_to_probability_matrix(data, number_actions, number_states):
+def input_to_probability_matrix(data, number_actions, number_states, sparse=False):
 
     """
     input_to_probability_matrix(data, number_actions, number_states)
-    transforms dataframe of trans. prob. into a list of matrices for every 
+    transforms dataframe of trans. prob. into an (A,S,S) array of matrices for every 
     specific action.
 
     :param data: Trans. Prob. Dataframe
     :param number_actions: Number Actions
     :param number_states: Number States
+    :param sparse: whether a list of sparse matrices should be built instead
 
-    :return transition_matrices: list of probability matrices
+    :return transition_matrices: (A,S,S) array (or list of sparse matrices) of probability matrices
     """
 
     st.markdown('---')
     st.markdown('## Input Transformation: Transition Probability')
 
+    transition_matrices, report = mdp_dependencies.get_transition_tensor(data, number_actions, number_states, sparse)
+
+    display_tensor_report(report)
+    display_matrices("#### Transition Matrices (S,A,S')", transition_matrices)
+
+    return transition_matrices
+
+def display_matrices(title, matrices):
+
+    """
+    display_matrices(...) shows the matrix of every action. Sparse
+    matrices are summarized by their number of stored entries, as
+    writing them out defeats the purpose of storing them sparsely.
+
+    :param title: Section title
+    :param matrices: (A,S,S) array or list of sparse matrices
+    """
+
     c1, c2 = st.columns(2)
 
-    c1.markdown("#### Transition Matrices (S,A,S')")
+    c1.markdown(title)
+
+    if (tensor_dependencies.is_sparse(matrices)):
+        number_states = matrices[0].shape[0]
+        summary = pd.DataFrame({'Stored Entries': [m.nnz for m in matrices]})
+        summary['Density'] = summary['Stored Entries'] / (number_states * number_states)
+        c1.write(summary)
 
-    # REWARD Matrix
-    transition_matrices = []
+        c2.markdown('#### Storage')
+        c2.write('{} sparse matrices of shape {}'.format(len(matrices), matrices[0].shape))
 
-    for i in range(number_actions):
+    else:
+        for i in range(len(matrices)):
+            c1.write('Action {} Matrix'.format(i))
+            c1.write(matrices[i])
 
-        action_transition_matrix = np.zeros((number_states,number_states))
+        c2.markdown('#### Storage')
+        c2.write(list(matrices))
 
-        for j in range(number_states):
-            for h in range (number_states):
+def display_tensor_report(report):
 
-                coordinate = (j, i, h)
+    """
+    display_tensor_report(...) warns the user about (S,A,S') triples
+    which occur more than once or not at all in the input and about
+    (S,A) rows which are not row-stochastic.
 
-                for l in range (len(data.index)):
-                    cooperator = (data['state_category'][l], data['action_category'][l], data['follow_up_state_category'][l])
+    :param report: dict returned by the tensor builders
+    """
 
-                    if (cooperator[0] == coordinate[0] and cooperator[1] == coordinate[1] and cooperator[2] == coordinate[2]):
-                        action_transition_matrix[j][h] = data['Probability Triple'][l]
+    duplicates = report.get("Duplicate Triples")
+    missing = report.get("Missing Triples")
+    rescaled = report.get("Rescaled Rows")
+    empty = report.get("Empty Rows")
 
-                        # st.write('Constructed ({})'.format(cooperator))
-    
-            
-        c1.write('Action {} Matrix'.format(i))
-        c1.write(action_transition_matrix)
+    if (duplicates is not None and len(duplicates) > 0):
+        st.warning('{} (S,A,S\') triples occur more than once, the last occurrence was used.'.format(len(duplicates)))
+        st.write(duplicates)
 
-        transition_matrices.append(action_transition_matrix)
+    if (missing is not None and len(missing) > 0):
+        st.warning('{} (S,A,S\') triples are missing and were set to 0.'.format(len(missing)))
+        st.write(missing)
 
-    c2.markdown('#### Storage')
-    c2.write(transition_matrices)
+    if (rescaled is not None and len(rescaled) > 0):
+        st.warning('{} (S,A) rows did not sum up to 1 and were rescaled.'.format(len(rescaled)))
+        st.write(rescaled)
 
-    return transition_matrices
+    if (empty is not None and len(empty) > 0):
+        st.warning('{} (S,A) rows have no probability mass, the customer stays in his state.'.format(len(empty)))
+        st.write(empty)
 
 def display_data(rewards, transitions):
 
@@ -328,11 +340,11 @@ def select_user_journey():
         transitions = c1.file_uploader("Upload Transition Probability Dataframe", type=["csv"], key='transitions_mdp')
 
         if (rewards is not None and transitions is not None):
-            data_rewards = pd.read_csv(rewards).iloc[: , 1:]
-            data_transitions= pd.read_csv(transitions).iloc[: , 1:]
+            data_rewards = data_dependencies.load_upload(rewards)
+            data_transitions = data_dependencies.load_upload(transitions)
 
             # How to solve the model
-            solver_options = ['Policy Iteration', 'Value Iteration', 'Q-Learnings']
+            solver_options = ['Policy Iteration', 'Value Iteration', 'Modified Policy Iteration', 'Gauss-Seidel Value Iteration', 'Q-Learnings']
             solver_chosen = c1.selectbox("How should the problem be solved?", solver_options, help = Descriptions.SOLVERS)
 
             if (solver_chosen == "Q-Learnings"):
@@ -380,7 +392,7 @@ def select_user_journey():
                                                     help="Default discount value measured by WACC at 7%.")
 
         # How to solve the model
-        solver_options = ['Policy Iteration', 'Value Iteration', 'Q-Learnings']
+        solver_options = ['Policy Iteration', 'Value Iteration', 'Modified Policy Iteration', 'Gauss-Seidel Value Iteration', 'Q-Learnings']
         solver_chosen = c1.selectbox("How should the problem be solved?", solver_options, help = Descriptions.SOLVERS)
         return data_rewards, data_transitions, discount_factor, solver_chosen
 
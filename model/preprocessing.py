@@ -1,7 +1,6 @@
 # Dependencies
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import controller.preprocess as preProcess
 from inform import Descriptions
 import ast
@@ -141,6 +140,8 @@ def run_diagnostics(data):
     "missing_zero_values_table(....)"
     """
 
+    import plotly.express as px
+
     st.markdown('---')
     st.markdown('## Data Diagnostics')
     diag = missing_zero_values_table(data)
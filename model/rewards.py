@@ -1,7 +1,11 @@
 # Dependencies
 import streamlit as st
 import pandas as pd
+import numpy as np
 from inform import Descriptions
+from model_dependencies import reward_dependencies
+from model_dependencies import tensor_dependencies
+from model_dependencies import data_dependencies
 
 def display_input_rewards_actions():
 
@@ -31,7 +35,7 @@ def display_input_rewards_actions():
         upload = c1.file_uploader("Upload Dataframe", type=["csv"], key='reward_data')
 
         if (upload is not None):
-            data = pd.read_csv(upload).iloc[: , 1:]
+            data = data_dependencies.load_upload(upload)
 
             # Visualize Data
             st.markdown('---')
@@ -50,65 +54,10 @@ def display_input_rewards_actions():
 
             if (cost_actions_upload is not None):
                 st.markdown('---')
-                cost_actions = pd.read_csv(cost_actions_upload)
+                cost_actions = data_dependencies.load_upload(cost_actions_upload)
                 # st.write(cost_actions)
 
-                c3, c4 = st.columns([2, 1])
-
-                # DELTA CLV & REWARDS
-                c3.markdown('## Delta CLV & Reward Calculation')
-                state = c3.selectbox("Which column in the data input corresponds to the state column (S)?", data.columns, help = 'Pick the column (State) in your data set!')
-                follow_up_state = c3.selectbox("Which column in the data input corresponds to the follow_up_state column (S')", data.columns, help = "Pick the column (Follow Up State) in your data set!")
-
-                c4.markdown('## Tipp')
-                c4.info("Here it is important that the user chooses the columns regarding the categories of states, actions and follow-up states. Hence, (S,A,S') is a Triple of Categories, (states_category, action_category, follow_up_category), and not the actual (state, actions, follow-up state).")
-
-                data = pd.merge(data, cost_actions, on = 'action', how = 'outer')
-                # st.markdown('Action Cost Incurred')
-                # st.write(data)
-                data['cost'] = data['cost'].astype(float)
-
-                # MDP Form
-                data["state_category"] = data["state"].astype('category').cat.codes
-                data["state_category"].astype('int')
-
-                data["action_category"] = data["action"].astype('category').cat.codes
-                data["action_category"].astype('int')
-
-                data["follow_up_state_category"] = data["follow_up_state"].astype('category').cat.codes
-                data["follow_up_state_category"].astype('int')
-
-                tuple_cols_target = c3.multiselect("Select all columns (S,A,S') Category that should be transformed into a single Triple", data.columns, key="tripler_reward", help = "Hint: Here (S,A,S') refers to the categories. E.g. (state_category, action_category, follow_up_state_category)")
-
-                if c3.button('Calculate Rewards & Get MDP Input'):
-                    data["Delta CLV"] = data[follow_up_state] - data[state]
-                    data['cost'] = pd.to_numeric(data['cost'])
-                    data['Reward (state, action, follow_up_state)'] = reward_factor * data["Delta CLV"] - (1 - reward_factor) * data["cost"]
-                    data = data.sort_values(['state_category', 'action_category', 'follow_up_state_category'])
-
-                    if (len(tuple_cols_target) == 3):
-
-                        st.write('## MDP Frame Input')
-                
-                        data['Triple'] = data[tuple_cols_target].apply(tuple, axis = 1)
-                        simplified = data.filter(['Triple','Reward (state, action, follow_up_state)', 'cost'], axis=1)
-                        cleaned_simplified = simplified.drop_duplicates(subset=['Triple']).copy()
-                        simplified_index = cleaned_simplified.reset_index().copy()
-                        simplified_index = simplified_index.drop(['index'], axis = 1)
-
-                        simplified_index[['state_category', 'action_category', 'follow_up_state_category']] = pd.DataFrame(simplified_index['Triple'].tolist(), index = simplified_index.index)
-                        st.write(simplified_index)
-
-                        csv = convert_df(simplified_index)
-                        st.download_button(
-                            "Dowload Reward MDP Input",
-                            csv,
-                            "mdp_rewards.csv",
-                            "text/csv",
-                            key='rewards-csv'
-                        )
-                    else:
-                        st.warning('A Triple requires exactly 3 columns, namely (state_category, action_category, follow_up_category).')
+                display_reward_calculation(data, cost_actions, reward_factor, 'rewards-csv')
 
             else:
                 st.markdown('---')
@@ -121,8 +70,8 @@ def display_input_rewards_actions():
     else:
 
         # Input Data
-        data = pd.read_csv('data/datasets/official/rewards/reward_input.csv').iloc[: , 1:]
-        cost_actions = pd.read_csv('data/datasets/official/actions/actions_cost.csv')
+        data = data_dependencies.load_dataset('data/datasets/official/rewards/reward_input.csv')
+        cost_actions = data_dependencies.load_dataset('data/datasets/official/actions/actions_cost.csv')
 
         # Visualize Data
         st.markdown('---')
@@ -140,60 +89,99 @@ def display_input_rewards_actions():
         st.write(cost_actions)
 
         st.markdown('---')
-        c3, c4 = st.columns([2, 1])
-
-        # DELTA CLV & REWARDS
-        c3.markdown('## Delta CLV & Reward Calculation')
-        state = c3.selectbox("Which column in the data input corresponds to the state column (S)?", data.columns, help = 'Pick the column (State) in your data set!')
-        follow_up_state = c3.selectbox("Which column in the data input corresponds to the follow_up_state column (S')", data.columns, help = "Pick the column (State's) in your data set!")
-
-        c4.markdown('## Tipp')
-        c4.info("Here it is important that the user chooses the columns regarding the categories of states, actions and follow-up states. Hence, (S,A,S') is a Triple of Categories, (states_category, action_category, follow_up_category), and not the actual (state, actions, follow-up state).")
-
-        data = pd.merge(data, cost_actions, on = 'action', how = 'outer')
-        # st.markdown('Action Cost Incurred')
-        # st.write(data)
-        data['cost'] = data['cost'].astype(float)
-
-        # MDP Form
-        data["state_category"] = data["state"].astype('category').cat.codes
-        data["state_category"].astype('int')
-
-        data["action_category"] = data["action"].astype('category').cat.codes
-        data["action_category"].astype('int')
-
-        data["follow_up_state_category"] = data["follow_up_state"].astype('category').cat.codes
-        data["follow_up_state_category"].astype('int')
-
-        tuple_cols_target = c3.multiselect("Select all columns (S,A,S') Category that should be transformed into a single Triple", data.columns, key="tripler_reward", help = "Hint: Here (S,A,S') refers to the categories. E.g. (state_category, action_category, follow_up_state_category)")
-
-        if c3.button('Calculate Rewards & Get MDP Input'):
-            data["Delta CLV"] = data[follow_up_state] - data[state]
-            data['cost'] = pd.to_numeric(data['cost'])
-            data['Reward (state, action, follow_up_state)'] = reward_factor * data["Delta CLV"] - (1 - reward_factor) * data["cost"]
-            data = data.sort_values(['state_category', 'action_category', 'follow_up_state_category'])
-
-            if (len(tuple_cols_target) == 3):
-
-                st.write('## MDP Frame Input')
-                data['Triple'] = data[tuple_cols_target].apply(tuple, axis = 1)
-                simplified = data.filter(['Triple','Reward (state, action, follow_up_state)', 'cost'], axis=1)
-                cleaned_simplified = simplified.drop_duplicates(subset=['Triple']).copy()
-                simplified_index = cleaned_simplified.reset_index().copy()
-                simplified_index = simplified_index.drop(['index'], axis = 1)
-                simplified_index[['state_category', 'action_category', 'follow_up_state_category']] = pd.DataFrame(simplified_index['Triple'].tolist(), index = simplified_index.index)
-
-                st.write(data)
-                csv = convert_df(simplified_index)
-                st.download_button(
-                    "Dowload Reward MDP Input",
-                    csv,
-                    "mdp_rewards.csv",
-                    "text/csv",
-                    key ='second_reward'
-                )
-            else:
-                st.warning('A Triple requires exactly 3 columns, namely (state_category, action_category, follow_up_category).')
+        display_reward_calculation(data, cost_actions, reward_factor, 'second_reward')
+
+def display_reward_calculation(data, cost_actions, reward_factor, key):
+
+    """
+    display_reward_calculation(...) asks for the CLV columns, computes the
+    rewards of all triples and offers the mdp_rewards.csv frame for download.
+
+    :param data: Dataframe with (state, action, follow_up_state) rows
+    :param cost_actions: Dataframe with (action, cost)
+    :param reward_factor: weight of the CLV change against the cost
+    :param key: key of the download button
+    """
+
+    c3, c4 = st.columns([2, 1])
+
+    # DELTA CLV & REWARDS
+    c3.markdown('## Delta CLV & Reward Calculation')
+    state = c3.selectbox("Which column in the data input corresponds to the state column (S)?", data.columns, help = 'Pick the column (State) in your data set!')
+    follow_up_state = c3.selectbox("Which column in the data input corresponds to the follow_up_state column (S')", data.columns, help = "Pick the column (Follow Up State) in your data set!")
+
+    c4.markdown('## Tipp')
+    c4.info("Here it is important that the user chooses the columns holding the CLV of the state and of the follow-up state. The categories of (S,A,S') are derived from the state, action and follow_up_state columns.")
+
+    sweep_columns = tensor_dependencies.TRIPLE_COLUMNS + [tensor_dependencies.PROBABILITY_COLUMN]
+    if (set(sweep_columns).issubset(data.columns) and c3.checkbox('Sweep Reward Factors', help = Descriptions.REWARD_SWEEP)):
+        display_reward_sweep(data, cost_actions, state, follow_up_state)
+
+    if c3.button('Calculate Rewards & Get MDP Input'):
+
+        try:
+            result_dict = reward_dependencies.rewards_from_frame(data, cost_actions, reward_factor, state, follow_up_state)
+        except (KeyError, ValueError) as error:
+            st.error(error)
+            return None
+
+        st.write('## MDP Frame Input')
+        st.write(result_dict.get("Frame"))
+
+        csv = convert_df(result_dict.get("Frame"))
+        st.download_button(
+            "Dowload Reward MDP Input",
+            csv,
+            "mdp_rewards.csv",
+            "text/csv",
+            key=key
+        )
+
+        return result_dict
+
+def display_reward_sweep(data, cost_actions, state, follow_up_state):
+
+    """
+    display_reward_sweep(...) solves the MDP for a grid of reward factors
+    and lists the reward factor ranges sharing one optimal policy.
+
+    :param data: Dataframe with (state, action, follow_up_state) rows and 'Probability Triple'
+    :param cost_actions: Dataframe with (action, cost)
+    :param state: column holding the CLV of the state
+    :param follow_up_state: column holding the CLV of the follow-up state
+    """
+
+    c1, c2 = st.columns([2, 1])
+    number_factors = int(c1.number_input('Number of reward factors', min_value = 2, value = 100, step = 1))
+    wacc = c1.slider("WACC Factor", min_value=0.01, max_value = 1.0, value = 0.07, help="Default WACC value set to 7%.")
+    periods = int(c1.number_input("Number of decision periods in 1 year", min_value = 2, value = 12, step = 1))
+
+    if c1.button('Sweep Reward Factors'):
+
+        reward_factors = np.linspace(0.01, 1.0, number_factors)
+
+        # Transitions, CLV and labels all come from the category codes of the same frame
+        try:
+            sweep = reward_dependencies.sweep_frame_policies(data, cost_actions, reward_factors, np.power(1/(1+wacc), 1/periods), state, follow_up_state)
+        except (KeyError, ValueError) as error:
+            st.error(error)
+            return None
+
+        policies = pd.DataFrame(sweep.get("Action Labels")[sweep.get("Optimal Policies")], columns = sweep.get("State Labels").astype(str))
+        policies.insert(0, 'Reward Factor', reward_factors)
+
+        # Consecutive reward factors with the same policy form one range
+        changes = np.any(np.diff(sweep.get("Optimal Policies"), axis = 0) != 0, axis = 1)
+        starts = np.concatenate(([0], np.flatnonzero(changes) + 1))
+        ranges = policies.iloc[starts].copy()
+        ranges.insert(1, 'Up To Reward Factor', reward_factors[np.concatenate((starts[1:] - 1, [len(reward_factors) - 1]))])
+
+        c1.markdown('## Optimal Policy per Reward Factor Range')
+        c1.write(ranges)
+        c2.markdown('## Sweep')
+        c2.write('{} reward factors solved in {:.3f}s, {} distinct policies.'.format(number_factors, sweep.get("Time"), len(ranges)))
+
+        st.write(policies)
 
 def convert_df(df):
    """convert_df(df) transforms dataframe into .csv file"""
@@ -1,7 +1,9 @@
 # Dependencies
 import pandas as pd
 import streamlit as st
-import model_dependencies.segmentation_dependecy as segmentRevolver
+import model_dependencies.data_dependencies as dataDependencies
+import model_dependencies.cart_dependencies as cartDependencies
+import model_dependencies.tree_dependencies as treeDependencies
 
 from inform import Descriptions
 
@@ -18,7 +20,11 @@ def display_customer_segmentation():
 
     data = select_user_journey()
 
-    if (data is not None):
+    if (isinstance(data, str)):
+        # Files too large for memory are segmented from disk
+        display_streaming_segmentation(data)
+
+    elif (data is not None):
 
         # Display Data
         display_data_being_used(data)
@@ -57,6 +63,11 @@ def select_user_journey():
 
     # Option to decide whether or not to use data generated by us
     data_options = ['Import own data', 'Use data collected by authors']
+
+    # Streaming reads and writes files on the server, hence it is only offered in a configured directory
+    if (dataDependencies.STREAM_DIRECTORY is not None):
+        data_options.append('Stream a large file from disk')
+
     data = c1.radio('Which data would you like the model to consider?', data_options)
 
     if (data == data_options[0]):
@@ -66,12 +77,20 @@ def select_user_journey():
         #data = pd.read_csv("data/datasets/dummy/cart/weatherAUS 3.csv")
 
         if (upload is not None):
-            data = pd.read_csv(upload).iloc[: , 1:]
+            data = dataDependencies.load_upload(upload)
             return data
 
+    elif (len(data_options) > 2 and data == data_options[2]):
+
+        # Name of a csv file in the streaming directory, which is read chunk by chunk later on
+        path = c1.text_input('Name of the csv file', help = Descriptions.CART_STREAM)
+
+        if (path != ''):
+            return path
+
     else:
         # Input Data
-        data = pd.read_csv('data/datasets/official/customer_segmentation/segments.csv').iloc[: , 1:]
+        data = dataDependencies.load_dataset('data/datasets/official/customer_segmentation/segments.csv')
         return data
 
 def define_cart_targets(data):
@@ -86,19 +105,85 @@ def define_cart_targets(data):
     target_columns = st.multiselect("Pick which Columns should be used to create the segmentations", data.columns, help = Descriptions.SOLVERS, key = "target_cart_columns")
     target_y = st.selectbox("Pick the target variable", data.columns)
 
+    grid = None
+    if (st.checkbox('Tune the CART parameters', help = Descriptions.CART_TUNING)):
+        c1, c2, c3 = st.columns(3)
+        grid = dict()
+        grid['criterion'] = c1.multiselect('Criterion', ['gini', 'entropy'], default = cartDependencies.PARAMETER_GRID['criterion'])
+        grid['max_depth'] = c2.multiselect('Maximum depth', list(range(1, 11)), default = cartDependencies.PARAMETER_GRID['max_depth'])
+        grid['min_samples_leaf'] = c3.multiselect('Minimum customers per leaf', [1, 10, 100, 500, 1000, 5000], default = cartDependencies.PARAMETER_GRID['min_samples_leaf'])
+
+        if (any(len(values) == 0 for values in grid.values())):
+            st.warning('Pick at least one value per parameter, otherwise the default parameters are used.')
+            grid = None
+
     if st.button("Apply CART"):
         target_dict = dict()
         target_dict['target_columns'] = target_columns
         target_dict['target_y'] = target_y
+        target_dict['grid'] = grid
         return target_dict
 
 def apply_cart(data, target_dictionary):
     """Calls CART Implementation"""
-    snippet = segmentRevolver.segment_customer_using(data, target_dictionary.get('target_columns'), target_dictionary.get('target_y'))
+
+    # sklearn, graphviz and plotly are only imported once CART is applied
+    import model_dependencies.segmentation_dependecy as segmentRevolver
+
+    compiled = segmentRevolver.segment_customer_using(data, target_dictionary.get('target_columns'), target_dictionary.get('target_y'), target_dictionary.get('grid'))
     st.success('CART was succesful!')
-    return snippet
+    return compiled
 
 def display_data_being_used(data):
     st.markdown('---')
     st.write('## Data Overview')
-    st.write(data)
\ No newline at end of file
+    st.write(data)
+def display_streaming_segmentation(name):
+
+    """
+    display_streaming_segmentation(...) fits the CART on a stratified
+    sample of a large csv file and segments the whole file chunk by
+    chunk, without loading it into memory. Both the input and the
+    output are files in dataDependencies.STREAM_DIRECTORY.
+    """
+
+    st.markdown('---')
+    st.markdown('## Define CART Targets')
+
+    try:
+        path = dataDependencies.resolve_stream_path(name)
+        columns = cartDependencies.read_header(path)
+    except (OSError, ValueError) as error:
+        st.error('The file {} cannot be read: {}'.format(name, error))
+        return None
+
+    target_columns = st.multiselect("Pick which Columns should be used to create the segmentations", columns, help = Descriptions.SOLVERS, key = "stream_cart_columns")
+    target_y = st.selectbox("Pick the target variable", columns, key = "stream_cart_target")
+    id_columns = st.multiselect("Pick which Columns identify a customer in the output", columns, key = "stream_cart_ids")
+
+    c1, c2 = st.columns(2)
+    sample_size = c1.number_input('Customers in the sample', min_value = 1000, value = cartDependencies.SAMPLE_SIZE, step = 10000)
+    chunk_rows = c2.number_input('Customers per chunk', min_value = 1000, value = treeDependencies.CHUNK_ROWS, step = 100000)
+    output_name = st.text_input('Name of the segmented csv file', value = name[:-len('.csv')] + '_segments.csv' if name.endswith('.csv') else name + '_segments.csv')
+
+    if (st.button("Apply CART") and len(target_columns) > 0):
+
+        try:
+            output_path = dataDependencies.resolve_stream_path(output_name)
+            if (not output_path.endswith('.csv') or output_path == path):
+                raise ValueError('The segments need a new .csv file next to the input.')
+
+            with st.spinner('Segmenting every customer of {}'.format(name)):
+                result_dict = cartDependencies.stream_segmentation(path, target_columns, target_y, output_path, int(sample_size), id_columns = id_columns, chunk_rows = int(chunk_rows))
+        except (OSError, ValueError) as error:
+            st.error(error)
+            return None
+
+        st.markdown('---')
+        st.markdown('## Segments')
+
+        st.info('Accuracy Score on the sample: {value}'.format(value = result_dict["Test Score"]))
+        st.table(result_dict["Summary"])
+
+        st.success('{} customers were segmented in {:.1f} seconds and written to {}'.format(result_dict["Customers"], result_dict["Time"], output_name))
+        st.download_button('Download Tree', treeDependencies.tree_to_bytes(result_dict["Tree"]), file_name='segmentation_tree.npz', mime='application/octet-stream')
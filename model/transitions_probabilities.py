@@ -1,8 +1,9 @@
 # Dependencies
 import streamlit as st
 import pandas as pd
-import itertools
 from inform import Descriptions
+from model_dependencies import transition_dependencies
+from model_dependencies import data_dependencies
 
 def display_customer_dynammics():
 
@@ -56,11 +57,11 @@ def select_user_journey():
         #data = pd.read_csv("data/datasets/dummy/cart/weatherAUS 3.csv")
 
         if (upload is not None):
-            data = pd.read_csv(upload).iloc[: , 1:]
+            data = data_dependencies.load_upload(upload)
             return data
 
     else:
-        data = pd.read_csv('data/datasets/official/customer_dynamics/transitions_input.csv').iloc[: , 1:]
+        data = data_dependencies.load_dataset('data/datasets/official/customer_dynamics/transitions_input.csv')
         return data
 
 def find_tuples(data):
@@ -76,19 +77,16 @@ def find_tuples(data):
     tuple_cols_target = st.multiselect("Select all columns (S,A) that should be transformed into a single Tuple", data.columns, key="tupler_transition")
     triple_cols_target = st.multiselect("Select all columns (S,A,S') that should be transformed into a single Tuple", data.columns, key="tripler_transition")
 
+    # Saved counts, the data is added as a new batch
+    upload_counts = st.file_uploader("Upload Saved Counts (optional)", type=["npz"], help = Descriptions.PROBABILITY_COUNTS)
+    decay = st.number_input('Decay Factor of Saved Counts', min_value=0.01, max_value=1.0, value=1.0, help = Descriptions.PROBABILITY_DECAY)
+
     if st.button('Create Tuples'):
 
         st.write('---')
-        for tup in range(len(tuple_cols_target)):
-            if (data[tuple_cols_target[tup]].dtype != object):
-                data[tuple_cols_target[tup]] = data[tuple_cols_target[tup]].astype(str)
-
-        for tri in range(len(triple_cols_target)):
-            if (data[triple_cols_target[tri]].dtype != object):
-                data[triple_cols_target[tri]] = data[triple_cols_target[tri]].astype(str)
-
-        data["Tuple"] = data[tuple_cols_target].apply(tuple, axis = 1)
-        data["Triple"] = data[triple_cols_target].apply(tuple, axis = 1)
+        if (len(triple_cols_target) != 3 or list(tuple_cols_target) != list(triple_cols_target[:2])):
+            st.error("Select the (S,A) columns and the (S,A,S') columns in the same order, e.g. state, action and follow_up_state.")
+            return None
 
         c1, c2 = st.columns([2, 1])
 
@@ -96,61 +94,21 @@ def find_tuples(data):
         c1.write(data)
         
         c2.markdown('### Time of Occurrences')
-        c2.write(data["Triple"].value_counts())
-        c2.write(data["Tuple"].value_counts())
-
-        data["Number Tuples"] = data.groupby(['Tuple'])['state'].transform('count')
-
-        data["Number Triples"] = data.groupby(['Triple'])['state'].transform('count')
-
-        data = data.drop_duplicates(subset='Triple')
-
-        data["Probability Triple"] =  data["Number Triples"] / data["Number Tuples"]
-
-        # Union Definition
-        unique_states = data["state"].explode().unique() 
-        unique_states_star = data["follow_up_state"].explode().unique()
-        # st.write('Union')
-
-        state_list = Union(list(unique_states), list(unique_states_star))
-        # st.write(state_list)
-
-        # Unique Actions
-        action_list = list(data['action'].explode().unique())
-        # st.write(action_list)
+        c2.write(data.groupby(triple_cols_target, observed=True).size().sort_values(ascending=False))
+        c2.write(data.groupby(tuple_cols_target, observed=True).size().sort_values(ascending=False))
 
-        # Permutations
-        set_perm = [state_list, action_list, state_list]
-        permutations = list(itertools.product(*set_perm))
-        transition_probabilities = pd.DataFrame(permutations, columns = ['state', 'action','follow_up_state'])
+        if (upload_counts is not None):
+            counts = transition_dependencies.load_counts(upload_counts)
+        else:
+            counts = transition_dependencies.empty_counts()
 
-        # Encoding for fascility
-        transition_probabilities["state_category"] = transition_probabilities["state"].astype('category').cat.codes
-        transition_probabilities["state_category"].astype('int')
-        transition_probabilities["action_category"] = transition_probabilities["action"].astype('category').cat.codes
-        transition_probabilities["action_category"].astype('int')
-        transition_probabilities["follow_up_state_category"] = transition_probabilities["follow_up_state"].astype('category').cat.codes
-        transition_probabilities["follow_up_state_category"].astype('int')
+        counts = transition_dependencies.update_transition_counts(counts, data, triple_cols_target, decay)
+        final_probabilies = transition_dependencies.counts_to_probabilities(counts)
 
         # Plotting Final Probabilities
         st.write('---')
         st.markdown('## Transition Probabilities')
 
-        final_probabilies = pd.merge(data.copy(), transition_probabilities, how='outer')
-        final_probabilies['Probability Triple'] = final_probabilies['Probability Triple'].fillna(0)
-
-        # final_probabilies = final_probabilies.drop(['user', 'state', 'follow_up_state', 'Tuple', 'Triple', "Number Tuples", "Number Triples"], axis = 1)
-
-        final_probabilies['Triple'] = final_probabilies[['state_category','action_category','follow_up_state_category']].apply(tuple, axis = 1)
-        # final_probabilies = final_probabilies.drop_duplicates(subset=['Triple'])
-
-        final_probabilies = final_probabilies.sort_values(['state_category', 'action_category', 'follow_up_state_category'])
-        final_probabilies = final_probabilies.reset_index()
-        final_probabilies = final_probabilies.drop(['index'], axis = 1)
-
-        columns_titles = ["Triple","Probability Triple", 'state', 'state_category', 'action', 'action_category', 'follow_up_state', 'follow_up_state_category']
-        final_probabilies = final_probabilies.reindex(columns=columns_titles)
-
         st.write(final_probabilies)
 
         csv = convert_df(final_probabilies)
@@ -163,12 +121,15 @@ def find_tuples(data):
             key='rewards-csv'
         )
 
-        return final_probabilies
+        st.download_button(
+            "Press to Download Counts",
+            transition_dependencies.counts_to_bytes(counts),
+            "transition_counts.npz",
+            "application/octet-stream",
+            key='counts-npz'
+        )
 
-def Union(lst1, lst2):
-    """Return the union of two list as a list"""
-    final_list = list(set(lst1) | set(lst2))
-    return final_list
+        return final_probabilies
 
 def display_data(data):
     st.markdown('---')
@@ -0,0 +1,658 @@
+# Dependencies
+import math
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import scipy.sparse as sparse_matrix
+import scipy.sparse.linalg as sparse_linalg
+from model_dependencies import tensor_dependencies
+
+# Native solvers for the MDP page. They take the same (P, R, discount) inputs as
+# mdptoolbox and follow its stopping rules, such that both yield the same policies.
+
+def expected_rewards(transition, rewards):
+
+    """
+    expected_rewards(...) reduces the rewards to the expected
+    reward r(a,s) = sum_s' P(s'|s,a) R(s,a,s') of every action and state.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: (A,S,S) array, list of sparse matrices, (S,A) array or (S,) array
+
+    :return: (A,S) array
+    """
+
+    number_actions, number_states = transition_shape(transition)
+
+    if (tensor_dependencies.is_sparse(rewards) or (tensor_dependencies.is_sparse(transition) and np.ndim(rewards) == 3)):
+        reward = np.zeros((number_actions, number_states))
+        for a in range(number_actions):
+            reward[a] = np.asarray(sparse_matrix.csr_matrix(transition[a]).multiply(rewards[a]).sum(axis=1)).ravel()
+        return reward
+
+    rewards = np.asarray(rewards, dtype=float)
+
+    if (rewards.ndim == 1):
+        return np.tile(rewards, (number_actions, 1))
+    elif (rewards.ndim == 2):
+        return rewards.T.copy()
+
+    return np.einsum('ast,ast->as', np.asarray(transition), rewards)
+
+def transition_shape(transition):
+
+    """
+    transition_shape(...) returns the number of actions and
+    states of dense or sparse transition matrices.
+    """
+
+    return len(transition), transition[0].shape[0]
+
+def stack_transitions(transition):
+
+    """
+    stack_transitions(...) lays the matrices of all actions on top of each other,
+    i.e. row a*S+s holds P(.|s,a). One product with this (A*S,S) matrix is the
+    batched Bellman backup of all actions.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+
+    :return: (A*S,S) array or CSR matrix
+    """
+
+    if (tensor_dependencies.is_sparse(transition)):
+        return sparse_matrix.vstack(transition, format='csr')
+
+    transition = np.asarray(transition, dtype=float)
+
+    return transition.reshape((-1, transition.shape[2]))
+
+def bellman_backup(stacked, reward, value, discount):
+
+    """
+    bellman_backup(...) computes Q(a,s) = r(a,s) + discount * sum_s' P(s'|s,a) V(s')
+    for all actions and states at once.
+
+    :param stacked: (A*S,S) matrix from stack_transitions(...)
+    :param reward: (A,S) expected rewards
+    :param value: (S,) value function
+    :param discount: discount factor
+
+    :return: (A,S) array
+    """
+
+    return reward + discount * (stacked @ value).reshape(reward.shape)
+
+def span(difference):
+
+    """span(...) returns max - min of the array, the stopping measure of mdptoolbox"""
+
+    return difference.max() - difference.min()
+
+def policy_matrix(stacked, reward, policy):
+
+    """
+    policy_matrix(...) selects the transition rows and expected rewards
+    which the policy applies in every state.
+
+    :return Ppolicy: (S,S) array or CSR matrix
+    :return Rpolicy: (S,) array
+    """
+
+    number_states = reward.shape[1]
+    rows = policy * number_states + np.arange(number_states)
+
+    return stacked[rows], reward.ravel()[rows]
+
+def iteration_bound(stacked, reward, discount, epsilon, max_iter):
+
+    """
+    iteration_bound(...) bounds the number of value iterations needed for an
+    epsilon-optimal policy (Puterman 1994, Theorem 6.6.6), as mdptoolbox does.
+    """
+
+    if (sparse_matrix.issparse(stacked)):
+        column_minimum = stacked.min(axis=0).toarray().ravel()
+    else:
+        column_minimum = stacked.min(axis=0)
+
+    k = 1 - column_minimum.sum()
+    first_span = span(reward.max(axis=0))
+
+    if (first_span <= 0 or discount * k <= 0 or discount * k >= 1):
+        return max_iter
+
+    bound = math.log((epsilon * (1 - discount) / discount) / first_span) / math.log(discount * k)
+
+    if (not math.isfinite(bound)):
+        return max_iter
+
+    return max(1, min(max_iter, int(math.ceil(bound))))
+
+def solver_result(value, policy, started, residuals, policy_changes=None):
+
+    """
+    solver_result(...) packs a solution the way solve_markov_decision_process(...)
+    reports it, including the convergence telemetry.
+    """
+
+    result_dict = dict()
+    result_dict["Value Function"] = value
+    result_dict["Optimal Policy"] = policy
+    result_dict["Time"] = time.perf_counter() - started
+    result_dict["Iterations"] = len(residuals)
+    result_dict["Residuals"] = np.asarray(residuals)
+
+    if (policy_changes is not None):
+        result_dict["Policy Changes"] = np.asarray(policy_changes)
+
+    return result_dict
+
+def value_iteration(transition, rewards, discount, epsilon=0.01, max_iter=1000, initial_value=None):
+
+    """
+    value_iteration(...) solves the MDP by repeated batched Bellman backups
+    until the span of the value change drops below the epsilon threshold.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: rewards in any shape mdptoolbox accepts
+    :param discount: discount factor
+    :param epsilon: epsilon-optimality of the policy
+    :param max_iter: maximum number of iterations
+    :param initial_value: (S,) value function to start from (warm start)
+
+    :return: dict with "Value Function", "Optimal Policy", "Time", "Iterations" and "Residuals"
+    """
+
+    started = time.perf_counter()
+
+    stacked = stack_transitions(transition)
+    reward = expected_rewards(transition, rewards)
+    number_states = reward.shape[1]
+
+    value = np.zeros(number_states) if initial_value is None else np.array(initial_value, dtype=float)
+
+    if (discount < 1):
+        thresh = epsilon * (1 - discount) / discount
+        if (initial_value is None):
+            max_iter = iteration_bound(stacked, reward, discount, epsilon, max_iter)
+    else:
+        thresh = epsilon
+
+    residuals = []
+
+    while True:
+        q_values = bellman_backup(stacked, reward, value, discount)
+        value_next = q_values.max(axis=0)
+        residuals.append(span(value_next - value))
+        value = value_next
+
+        if (residuals[-1] < thresh or len(residuals) >= max_iter):
+            break
+
+    return solver_result(value, q_values.argmax(axis=0), started, residuals)
+
+def gauss_seidel_value_iteration(transition, rewards, discount, epsilon=0.01, max_iter=1000, initial_value=None):
+
+    """
+    gauss_seidel_value_iteration(...) is value iteration which uses the
+    updated values of the states already visited in the same sweep.
+    It usually needs fewer sweeps, while every sweep walks the states in order.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: rewards in any shape mdptoolbox accepts
+    :param discount: discount factor
+    :param epsilon: epsilon-optimality of the policy
+    :param max_iter: maximum number of sweeps
+    :param initial_value: (S,) value function to start from (warm start)
+
+    :return: dict with "Value Function", "Optimal Policy", "Time", "Iterations" and "Residuals"
+    """
+
+    started = time.perf_counter()
+
+    stacked = stack_transitions(transition)
+    reward = expected_rewards(transition, rewards)
+    number_actions, number_states = reward.shape
+
+    # State-major rows, such that the A rows of one state are contiguous
+    order = (np.arange(number_states)[:, None] + np.arange(number_actions)[None, :] * number_states).ravel()
+    state_major = stacked[order]
+    state_reward = reward.T
+
+    value = np.zeros(number_states) if initial_value is None else np.array(initial_value, dtype=float)
+
+    if (discount < 1):
+        thresh = epsilon * (1 - discount) / discount
+        if (initial_value is None):
+            max_iter = iteration_bound(stacked, reward, discount, epsilon, max_iter)
+    else:
+        thresh = epsilon
+
+    residuals = []
+
+    while True:
+        value_previous = value.copy()
+
+        for s in range(number_states):
+            block = state_major[s * number_actions:(s + 1) * number_actions]
+            value[s] = (state_reward[s] + discount * (block @ value)).max()
+
+        residuals.append(span(value - value_previous))
+
+        if (residuals[-1] < thresh or len(residuals) >= max_iter):
+            break
+
+    # The policy is read off in one last in-place sweep
+    policy = np.zeros(number_states, dtype=np.int64)
+
+    for s in range(number_states):
+        block = state_major[s * number_actions:(s + 1) * number_actions]
+        q_values = state_reward[s] + discount * (block @ value)
+        value[s] = q_values.max()
+        policy[s] = q_values.argmax()
+
+    return solver_result(value, policy, started, residuals)
+
+def evaluate_policy(stacked, reward, policy, discount):
+
+    """
+    evaluate_policy(...) solves V = Rpolicy + discount * Ppolicy V exactly.
+    """
+
+    transition_policy, reward_policy = policy_matrix(stacked, reward, policy)
+    number_states = len(reward_policy)
+
+    if (sparse_matrix.issparse(transition_policy)):
+        system = sparse_matrix.identity(number_states, format='csc') - discount * transition_policy.tocsc()
+        return sparse_linalg.spsolve(system, reward_policy)
+
+    return np.linalg.solve(np.eye(number_states) - discount * transition_policy, reward_policy)
+
+def policy_iteration(transition, rewards, discount, max_iter=1000, initial_value=None):
+
+    """
+    policy_iteration(...) alternates exact policy evaluation and greedy
+    improvement until the policy does not change any more.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: rewards in any shape mdptoolbox accepts
+    :param discount: discount factor (< 1)
+    :param max_iter: maximum number of iterations
+    :param initial_value: (S,) value function the first greedy policy is taken from
+
+    :return: dict with "Value Function", "Optimal Policy", "Time", "Iterations", "Residuals" and "Policy Changes"
+    """
+
+    started = time.perf_counter()
+
+    stacked = stack_transitions(transition)
+    reward = expected_rewards(transition, rewards)
+    number_states = reward.shape[1]
+
+    value = np.zeros(number_states) if initial_value is None else np.array(initial_value, dtype=float)
+    policy = bellman_backup(stacked, reward, value, discount).argmax(axis=0)
+
+    residuals = []
+    policy_changes = []
+
+    while True:
+        value_next = evaluate_policy(stacked, reward, policy, discount)
+        residuals.append(span(value_next - value))
+        value = value_next
+
+        policy_next = bellman_backup(stacked, reward, value, discount).argmax(axis=0)
+        policy_changes.append(int((policy_next != policy).sum()))
+
+        if (policy_changes[-1] == 0 or len(residuals) >= max_iter):
+            break
+
+        policy = policy_next
+
+    return solver_result(value, policy, started, residuals, policy_changes)
+
+def modified_policy_iteration(transition, rewards, discount, epsilon=0.01, max_iter=1000, evaluation_sweeps=10, initial_value=None):
+
+    """
+    modified_policy_iteration(...) replaces the exact evaluation of policy
+    iteration by a few sweeps of V = Rpolicy + discount * Ppolicy V, which
+    avoids solving an (S,S) linear system per iteration.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: rewards in any shape mdptoolbox accepts
+    :param discount: discount factor
+    :param epsilon: epsilon-optimality of the policy
+    :param max_iter: maximum number of iterations
+    :param evaluation_sweeps: maximum number of evaluation sweeps per iteration
+    :param initial_value: (S,) value function to start from (warm start)
+
+    :return: dict with "Value Function", "Optimal Policy", "Time", "Iterations", "Residuals" and "Policy Changes"
+    """
+
+    started = time.perf_counter()
+
+    stacked = stack_transitions(transition)
+    reward = expected_rewards(transition, rewards)
+    number_states = reward.shape[1]
+
+    thresh = epsilon * (1 - discount) / discount if discount != 1 else epsilon
+
+    if (initial_value is not None):
+        value = np.array(initial_value, dtype=float)
+    elif (discount == 1):
+        value = np.zeros(number_states)
+    else:
+        value = reward.min() / (1 - discount) * np.ones(number_states)
+
+    residuals = []
+    policy_changes = []
+    policy = None
+
+    while True:
+        q_values = bellman_backup(stacked, reward, value, discount)
+        policy_next = q_values.argmax(axis=0)
+        value_next = q_values.max(axis=0)
+
+        residuals.append(span(value_next - value))
+        policy_changes.append(number_states if policy is None else int((policy_next != policy).sum()))
+        policy, value = policy_next, value_next
+
+        if (residuals[-1] < thresh or len(residuals) >= max_iter):
+            break
+
+        # Partial evaluation of the current policy
+        transition_policy, reward_policy = policy_matrix(stacked, reward, policy)
+        for sweep in range(evaluation_sweeps):
+            value_sweep = reward_policy + discount * (transition_policy @ value)
+            variation = np.abs(value_sweep - value).max()
+            value = value_sweep
+            if (variation < thresh):
+                break
+
+    return solver_result(value, policy, started, residuals, policy_changes)
+
+def batched_backup(transition, reward_batch, values, discounts):
+
+    """
+    batched_backup(...) computes Q(k,a,s) for a batch of models, either on
+    one shared (A*S,S) stacked model with one (A*S,S) x (S,K) product, or
+    on a (K,A,S,S) stack of models with one batched matmul.
+
+    :param transition: (A*S,S) stacked matrix or (K,A,S,S) array
+    :param reward_batch: (K,A,S) expected rewards
+    :param values: (K,S) value functions
+    :param discounts: (K,) discount factors
+
+    :return: (K,A,S) array
+    """
+
+    number_batches, number_actions, number_states = reward_batch.shape
+
+    if (np.ndim(transition) == 4):
+        future = np.matmul(transition.reshape((number_batches, -1, number_states)), values[:, :, None])
+    else:
+        future = (transition @ values.T).T
+
+    return reward_batch + discounts[:, None, None] * future.reshape((number_batches, number_actions, number_states))
+
+def remaining_models(transition, keep):
+
+    """
+    remaining_models(...) drops the converged models from a (K,A,S,S)
+    stack. The copy is only made when models converge, instead of
+    indexing the stack in every iteration. A shared model is kept as is.
+    """
+
+    return transition[keep] if (np.ndim(transition) == 4) else transition
+
+def batch_arguments(transition, reward_batch, discounts):
+
+    """
+    batch_arguments(...) brings the inputs of the batched solvers into shape:
+    a (K,A,S,S) dense array stays a stack of models, anything else is one
+    model shared by all reward functions and is stacked to (A*S,S).
+
+    :return transition: (K,A,S,S) array or (A*S,S) stacked matrix
+    :return stacked_models: list of the (A*S,S) stacked matrix of every model
+    :return reward_batch: (K,A,S) array
+    :return discounts: (K,) array
+    """
+
+    reward_batch = np.asarray(reward_batch, dtype=float)
+    number_batches = reward_batch.shape[0]
+    discounts = np.broadcast_to(np.asarray(discounts, dtype=float), (number_batches,))
+
+    if (not tensor_dependencies.is_sparse(transition) and np.ndim(transition) == 4):
+        transition = np.asarray(transition, dtype=float)
+        stacked_models = [model.reshape((-1, model.shape[2])) for model in transition]
+    else:
+        transition = stack_transitions(transition)
+        stacked_models = [transition] * number_batches
+
+    return transition, stacked_models, reward_batch, discounts
+
+def batched_value_iteration(transition, reward_batch, discount, epsilon=0.01, max_iter=1000, initial_values=None):
+
+    """
+    batched_value_iteration(...) runs value_iteration(...) for K models at
+    once: K reward functions on one shared transition model, or a
+    (K,A,S,S) stack of models of the same shape. Each model keeps the
+    stopping rule of a single run and stops updating as soon as it has
+    converged, hence it ends with the policy value_iteration(...) would
+    return for it.
+
+    :param transition: (A,S,S) array, list of sparse matrices or (K,A,S,S) array
+    :param reward_batch: (K,A,S) expected rewards
+    :param discount: discount factor, or (K,) discount factors
+    :param epsilon: epsilon-optimality of the policies
+    :param max_iter: maximum number of iterations
+    :param initial_values: (K,S) value functions to start from (warm start)
+
+    :return: dict with "Value Functions", "Optimal Policies", "Time", "Times" and "Iterations"
+    """
+
+    started = time.perf_counter()
+
+    transition, stacked_models, reward_batch, discounts = batch_arguments(transition, reward_batch, discount)
+    number_batches, number_actions, number_states = reward_batch.shape
+
+    values = np.zeros((number_batches, number_states)) if initial_values is None else np.array(initial_values, dtype=float)
+    policies = np.zeros((number_batches, number_states), dtype=np.int64)
+    iterations = np.zeros(number_batches, dtype=np.int64)
+    times = np.zeros(number_batches)
+
+    thresh = np.where(discounts < 1, epsilon * (1 - discounts) / np.where(discounts > 0, discounts, 1), epsilon)
+    limits = np.full(number_batches, max_iter)
+    if (initial_values is None):
+        for k in np.flatnonzero(discounts < 1):
+            limits[k] = iteration_bound(stacked_models[k], reward_batch[k], discounts[k], epsilon, max_iter)
+
+    active = np.arange(number_batches)
+    models = transition
+
+    while (len(active) > 0):
+        q_values = batched_backup(models, reward_batch[active], values[active], discounts[active])
+
+        values_next = q_values.max(axis=1)
+        difference = values_next - values[active]
+        residuals = difference.max(axis=1) - difference.min(axis=1)
+
+        values[active] = values_next
+        policies[active] = q_values.argmax(axis=1)
+        iterations[active] += 1
+
+        converged = (residuals < thresh[active]) | (iterations[active] >= limits[active])
+        if (converged.any()):
+            times[active[converged]] = time.perf_counter() - started
+            models = remaining_models(models, ~converged)
+            active = active[~converged]
+
+    result_dict = dict()
+    result_dict["Value Functions"] = values
+    result_dict["Optimal Policies"] = policies
+    result_dict["Time"] = time.perf_counter() - started
+    result_dict["Times"] = times
+    result_dict["Iterations"] = iterations
+
+    return result_dict
+
+def batched_policy_iteration(transition, reward_batch, discount, max_iter=1000, initial_values=None):
+
+    """
+    batched_policy_iteration(...) runs policy_iteration(...) for K models
+    at once. The exact evaluations of all unconverged models are one batched
+    linear solve of (K,S,S) systems. Dense models only.
+
+    :param transition: (A,S,S) array or (K,A,S,S) array
+    :param reward_batch: (K,A,S) expected rewards
+    :param discount: discount factor (< 1), or (K,) discount factors
+    :param max_iter: maximum number of iterations
+    :param initial_values: (K,S) value functions the first greedy policies are taken from
+
+    :return: dict with "Value Functions", "Optimal Policies", "Time", "Times" and "Iterations"
+    """
+
+    started = time.perf_counter()
+
+    if (tensor_dependencies.is_sparse(transition)):
+        raise ValueError('Batched policy iteration needs dense transition matrices.')
+
+    transition, _, reward_batch, discounts = batch_arguments(transition, reward_batch, discount)
+    number_batches, number_actions, number_states = reward_batch.shape
+
+    values = np.zeros((number_batches, number_states)) if initial_values is None else np.array(initial_values, dtype=float)
+    iterations = np.zeros(number_batches, dtype=np.int64)
+    times = np.zeros(number_batches)
+
+    policies = batched_backup(transition, reward_batch, values, discounts).argmax(axis=1)
+    active = np.arange(number_batches)
+    models = transition
+
+    while (len(active) > 0):
+        rows = policies[active] * number_states + np.arange(number_states)[None, :]
+        if (np.ndim(models) == 4):
+            transition_policy = models.reshape((len(active), -1, number_states))[np.arange(len(active))[:, None], rows]
+        else:
+            transition_policy = models[rows]
+        reward_policy = reward_batch[active].reshape((len(active), -1))[np.arange(len(active))[:, None], rows]
+
+        system = np.eye(number_states)[None, :, :] - discounts[active, None, None] * transition_policy
+        values[active] = np.linalg.solve(system, reward_policy[:, :, None])[:, :, 0]
+        iterations[active] += 1
+
+        policies_next = batched_backup(models, reward_batch[active], values[active], discounts[active]).argmax(axis=1)
+        converged = np.all(policies_next == policies[active], axis=1) | (iterations[active] >= max_iter)
+        policies[active[~converged]] = policies_next[~converged]
+
+        if (converged.any()):
+            times[active[converged]] = time.perf_counter() - started
+            models = remaining_models(models, ~converged)
+            active = active[~converged]
+
+    result_dict = dict()
+    result_dict["Value Functions"] = values
+    result_dict["Optimal Policies"] = policies
+    result_dict["Time"] = time.perf_counter() - started
+    result_dict["Times"] = times
+    result_dict["Iterations"] = iterations
+
+    return result_dict
+
+# Solver names as offered on the MDP page
+SOLVERS = {
+    'Value Iteration': value_iteration,
+    'Gauss-Seidel Value Iteration': gauss_seidel_value_iteration,
+    'Policy Iteration': policy_iteration,
+    'Modified Policy Iteration': modified_policy_iteration,
+}
+
+def solve(transition, rewards, discount, method, **options):
+
+    """
+    solve(...) runs the native solver registered under the given method name.
+
+    :return: dict with "Value Function", "Optimal Policy", "Time", "Iterations" and "Residuals"
+    """
+
+    if (method not in SOLVERS):
+        raise ValueError('Unknown solver {}, pick one of {}.'.format(method, list(SOLVERS)))
+
+    return SOLVERS[method](transition, rewards, discount, **options)
+
+# Solvers which update a whole stack of models at once
+BATCHED_SOLVERS = {
+    'Value Iteration': batched_value_iteration,
+    'Policy Iteration': batched_policy_iteration,
+}
+
+def solve_task(task):
+
+    """
+    solve_task(...) runs solve(...) on one model of a batch. Module
+    level such that it can be sent to the worker processes.
+    """
+
+    transition, rewards, discount, method, options = task
+
+    return solve(transition, rewards, discount, method, **options)
+
+def solve_batch(transitions, rewards, discounts, method, workers=None, **options):
+
+    """
+    solve_batch(...) solves K MDPs, e.g. one per customer segment and region.
+    Dense models of the same shape are stacked to (K,A,S,S) and solved
+    together by batched Bellman updates if the method has a batched solver.
+    Otherwise every model is solved on its own in a process pool.
+
+    :param transitions: list of K transition models, or a (K,A,S,S) array
+    :param rewards: list of K rewards in any shape mdptoolbox accepts, or a (K,A,S,S) array
+    :param discounts: discount factor, or one per model
+    :param method: name of a solver in SOLVERS
+    :param workers: number of processes for models solved on their own (all cores if None)
+    :param options: further arguments of the solver
+
+    :return: dict with "Value Functions" and "Optimal Policies" (lists of K arrays), "Times", "Iterations", "Time" and "Batched"
+    """
+
+    started = time.perf_counter()
+
+    number_models = len(transitions)
+    discounts = np.broadcast_to(np.asarray(discounts, dtype=float), (number_models,))
+
+    dense = not any(tensor_dependencies.is_sparse(transition) for transition in transitions)
+    shapes = {np.shape(transition) for transition in transitions} if (dense) else set()
+
+    result_dict = dict()
+
+    if (method in BATCHED_SOLVERS and len(shapes) == 1 and number_models > 0):
+        transition_batch = np.asarray(transitions, dtype=float)
+        reward_batch = np.stack([expected_rewards(transition, reward) for transition, reward in zip(transition_batch, rewards)])
+
+        batch = BATCHED_SOLVERS[method](transition_batch, reward_batch, discounts, **options)
+
+        result_dict["Value Functions"] = list(batch.get("Value Functions"))
+        result_dict["Optimal Policies"] = list(batch.get("Optimal Policies"))
+        result_dict["Times"] = batch.get("Times")
+        result_dict["Iterations"] = batch.get("Iterations")
+        result_dict["Batched"] = True
+
+    else:
+        tasks = [(transition, reward, discount, method, options) for transition, reward, discount in zip(transitions, rewards, discounts)]
+        workers = workers or os.cpu_count() or 1
+
+        if (workers <= 1 or len(tasks) <= 1):
+            results = [solve_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                results = list(executor.map(solve_task, tasks))
+
+        result_dict["Value Functions"] = [result.get("Value Function") for result in results]
+        result_dict["Optimal Policies"] = [result.get("Optimal Policy") for result in results]
+        result_dict["Times"] = np.array([result.get("Time") for result in results])
+        result_dict["Iterations"] = np.array([result.get("Iterations") for result in results])
+        result_dict["Batched"] = False
+
+    result_dict["Time"] = time.perf_counter() - started
+
+    return result_dict
@@ -0,0 +1,231 @@
+# Dependencies
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import scipy.sparse as sparse_matrix
+from model_dependencies import bellman_dependencies
+from model_dependencies import tensor_dependencies
+
+# Solved MDPs are kept across sessions and restarts in this directory
+CACHE_DIRECTORY = os.path.join('.cache', 'mdp_solutions')
+CACHE_SIZE = 256 * 1024 * 1024
+
+# Arrays of a solver result which are written to the .npz file
+RESULT_ARRAYS = ["Value Function", "Optimal Policy", "Residuals", "Policy Changes"]
+
+# Files which make up one cache entry, see evict(...)
+ENTRY_SUFFIXES = ('.json', '.npz')
+
+def update_hash(digest, matrices):
+
+    """
+    update_hash(...) feeds dense or sparse matrices into the hash, together
+    with their shapes, such that equal content always yields the same key.
+    """
+
+    if (tensor_dependencies.is_sparse(matrices)):
+        for matrix in matrices:
+            matrix = sparse_matrix.csr_matrix(matrix)
+            matrix.sum_duplicates()
+            matrix.sort_indices()
+            digest.update(repr(('csr', matrix.shape)).encode())
+            digest.update(np.ascontiguousarray(matrix.indptr, dtype=np.int64).tobytes())
+            digest.update(np.ascontiguousarray(matrix.indices, dtype=np.int64).tobytes())
+            digest.update(np.ascontiguousarray(matrix.data, dtype=float).tobytes())
+    else:
+        array = np.ascontiguousarray(matrices, dtype=float)
+        digest.update(repr(('dense', array.shape)).encode())
+        digest.update(array.tobytes())
+
+def solution_key(transition, rewards, discount, method, max_iter):
+
+    """
+    solution_key(...) addresses a solve by its content: the transition and
+    reward matrices, the discount factor, the method and the iteration cap.
+
+    :return: hex digest
+    """
+
+    digest = hashlib.sha256()
+    update_hash(digest, transition)
+    update_hash(digest, rewards)
+    digest.update(repr((float(discount), str(method), int(max_iter))).encode())
+
+    return digest.hexdigest()
+
+def entry_paths(key, directory):
+
+    """entry_paths(...) returns the .npz and .json path of a cache entry"""
+
+    return os.path.join(directory, key + '.npz'), os.path.join(directory, key + '.json')
+
+def load_solution(key, directory=CACHE_DIRECTORY):
+
+    """
+    load_solution(...) reads a cached solution and marks it as recently used.
+
+    :param key: key from solution_key(...)
+    :param directory: cache directory
+
+    :return: solver result dict with "Cached" set, or None if the key is unknown
+    """
+
+    array_path, metadata_path = entry_paths(key, directory)
+
+    try:
+        with open(metadata_path) as file:
+            metadata = json.load(file)
+        with np.load(array_path, allow_pickle=False) as saved:
+            result_dict = {name: saved[name] for name in saved.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # The modification time of the metadata is the last use for the LRU eviction,
+    # on a read-only checkout the entry is still served, it just does not age
+    try:
+        os.utime(metadata_path)
+    except OSError:
+        pass
+
+    result_dict = {name.replace('_', ' '): value for name, value in result_dict.items()}
+    result_dict["Time"] = metadata.get("Time")
+    result_dict["Iterations"] = metadata.get("Iterations")
+    result_dict["Cached"] = True
+
+    return result_dict
+
+def store_solution(key, result_dict, metadata=None, directory=CACHE_DIRECTORY, max_bytes=CACHE_SIZE):
+
+    """
+    store_solution(...) writes a solver result as .npz plus .json metadata
+    and evicts the least recently used entries beyond max_bytes.
+
+    :param key: key from solution_key(...)
+    :param result_dict: dict returned by the solvers
+    :param metadata: further json-serializable information on the solve
+    :param directory: cache directory
+    :param max_bytes: size the cache is shrunk to
+
+    :return: whether the entry was written
+    """
+
+    array_path, metadata_path = entry_paths(key, directory)
+
+    arrays = {name.replace(' ', '_'): np.asarray(result_dict.get(name)) for name in RESULT_ARRAYS if (result_dict.get(name) is not None)}
+
+    entry = dict(metadata or dict())
+    entry["Time"] = float(result_dict.get("Time", 0.0))
+    entry["Iterations"] = None if result_dict.get("Iterations") is None else int(result_dict.get("Iterations"))
+    entry["Stored"] = time.time()
+
+    # Temporary files first, such that readers never see half written entries.
+    # A read-only or full disk leaves the app running without the cache.
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(array_path + '.tmp', 'wb') as file:
+            np.savez(file, **arrays)
+        with open(metadata_path + '.tmp', 'w') as file:
+            json.dump(entry, file)
+
+        os.replace(array_path + '.tmp', array_path)
+        os.replace(metadata_path + '.tmp', metadata_path)
+
+        evict(directory, max_bytes)
+    except OSError:
+        for path in (array_path + '.tmp', metadata_path + '.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return False
+
+    return True
+
+def evict(directory=CACHE_DIRECTORY, max_bytes=CACHE_SIZE, suffixes=ENTRY_SUFFIXES):
+
+    """
+    evict(...) removes the least recently used entries until the cache
+    takes at most max_bytes. An entry is every file of one key with one
+    of the suffixes, and it was last used when any of them was last
+    modified, hence readers mark a hit by touching one of the files.
+
+    :param directory: cache directory
+    :param max_bytes: size the cache is shrunk to
+    :param suffixes: file endings of the entries
+
+    :return: number of removed entries
+    """
+
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+
+    # key -> [last use, size, paths]
+    entries = dict()
+    for name in names:
+        suffix = os.path.splitext(name)[1]
+        if (suffix not in suffixes):
+            continue
+
+        path = os.path.join(directory, name)
+        try:
+            modified, size = os.path.getmtime(path), os.path.getsize(path)
+        except OSError:
+            continue
+
+        entry = entries.setdefault(name[:-len(suffix)], [modified, 0, []])
+        entry[0] = max(entry[0], modified)
+        entry[1] += size
+        entry[2].append(path)
+
+    total = sum(entry[1] for entry in entries.values())
+    removed = 0
+
+    for _, size, paths in sorted(entries.values()):
+        if (total <= max_bytes):
+            break
+
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        total -= size
+        removed += 1
+
+    return removed
+
+def cached_solve(transition, rewards, discount, method, max_iter=1000, directory=CACHE_DIRECTORY, max_bytes=CACHE_SIZE):
+
+    """
+    cached_solve(...) runs bellman_dependencies.solve(...) unless the same
+    solve is already in the cache, in which case the stored solution is
+    returned without touching the solver. If the cache cannot be written,
+    the solution is returned all the same.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: (A,S,S) array or list of sparse matrices
+    :param discount: discount factor
+    :param method: name of a solver in bellman_dependencies.SOLVERS
+    :param max_iter: maximum number of iterations
+    :param directory: cache directory
+    :param max_bytes: size the cache is shrunk to
+
+    :return: solver result dict, with "Cached" telling whether it came from the cache
+    """
+
+    key = solution_key(transition, rewards, discount, method, max_iter)
+
+    result_dict = load_solution(key, directory)
+    if (result_dict is not None):
+        return result_dict
+
+    result_dict = bellman_dependencies.solve(transition, rewards, discount, method, max_iter=max_iter)
+    store_solution(key, result_dict, {"Method": method, "Discount": float(discount), "Max Iterations": int(max_iter)}, directory, max_bytes)
+    result_dict["Cached"] = False
+
+    return result_dict
@@ -0,0 +1,360 @@
+# Dependencies
+# sklearn is imported by the functions which fit trees, such that the
+# CART page can show its inputs without paying for the import
+import hashlib
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from model_dependencies import cache_dependencies
+from model_dependencies import data_dependencies
+from model_dependencies import tree_dependencies
+
+# Parameters of the CART page, see segmentation_dependecy.segment_customer_using(...)
+CART_PARAMETERS = {"criterion": 'gini', "splitter": 'best', "max_depth": 3, "class_weight": None, "min_samples_leaf": 1000}
+SAMPLE_SIZE = 100000
+
+# Grid searched by grid_search(...), and the fitted trees and scores it keeps across reruns
+PARAMETER_GRID = {"criterion": ['gini', 'entropy'], "max_depth": [2, 3, 4, 5, 6], "min_samples_leaf": [1, 100, 500, 1000]}
+CACHE_DIRECTORY = os.path.join('.cache', 'cart_trees')
+CACHE_SIZE = 64 * 1024 * 1024
+FOLDS = 5
+
+# Trees (.joblib) and cross-validation scores (.json) share the cache and its eviction
+ENTRY_SUFFIXES = ('.joblib', '.json')
+
+# Trees fitted by this process, keyed by tree_key(...)
+fitted_trees = dict()
+FITTED_TREES = 32
+
+def read_header(path):
+
+    """read_header(...) returns the column names of a csv file without the unnamed index column"""
+
+    names = list(pd.read_csv(path, nrows=0).columns)
+
+    return [name for name in names if (name != data_dependencies.INDEX_COLUMN)]
+
+def stratified_sample(path, target, columns, sample_size=SAMPLE_SIZE, chunk_rows=tree_dependencies.CHUNK_ROWS, seed=0):
+
+    """
+    stratified_sample(...) draws a sample of a csv file in one pass, in
+    which every class of the target keeps its share of the file. Every
+    row gets a random key and each class keeps its sample_size rows with
+    the smallest keys, hence memory depends on the number of classes and
+    the chunk size only. At the end each class is cut to its share, but
+    keeps at least one row, such that rare classes are still seen.
+
+    :param path: path of the csv file
+    :param target: target column the sample is stratified by
+    :param columns: further columns of the sample, e.g. the features
+    :param sample_size: number of rows of the sample
+    :param chunk_rows: rows read per chunk
+    :param seed: seed of the random keys
+
+    :return: Dataframe
+    """
+
+    generator = np.random.default_rng(seed)
+    use_columns = list(dict.fromkeys(list(columns) + [target]))
+
+    kept = None
+    class_counts = pd.Series(dtype=np.int64)
+
+    for chunk in pd.read_csv(path, usecols=use_columns, chunksize=chunk_rows):
+        chunk = chunk.assign(_key=generator.random(len(chunk)))
+        class_counts = class_counts.add(chunk[target].value_counts(), fill_value=0)
+
+        kept = chunk if (kept is None) else pd.concat([kept, chunk], ignore_index=True)
+        kept = kept.sort_values('_key', kind='stable').groupby(target, sort=False).head(sample_size)
+
+    if (kept is None):
+        raise ValueError('The file {} holds no customers.'.format(path))
+
+    # Share of every class in the file, rounded up such that no class vanishes
+    quotas = np.ceil(sample_size * class_counts / class_counts.sum()).astype(np.int64).clip(lower=1)
+
+    rank = kept.groupby(target, sort=False).cumcount()
+    sample = kept[rank.to_numpy() < quotas.reindex(kept[target]).to_numpy()]
+
+    return sample.drop(columns='_key').sort_index().reset_index(drop=True)
+
+def fit_tree(X, y, parameters=CART_PARAMETERS, test_size=0.2):
+
+    """
+    fit_tree(...) fits the CART on a training split and scores it on the
+    test split, as segmentation_dependecy.fitting(...) does, but without
+    any output, such that it can run outside of the app.
+
+    :param X: Dataframe with the features
+    :param y: array with the target
+    :param parameters: arguments of the DecisionTreeClassifier
+    :param test_size: share of the test split
+
+    :return: dict with "Tree", "Train Score" and "Test Score"
+    """
+
+    from sklearn import tree
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=0)
+
+    clf = tree.DecisionTreeClassifier(random_state=0, **parameters).fit(X_train, y_train)
+
+    result_dict = dict()
+    result_dict["Tree"] = clf
+    result_dict["Train Score"] = clf.score(X_train, y_train)
+    result_dict["Test Score"] = clf.score(X_test, y_test)
+
+    return result_dict
+
+def stream_segmentation(path, target_columns, target, output_path, sample_size=SAMPLE_SIZE, parameters=CART_PARAMETERS, id_columns=None, chunk_rows=tree_dependencies.CHUNK_ROWS):
+
+    """
+    stream_segmentation(...) segments a csv file of any size: the CART is
+    fitted on a stratified sample, and all customers are then classified
+    chunk by chunk with the compiled tree.
+
+    :param path: path of the csv file
+    :param target_columns: features of the CART, e.g. Recency, Frequency, Monetary
+    :param target: target column of the CART
+    :param output_path: path of the csv file with the segment of every customer
+    :param sample_size: number of customers the CART is fitted on
+    :param parameters: arguments of the DecisionTreeClassifier
+    :param id_columns: columns copied to the output next to the segment
+    :param chunk_rows: customers read per chunk
+
+    :return: dict from tree_dependencies.stream_segments(...) with "Tree", "Sample Size", "Train Score" and "Test Score"
+    """
+
+    sample = stratified_sample(path, target, target_columns, sample_size, chunk_rows)
+    fitted = fit_tree(sample[list(target_columns)], sample[target].to_numpy(), parameters)
+
+    compiled = tree_dependencies.compile_tree(fitted["Tree"], target_columns, target)
+
+    result_dict = tree_dependencies.stream_segments(path, compiled, output_path, id_columns=id_columns, chunk_rows=chunk_rows)
+    result_dict["Tree"] = compiled
+    result_dict["Sample Size"] = len(sample)
+    result_dict["Train Score"] = fitted["Train Score"]
+    result_dict["Test Score"] = fitted["Test Score"]
+
+    return result_dict
+
+def data_fingerprint(X, y):
+
+    """
+    data_fingerprint(...) identifies the training data by its content, with
+    one vectorized hash per row, such that the same data yields the same
+    fingerprint on every rerun of the app.
+
+    :param X: Dataframe with the features
+    :param y: array with the target
+
+    :return: hex digest
+    """
+
+    digest = hashlib.sha256()
+    digest.update(repr([str(column) for column in X.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+def tree_key(fingerprint, parameters, folds=None):
+
+    """
+    tree_key(...) addresses a fitted tree, or with folds its cross-validation,
+    by the data fingerprint, the parameters and the sklearn version, as
+    pickled trees and their scores need not carry over to another release.
+
+    :return: hex digest
+    """
+
+    import sklearn
+
+    parameters = {name: parameters[name] for name in sorted(parameters)}
+
+    return hashlib.sha256(repr((fingerprint, parameters, folds, sklearn.__version__)).encode()).hexdigest()
+
+def remember_tree(key, result_dict):
+
+    """remember_tree(...) keeps a fitted tree, dropping the least recently used beyond FITTED_TREES"""
+
+    fitted_trees.pop(key, None)
+
+    if (len(fitted_trees) >= FITTED_TREES):
+        fitted_trees.pop(next(iter(fitted_trees)))
+
+    fitted_trees[key] = result_dict
+
+def touch(path):
+
+    """touch(...) marks a cache file as recently used for the eviction"""
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+def cached_fit(X, y, parameters=CART_PARAMETERS, fingerprint=None, directory=CACHE_DIRECTORY):
+
+    """
+    cached_fit(...) fits a DecisionTreeClassifier unless the same data was
+    already fitted with the same parameters, in this process or in an
+    earlier one, in which case the stored tree is returned.
+
+    :param X: Dataframe with the features
+    :param y: array with the target
+    :param parameters: arguments of the DecisionTreeClassifier
+    :param fingerprint: data_fingerprint(X, y), if already known
+    :param directory: cache directory
+
+    :return: dict with "Tree", "Fit Time" and "Cached"
+    """
+
+    from sklearn import tree
+
+    fingerprint = data_fingerprint(X, y) if (fingerprint is None) else fingerprint
+    key = tree_key(fingerprint, parameters)
+    path = os.path.join(directory, key + '.joblib')
+
+    result_dict = fitted_trees.get(key)
+
+    if (result_dict is None and os.path.exists(path)):
+        try:
+            result_dict = joblib.load(path)
+            touch(path)
+        except (OSError, EOFError, ValueError):
+            result_dict = None
+
+    if (result_dict is not None):
+        remember_tree(key, result_dict)
+        return {**result_dict, "Cached": True}
+
+    started = time.perf_counter()
+    clf = tree.DecisionTreeClassifier(random_state=0, **parameters).fit(X, y)
+
+    result_dict = {"Tree": clf, "Fit Time": time.perf_counter() - started}
+    remember_tree(key, result_dict)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        joblib.dump(result_dict, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        cache_dependencies.evict(directory, CACHE_SIZE, ENTRY_SUFFIXES)
+    except OSError:
+        # A read-only checkout still works, just without the disk cache
+        pass
+
+    return {**result_dict, "Cached": False}
+
+def evaluate_parameters(X, y, parameters, folds=FOLDS):
+
+    """
+    evaluate_parameters(...) cross-validates one configuration of the grid.
+
+    :param X: Dataframe with the features
+    :param y: array with the target
+    :param parameters: arguments of the DecisionTreeClassifier
+    :param folds: number of folds
+
+    :return: dict with "Mean Score", "Std Score" and "Fit Time", the mean time of one fit
+    """
+
+    from sklearn import tree
+    from sklearn.model_selection import KFold, cross_validate
+
+    scores = cross_validate(tree.DecisionTreeClassifier(random_state=0, **parameters), X, y, cv=KFold(folds, shuffle=True, random_state=0))
+
+    result_dict = dict()
+    result_dict["Mean Score"] = float(np.mean(scores["test_score"]))
+    result_dict["Std Score"] = float(np.std(scores["test_score"]))
+    result_dict["Fit Time"] = float(np.mean(scores["fit_time"]))
+
+    return result_dict
+
+def grid_search(X, y, grid=PARAMETER_GRID, folds=FOLDS, workers=None, directory=CACHE_DIRECTORY):
+
+    """
+    grid_search(...) cross-validates every configuration of the grid in a
+    joblib process pool. Scores already computed for the same data and
+    configuration are read from the cache, hence only new configurations
+    cost a fit. The best tree is fitted through cached_fit(...).
+
+    :param X: Dataframe with the features
+    :param y: array with the target
+    :param grid: dict of parameter name to list of values
+    :param folds: number of folds
+    :param workers: number of processes, by default one per CPU
+    :param directory: cache directory
+
+    :return: dict with "Results" (Dataframe, best configuration first), "Best Parameters", "Tree" and "Time"
+    """
+
+    from sklearn.model_selection import ParameterGrid
+
+    started = time.perf_counter()
+
+    fingerprint = data_fingerprint(X, y)
+    configurations = list(ParameterGrid(grid))
+    keys = [tree_key(fingerprint, parameters, folds) for parameters in configurations]
+
+    scores = [read_scores(key, directory) for key in keys]
+    missing = [index for index, score in enumerate(scores) if (score is None)]
+
+    if (len(missing) > 0):
+        workers = (os.cpu_count() or 1) if (workers is None) else workers
+        computed = joblib.Parallel(n_jobs=min(workers, len(missing)))(
+            joblib.delayed(evaluate_parameters)(X, y, configurations[index], folds) for index in missing)
+
+        for index, score in zip(missing, computed):
+            write_scores(keys[index], score, directory)
+            scores[index] = {**score, "Cached": False}
+
+        cache_dependencies.evict(directory, CACHE_SIZE, ENTRY_SUFFIXES)
+
+    # Ties keep the order of the grid, such that the best configuration does not depend on timing
+    order = np.argsort([-score["Mean Score"] for score in scores], kind='stable')
+    results = pd.DataFrame([{**configurations[index], **scores[index]} for index in order])
+
+    best_parameters = configurations[order[0]]
+
+    result_dict = dict()
+    result_dict["Results"] = results
+    result_dict["Best Parameters"] = best_parameters
+    result_dict["Tree"] = cached_fit(X, y, best_parameters, fingerprint, directory)["Tree"]
+    result_dict["Time"] = time.perf_counter() - started
+
+    return result_dict
+
+def read_scores(key, directory=CACHE_DIRECTORY):
+
+    """read_scores(...) returns the cached cross-validation of a configuration, or None"""
+
+    path = os.path.join(directory, key + '.json')
+
+    try:
+        with open(path) as file:
+            scores = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    touch(path)
+
+    return {**scores, "Cached": True}
+
+def write_scores(key, scores, directory=CACHE_DIRECTORY):
+
+    """write_scores(...) stores the cross-validation of a configuration"""
+
+    path = os.path.join(directory, key + '.json')
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(scores, file)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
@@ -0,0 +1,213 @@
+# Dependencies
+import hashlib
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Parsed datasets are kept as uncompressed Arrow files, which can be memory-mapped
+CACHE_DIRECTORY = os.path.join('.cache', 'datasets')
+
+# Name pandas gives the unnamed index column written by DataFrame.to_csv()
+INDEX_COLUMN = 'Unnamed: 0'
+
+# Directory the app may stream large csv files from and write their results to.
+# Streaming is disabled unless it is configured, as visitors pick the file names.
+STREAM_DIRECTORY = os.environ.get('MCP_STREAM_DIRECTORY')
+
+# Arrow tables already loaded by this process, keyed by path, mtime and size
+loaded_tables = dict()
+LOADED_TABLES = 32
+
+def source_signature(path):
+
+    """
+    source_signature(...) identifies the version of a csv file by its
+    modification time and size, such that edits invalidate the cache.
+
+    :return: dict with "Path", "Modified" and "Size" as str
+    """
+
+    status = os.stat(path)
+
+    return {"Path": os.path.abspath(path), "Modified": str(status.st_mtime_ns), "Size": str(status.st_size)}
+
+def cache_path(path, drop_index=True, directory=CACHE_DIRECTORY):
+
+    """cache_path(...) returns the Arrow file a csv file is cached in"""
+
+    name = hashlib.sha1(repr((os.path.abspath(path), drop_index)).encode()).hexdigest()
+
+    return os.path.join(directory, name + '.arrow')
+
+def typed_frame(data, drop_index=True):
+
+    """
+    typed_frame(...) brings a freshly parsed csv into the typed shape the
+    pages work with: the index column written by to_csv() is dropped and
+    text columns become categoricals, i.e. integer codes plus one copy of
+    every label, which Arrow stores as dictionary columns.
+
+    :param data: Dataframe from pd.read_csv(...)
+    :param drop_index: whether the unnamed index column should be dropped
+
+    :return: Dataframe
+    """
+
+    if (drop_index and len(data.columns) > 0 and data.columns[0] == INDEX_COLUMN):
+        data = data.drop(columns=INDEX_COLUMN)
+
+    for column in data.columns:
+        if (data[column].dtype == object or pd.api.types.is_string_dtype(data[column].dtype)):
+            data[column] = data[column].astype('category')
+
+    return data
+
+def write_cache(data, signature, path):
+
+    """
+    write_cache(...) stores a typed frame as uncompressed Arrow file with
+    the signature of its source in the schema metadata.
+    """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or dict()), **{key.encode(): value.encode() for key, value in signature.items()}})
+
+    # Temporary file first, such that readers never map a half written file
+    feather.write_feather(table, path + '.tmp', compression='uncompressed')
+    os.replace(path + '.tmp', path)
+
+def read_cache(signature, path):
+
+    """
+    read_cache(...) memory-maps a cached Arrow file if it was written
+    for the same version of the source.
+
+    :return: Arrow table, or None if the cache is missing or outdated
+    """
+
+    try:
+        table = feather.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    metadata = table.schema.metadata or dict()
+    if (any(metadata.get(key.encode()) != value.encode() for key, value in signature.items())):
+        return None
+
+    return table
+
+def load_dataset(path, drop_index=True, directory=CACHE_DIRECTORY):
+
+    """
+    load_dataset(...) replaces pd.read_csv(path).iloc[: , 1:] for the bundled
+    datasets. The csv is parsed once into typed columns and cached as Arrow
+    file; later loads memory-map the cache, and loads within the same process
+    reuse the mapped table. Every call returns a new Dataframe over the shared
+    table, see table_frame(...).
+
+    :param path: path of the csv file
+    :param drop_index: whether the unnamed index column should be dropped
+    :param directory: cache directory
+
+    :return: Dataframe
+    """
+
+    signature = source_signature(path)
+    signature["Drop Index"] = str(drop_index)
+    key = tuple(signature.values())
+
+    table = loaded_tables.get(key)
+
+    if (table is None):
+        arrow_path = cache_path(path, drop_index, directory)
+        table = read_cache(signature, arrow_path)
+
+        if (table is None):
+            data = typed_frame(pd.read_csv(path), drop_index)
+            try:
+                write_cache(data, signature, arrow_path)
+            except OSError:
+                # A read-only checkout still works, just without the disk cache
+                return data
+            table = read_cache(signature, arrow_path)
+
+        remember_table(key, table)
+
+    return table_frame(table)
+
+def table_frame(table):
+
+    """
+    table_frame(...) converts an Arrow table without copying the numeric
+    columns: every column keeps its own block, which is a read-only view of
+    the (memory-mapped) table shared by all loads. Adding or replacing whole
+    columns works as usual, writing into a loaded column needs a .copy() first.
+
+    :param table: Arrow table
+
+    :return: Dataframe
+    """
+
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+def remember_table(key, table):
+
+    """remember_table(...) keeps a loaded table, dropping the oldest beyond LOADED_TABLES"""
+
+    if (len(loaded_tables) >= LOADED_TABLES):
+        loaded_tables.pop(next(iter(loaded_tables)))
+
+    loaded_tables[key] = table
+
+def resolve_stream_path(name, directory=STREAM_DIRECTORY):
+
+    """
+    resolve_stream_path(...) turns a file name typed into the app into a
+    path inside the streaming directory. Absolute paths, '..' and symbolic
+    links which lead out of the directory are rejected.
+
+    :param name: file name relative to the directory
+    :param directory: streaming directory
+
+    :return: absolute path
+    """
+
+    if (directory is None):
+        raise ValueError('Streaming is disabled, set MCP_STREAM_DIRECTORY to enable it.')
+
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, name))
+
+    if (os.path.commonpath([root, path]) != root or path == root):
+        raise ValueError('{} is not a file in the streaming directory.'.format(name))
+
+    return path
+
+def load_upload(upload, drop_index=True):
+
+    """
+    load_upload(...) parses an uploaded csv into the same typed shape as
+    load_dataset(...). Uploads are parsed once per content within the process,
+    and every call returns a new Dataframe over the shared table.
+
+    :param upload: file object from st.file_uploader(...)
+    :param drop_index: whether the unnamed index column should be dropped
+
+    :return: Dataframe
+    """
+
+    content = upload.getvalue()
+    key = (hashlib.sha1(content).hexdigest(), str(drop_index))
+
+    table = loaded_tables.get(key)
+
+    if (table is None):
+        data = typed_frame(pd.read_csv(io.BytesIO(content)), drop_index)
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        remember_table(key, table)
+
+    return table_frame(table)
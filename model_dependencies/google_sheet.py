@@ -1,19 +1,16 @@
 # Dependencies
 import streamlit as st
 import pandas as pd
-from gsheetsdb import connect
 from inform import Descriptions
-import gspread
-
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.svm import SVR
 
 def display_simulation_history():
 
     """display_simulation_history() is responsable for connecting the app with the database and displaying the simulation history."""
 
+    # Imported here, such that only this page pays for the database client and plotly
+    import plotly.express as px
+    from gsheetsdb import connect
+
     st.title("Simulations History")
     st.info(Descriptions.SIMULATION_LOG_HISTORY)
     st.markdown('---')
@@ -72,6 +69,9 @@ def save_simulation(simulations, initial_state,	agent_average,	call_average, ema
     """
     save_simulation(...) is responsable for updating the simulation history.
     """
+
+    import gspread
+
     sa = gspread.service_account("credentials.json")
     sh = sa.open("MCP")
     worksheet = sh.get_worksheet(0)
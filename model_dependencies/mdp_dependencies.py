@@ -1,52 +1,86 @@
 # Dependencies
 import streamlit as st
-import mdptoolbox
+import pandas as pd
+import numpy as np
+from model_dependencies import tensor_dependencies
+from model_dependencies import bellman_dependencies
+from model_dependencies import sensitivity_dependencies
+from model_dependencies import cache_dependencies
 
 def solve_markov_decision_process(transition_probability, rewards, discount_factor, method, number_iterations):
 
     """
-    solve_markov_decision_process(...) is responsable for trigering the selected MDP solver in the MDP Page
+    solve_markov_decision_process(...) is responsable for trigering the selected MDP solver in the MDP Page.
+    Value and policy iteration (and their variants) run on the native engine in
+    bellman_dependencies, Q-Learning is still handed to mdptoolbox. Native solves
+    are kept in the on-disk cache, such that reruns with the same inputs return at once.
     """
 
-    if (method == "Value Iteration"):
-        model = mdptoolbox.mdp.ValueIteration(transition_probability, rewards, discount_factor)
-        model.run()
-        result_dict = display_simulation_results(model)
-        return result_dict
-
-    elif (method == "Policy Iteration"):
-        model = mdptoolbox.mdp.PolicyIteration(transition_probability, rewards, discount_factor)
-        model.run()
-        result_dict = display_simulation_results(model)
+    if (method in bellman_dependencies.SOLVERS):
+        result_dict = cache_dependencies.cached_solve(transition_probability, rewards, discount_factor, method)
+        display_simulation_results(result_dict)
         return result_dict
 
     elif (method == "Q-Learnings"):
+        # mdptoolbox is only imported for the one solver still running on it
+        import mdptoolbox.mdp
         model = mdptoolbox.mdp.QLearning(transition_probability, rewards, discount_factor, number_iterations)
         model.run()
-        result_dict = display_simulation_results(model)
+        result_dict = display_simulation_results(model_to_result(model))
         return result_dict
 
     else:
         st.warning("Please select a solver!")
 
-def display_simulation_results(model):
+def solve_markov_decision_processes(transition_probabilities, rewards, discount_factors, method, workers=None):
 
     """
-    display_simulation_results(...) displays the MDP results
+    solve_markov_decision_processes(...) is the batch counterpart of
+    solve_markov_decision_process(...) for one MDP per segment and region.
+    It displays nothing, see bellman_dependencies.solve_batch(...).
+
+    :param transition_probabilities: list of K transition models, or a (K,A,S,S) array
+    :param rewards: list of K rewards, or a (K,A,S,S) array
+    :param discount_factors: discount factor, or one per model
+    :param method: name of a native solver
+    :param workers: number of processes for models which cannot be stacked
+
+    :return: dict with K "Value Functions", "Optimal Policies", "Times" and "Iterations"
     """
 
-    st.markdown('---')
-    st.markdown('## MDP Solution')
+    return bellman_dependencies.solve_batch(transition_probabilities, rewards, discount_factors, method, workers)
 
-    c1, c2 = st.columns(2)
+def model_to_result(model):
+
+    """
+    model_to_result(...) reads the solution of an mdptoolbox model
+    into the dict the native solvers return
+    """
 
     result_dict = dict()
     result_dict["Value Function"] = model.V
     result_dict["Optimal Policy"] = model.policy
     result_dict["Time"] = model.time
 
+    return result_dict
+
+def display_simulation_results(result_dict):
+
+    """
+    display_simulation_results(...) displays the MDP results and,
+    if the solver reports it, how the solver converged
+    """
+
+    st.markdown('---')
+    st.markdown('## MDP Solution')
+
+    c1, c2 = st.columns(2)
+
     time = result_dict.get("Time")
 
+    if (result_dict.get("Cached")):
+        st.info('Solution taken from the cache, the CPU time is the one of the original solve.')
+
     if (time > 1 and time < 5):
         st.warning('__Used CPU Time:__ {}'.format(time))
     elif (time < 1):
@@ -60,4 +94,118 @@ def display_simulation_results(model):
     c2.markdown("#### Optimal Policy")
     c2.table(result_dict.get("Optimal Policy"))
 
-    return result_dict
\ No newline at end of file
+    if (result_dict.get("Residuals") is not None):
+        display_convergence(result_dict)
+
+    return result_dict
+
+def display_convergence(result_dict):
+
+    """
+    display_convergence(...) plots the value change of every iteration
+    """
+
+    st.markdown('#### Convergence')
+
+    c1, c2 = st.columns((1, 2))
+    c1.metric('Iterations', result_dict.get("Iterations"))
+    c1.metric('Final Residual', '{:.3e}'.format(result_dict.get("Residuals")[-1]))
+
+    convergence = pd.DataFrame({'Residual (span of V change)': result_dict.get("Residuals")})
+    convergence.index = convergence.index + 1
+
+    if (result_dict.get("Policy Changes") is not None):
+        convergence['Policy Changes'] = result_dict.get("Policy Changes")
+
+    c2.line_chart(convergence[['Residual (span of V change)']])
+    c2.write(convergence)
+
+def display_sensitivity_analysis(transition_probability, rewards, method, action_map=None):
+
+    """
+    display_sensitivity_analysis(...) solves the MDP over a grid of WACC and
+    decision periods per year and shows where the optimal policy switches.
+
+    :param transition_probability: (A,S,S) array or list of sparse matrices
+    :param rewards: (A,S,S) array or list of sparse matrices
+    :param method: solver chosen on the MDP page (Policy Iteration if it is not a native solver)
+    :param action_map: dict of action category -> action name
+    """
+
+    import plotly.express as px
+
+    st.markdown('---')
+    st.markdown('## Sensitivity Analysis: WACC & Decision Periods')
+
+    c1, c2 = st.columns((1, 2))
+    wacc_range = c1.slider("WACC Range", min_value=0.01, max_value=1.0, value=(0.01, 0.3))
+    number_waccs = int(c1.number_input("Number of WACC values", min_value=2, value=30, step=1))
+    period_range = c1.slider("Decision Periods per Year", min_value=1, max_value=365, value=(1, 52))
+
+    if (method not in bellman_dependencies.SOLVERS or method == 'Value Iteration'):
+        method = 'Policy Iteration'
+
+    if c1.button('Run Sensitivity Analysis'):
+        waccs = np.linspace(wacc_range[0], wacc_range[1], number_waccs)
+        periods = np.arange(period_range[0], period_range[1] + 1)
+        result_dict = sensitivity_dependencies.discount_sensitivity(transition_probability, rewards, waccs, periods, method)
+
+        c1.metric('Distinct Policies', int(result_dict.get("Policy Index").max()) + 1)
+        c1.metric('Total Iterations', int(result_dict.get("Iterations").sum()))
+        c1.write('Solved {} grid points in {:.3f}s'.format(result_dict.get("Iterations").size, result_dict.get("Time")))
+
+        c2.markdown('#### Policy Map')
+        policy_map = px.imshow(result_dict.get("Policy Index"), x=periods, y=np.round(waccs, 4), aspect='auto',
+                               labels=dict(x='Decision Periods per Year', y='WACC', color='Policy'))
+        c2.plotly_chart(policy_map)
+
+        c2.markdown('#### Policy Switches (states changing their action)')
+        switch_map = px.imshow(result_dict.get("Policy Switches"), x=periods, y=np.round(waccs, 4), aspect='auto',
+                               labels=dict(x='Decision Periods per Year', y='WACC', color='States'))
+        c2.plotly_chart(switch_map)
+
+        # One row per distinct policy with the grid points it is optimal for
+        policies = result_dict.get("Optimal Policies").reshape((-1, result_dict.get("Optimal Policies").shape[2]))
+        index = result_dict.get("Policy Index").ravel()
+        first = np.unique(index, return_index=True)[1]
+        distinct = pd.DataFrame(policies[first])
+        if (action_map is not None):
+            distinct = distinct.apply(lambda column: column.map(action_map))
+        distinct.insert(0, 'Grid Points', np.bincount(index))
+
+        st.markdown('#### Distinct Optimal Policies (columns are state categories)')
+        st.write(distinct)
+
+        return result_dict
+
+def get_transition_tensor(data, number_actions=None, number_states=None, sparse=False):
+
+    """
+    get_transition_tensor(...) builds the (A,S,S) transition tensor once per
+    distinct input and keeps it in the session, such that the MCP page reuses
+    the tensor the MDP page already built for the same probabilities.
+
+    :param data: Trans. Prob. Dataframe
+    :param number_actions: Number Actions (derived from data if None)
+    :param number_states: Number States (derived from data if None)
+    :param sparse: whether a list of sparse CSR matrices should be built instead
+
+    :return transition_tensor: (A,S,S) array or list of CSR matrices
+    :return report: dict returned by tensor_dependencies.build_transition_tensor
+    """
+
+    columns = tensor_dependencies.TRIPLE_COLUMNS + [tensor_dependencies.PROBABILITY_COLUMN]
+    key = (tensor_dependencies.frame_fingerprint(data, columns), number_actions, number_states, sparse)
+
+    if ('transition_tensors' not in st.session_state):
+        st.session_state['transition_tensors'] = dict()
+
+    storage = st.session_state['transition_tensors']
+
+    if (key not in storage):
+        # Only the most recent inputs are worth keeping around
+        if (len(storage) >= 4):
+            storage.pop(next(iter(storage)))
+        storage[key] = tensor_dependencies.build_transition_tensor(data, number_actions, number_states, sparse=sparse)
+
+    return storage[key]
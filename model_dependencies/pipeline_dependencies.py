@@ -0,0 +1,188 @@
+# Dependencies
+import time
+import numpy as np
+import pandas as pd
+from model_dependencies import bellman_dependencies
+from model_dependencies import cache_dependencies
+from model_dependencies import reward_dependencies
+from model_dependencies import sensitivity_dependencies
+from model_dependencies import simulation_dependencies
+from model_dependencies import tensor_dependencies
+from model_dependencies import transition_dependencies
+
+# Stages of run_pipeline(...), in the order they run
+STAGES = ['Transition Estimation', 'Reward Construction', 'MDP Solving', 'Campaign Simulation']
+CAMPAIGN_MODES = ['Monte Carlo Simulation', 'Exact Expectation']
+
+def timed(timings, stage, function, *args, **kwargs):
+
+    """
+    timed(...) runs one stage of the pipeline and records its wall time.
+
+    :param timings: dict of stage -> seconds, updated in place
+    :param stage: name of the stage
+    :param function: function running the stage
+
+    :return: whatever function returns
+    """
+
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings[stage] = time.perf_counter() - started
+
+    return result
+
+def transition_stage(transitions_path, columns=transition_dependencies.TRANSITION_COLUMNS, workers=1):
+
+    """
+    transition_stage(...) estimates the transition probabilities from an
+    interaction log on disk, as the Transitional Probabilities page does.
+
+    :return: Dataframe in the shape of probabilities_mdp.csv
+    """
+
+    return transition_dependencies.estimate_transition_probabilities_from_file(transitions_path, list(columns), workers=workers)
+
+def reward_stage(probabilities, cost_actions, reward_factor):
+
+    """
+    reward_stage(...) builds the rewards from the estimated probabilities
+    and the action costs, as the Transitional Rewards page does.
+
+    :return: dict from reward_dependencies.rewards_from_frame(...)
+    """
+
+    return reward_dependencies.rewards_from_frame(probabilities, cost_actions, reward_factor)
+
+def solve_stage(probabilities, rewards, discount, method='Policy Iteration', sparse=False, max_iter=1000, cache=True):
+
+    """
+    solve_stage(...) solves the MDP with the native solvers. The transition
+    tensor is built straight from the probability frame of the first stage.
+
+    :param probabilities: Dataframe from transition_stage(...)
+    :param rewards: dict from reward_stage(...)
+    :param discount: discount factor
+    :param method: name of a solver in bellman_dependencies.SOLVERS
+    :param sparse: whether the transition matrices should be stored sparsely
+    :param max_iter: maximum number of iterations
+    :param cache: whether solutions are read from and written to the on-disk cache
+
+    :return: solver result dict with "Transition" and "Optimal Policy Frame"
+    """
+
+    number_actions, number_states = len(rewards["Action Labels"]), len(rewards["State Labels"])
+    transition, _ = tensor_dependencies.build_transition_tensor(probabilities, number_actions, number_states, sparse=sparse)
+
+    if (cache):
+        result_dict = cache_dependencies.cached_solve(transition, rewards["Rewards"], discount, method, max_iter=max_iter)
+    else:
+        result_dict = bellman_dependencies.solve(transition, rewards["Rewards"], discount, method, max_iter=max_iter)
+
+    policy = np.asarray(result_dict["Optimal Policy"], dtype=np.int64)
+
+    # Same shape as mcp_optimal_policy.csv, one row per state category
+    result_dict["Optimal Policy Frame"] = pd.DataFrame({'action_category': policy, 'action': rewards["Action Labels"][policy]})
+    result_dict["Transition"] = transition
+
+    return result_dict
+
+def campaign_stage(solution, rewards, periods, initial_state=None, mode=CAMPAIGN_MODES[0], simulations=1000, seed=None, workers=1):
+
+    """
+    campaign_stage(...) evaluates the optimal campaign for a customer, by
+    simulation or exactly, as the Marketing Campaign Planner page does.
+
+    :param solution: dict from solve_stage(...)
+    :param rewards: dict from reward_stage(...)
+    :param periods: number of decision periods
+    :param initial_state: CLV state of the customer, by default the first state category
+    :param mode: one of CAMPAIGN_MODES
+    :param simulations: number of simulated customers
+    :param seed: seed for reproducible simulations
+    :param workers: number of processes the simulations are spread over
+
+    :return: dict with "Initial State", "Summary", "Averages", "Total Cost", "CLV Delta" and "Statistics"
+    """
+
+    state_labels = np.asarray(rewards["State Labels"]).astype(str)
+    current_state = 0
+
+    if (initial_state is not None):
+        matches = np.flatnonzero(state_labels == str(initial_state))
+        if (len(matches) == 0):
+            raise ValueError('The initial state {} is none of the states {}.'.format(initial_state, list(state_labels)))
+        current_state = int(matches[0])
+
+    transition = solution["Transition"]
+    policy = solution["Optimal Policy"]
+    state_values, action_costs = rewards["State Values"], rewards["Action Costs"]
+
+    if (mode == CAMPAIGN_MODES[0]):
+        statistics = simulation_dependencies.simulate_campaign_statistics(transition, policy, current_state, periods, simulations, state_values, action_costs, seed=seed, workers=workers).summary()
+        action_shares, clv_change, clv_delta = statistics["Action Shares"], statistics["Average CLV Change"], statistics["CLV Delta"]
+    elif (mode == CAMPAIGN_MODES[1]):
+        statistics = simulation_dependencies.expected_campaign(transition, policy, current_state, periods, state_values, action_costs)
+        action_shares, clv_change = statistics["Action Shares"], statistics["Expected CLV Change"]
+        clv_delta = statistics["Expected CLV"][-1] - state_values[current_state]
+    else:
+        raise ValueError('Unknown campaign mode {}, pick one of {}.'.format(mode, CAMPAIGN_MODES))
+
+    actions = pd.DataFrame({'Actions': rewards["Action Labels"], 'Actions Category': np.arange(len(action_costs))})
+    summary, averages, total_cost = simulation_dependencies.build_campaign_summary(action_shares, clv_change, actions, action_costs)
+
+    result_dict = dict()
+    result_dict["Initial State"] = state_labels[current_state]
+    result_dict["Summary"] = summary
+    result_dict["Averages"] = averages
+    result_dict["Total Cost"] = total_cost
+    result_dict["CLV Delta"] = float(clv_delta)
+    result_dict["Statistics"] = statistics
+
+    return result_dict
+
+def run_pipeline(transitions_path, cost_actions, reward_factor=0.5, wacc=0.07, decision_periods=12, method='Policy Iteration', campaign_periods=12,
+                 initial_state=None, mode=CAMPAIGN_MODES[0], simulations=1000, seed=None, sparse=False, workers=1, cache=True,
+                 columns=transition_dependencies.TRANSITION_COLUMNS):
+
+    """
+    run_pipeline(...) chains the pages of the app without Streamlit: transition
+    estimation, reward construction, MDP solving and campaign simulation. Every
+    stage hands its result to the next one in memory.
+
+    :param transitions_path: path of the interaction log (state, action, follow-up state)
+    :param cost_actions: Dataframe with (action, cost), e.g. actions_cost.csv
+    :param reward_factor: weight of the CLV change against the cost
+    :param wacc: yearly weighted average cost of capital
+    :param decision_periods: number of decision periods in one year
+    :param method: name of a solver in bellman_dependencies.SOLVERS
+    :param campaign_periods: number of periods the campaign runs
+    :param initial_state: CLV state of the customer, by default the first state category
+    :param mode: one of CAMPAIGN_MODES
+    :param simulations: number of simulated customers
+    :param seed: seed for reproducible simulations
+    :param sparse: whether the transition matrices should be stored sparsely
+    :param workers: number of processes for estimation and simulation
+    :param cache: whether MDP solutions are read from and written to the on-disk cache
+    :param columns: names of the state, action and follow-up state columns of the log
+
+    :return: dict with "Probabilities", "Rewards", "Discount Factor", "Solution", "Campaign" and "Timings"
+    """
+
+    timings = dict()
+    discount = float(sensitivity_dependencies.discount_factor(wacc, decision_periods))
+
+    probabilities = timed(timings, STAGES[0], transition_stage, transitions_path, columns, workers)
+    rewards = timed(timings, STAGES[1], reward_stage, probabilities, cost_actions, reward_factor)
+    solution = timed(timings, STAGES[2], solve_stage, probabilities, rewards, discount, method, sparse, cache=cache)
+    campaign = timed(timings, STAGES[3], campaign_stage, solution, rewards, campaign_periods, initial_state, mode, simulations, seed, workers)
+
+    result_dict = dict()
+    result_dict["Probabilities"] = probabilities
+    result_dict["Rewards"] = rewards
+    result_dict["Discount Factor"] = discount
+    result_dict["Solution"] = solution
+    result_dict["Campaign"] = campaign
+    result_dict["Timings"] = timings
+
+    return result_dict
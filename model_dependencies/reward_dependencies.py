@@ -0,0 +1,313 @@
+# Dependencies
+import numpy as np
+import pandas as pd
+from model_dependencies import tensor_dependencies
+from model_dependencies import bellman_dependencies
+
+# Columns of the reward input (probabilities_mdp.csv) and of actions_cost.csv
+LABEL_COLUMNS = ['state', 'action', 'follow_up_state']
+COST_COLUMNS = ['action', 'cost']
+
+def reward_tensor(state_values, action_costs, reward_factor):
+
+    """
+    reward_tensor(...) blends the CLV change and the action cost of every
+    (S,A,S') triple by broadcasting, without a single row of Python:
+    reward_factor * (CLV(S') - CLV(S)) - (1 - reward_factor) * cost(A).
+
+    :param state_values: (S,) CLV of every state category
+    :param action_costs: (A,) cost of every action category
+    :param reward_factor: weight of the CLV change against the cost
+
+    :return: (A,S,S) array
+    """
+
+    state_values = np.asarray(state_values, dtype=float)
+    action_costs = np.asarray(action_costs, dtype=float)
+
+    delta_clv = state_values[None, :] - state_values[:, None]
+
+    return reward_factor * delta_clv[None, :, :] - (1 - reward_factor) * action_costs[:, None, None]
+
+def reward_frame(rewards, action_costs):
+
+    """
+    reward_frame(...) lists every (S,A,S') triple with its reward and the
+    cost of its action in the shape of mdp_rewards.csv, sorted by the categories.
+
+    :param rewards: (A,S,S) array from reward_tensor(...)
+    :param action_costs: (A,) cost of every action category
+
+    :return: Dataframe in the shape of mdp_rewards.csv
+    """
+
+    number_actions, number_states, _ = rewards.shape
+    action_costs = np.asarray(action_costs, dtype=float)
+
+    # Rows are ordered by (state, action, follow-up state)
+    states, actions, follow_up_states = np.unravel_index(np.arange(number_states * number_actions * number_states), (number_states, number_actions, number_states))
+
+    final_rewards = pd.DataFrame({
+        "Triple": list(zip(states.tolist(), actions.tolist(), follow_up_states.tolist())),
+        tensor_dependencies.REWARD_COLUMN: rewards.transpose((1, 0, 2)).ravel(),
+        'cost': action_costs[actions],
+        'state_category': states,
+        'action_category': actions,
+        'follow_up_state_category': follow_up_states
+    })
+
+    return final_rewards
+
+def encode_categories(values):
+
+    """
+    encode_categories(...) assigns the codes astype('category').cat.codes
+    would assign, i.e. the position of every value in the sorted uniques.
+
+    :param values: array-like
+
+    :return codes: (N,) int64 array
+    :return labels: sorted unique values
+    """
+
+    labels, codes = np.unique(np.asarray(values), return_inverse=True)
+
+    return codes.astype(np.int64).ravel(), labels
+
+def frame_categories(data, columns):
+
+    """
+    frame_categories(...) returns the category codes of one or more label
+    columns which share an encoding, e.g. state and follow_up_state. If the
+    frame already has the <column>_category columns, as probabilities_mdp.csv
+    does, their codes are kept, such that the rewards line up with the
+    transition tensor built from the same frame. Otherwise the codes are
+    derived with encode_categories(...).
+
+    :param data: Dataframe
+    :param columns: label columns sharing one encoding
+
+    :return codes: (N * len(columns),) int64 array, the columns one after another
+    :return labels: label of every code
+    """
+
+    values = np.concatenate([data[column].to_numpy() for column in columns])
+    category_columns = [column + '_category' for column in columns]
+
+    if (not set(category_columns).issubset(data.columns)):
+        return encode_categories(values)
+
+    codes = np.concatenate([data[column].to_numpy(dtype=np.int64) for column in category_columns])
+
+    labels = np.empty(codes.max() + 1 if (len(codes) > 0) else 0, dtype=values.dtype)
+    labels[codes] = values
+
+    if (np.any(labels[codes] != values) or len(np.unique(codes)) != len(labels)):
+        raise ValueError('The columns {} do not assign exactly one label to the categories 0, ..., N - 1.'.format(category_columns))
+
+    return codes, labels
+
+def state_values_from_frame(data, state='state', follow_up_state='follow_up_state', columns=LABEL_COLUMNS):
+
+    """
+    state_values_from_frame(...) derives the CLV of every state category
+    from a frame of (S,A,S') rows. States and follow-up states share one
+    encoding over both columns, see frame_categories(...); the CLV of a
+    state is read from the state/follow-up state value columns of its rows.
+
+    :param data: Dataframe, e.g. probabilities_mdp.csv
+    :param state: column holding the CLV of the state
+    :param follow_up_state: column holding the CLV of the follow-up state
+    :param columns: names of the state, action and follow-up state columns
+
+    :return state_values: (S,) CLV of every state category
+    :return state_labels: label of every state category
+    """
+
+    state_column, _, follow_up_state_column = columns
+
+    codes, state_labels = frame_categories(data, [state_column, follow_up_state_column])
+    values = np.concatenate((data[state].to_numpy(dtype=float), data[follow_up_state].to_numpy(dtype=float)))
+
+    state_values = np.full(len(state_labels), np.nan)
+    state_values[codes] = values
+
+    if (np.any(state_values[codes] != values)):
+        raise ValueError('Every state needs exactly one CLV, but the columns {} and {} disagree.'.format(state, follow_up_state))
+
+    return state_values, state_labels
+
+def action_costs_from_frame(data, cost_actions, columns=LABEL_COLUMNS):
+
+    """
+    action_costs_from_frame(...) looks up the cost of every action
+    category in the actions_cost.csv frame.
+
+    :param data: Dataframe, e.g. probabilities_mdp.csv
+    :param cost_actions: Dataframe with (action, cost)
+    :param columns: names of the state, action and follow-up state columns
+
+    :return action_costs: (A,) cost of every action category
+    :return action_labels: label of every action category
+    """
+
+    _, action_labels = frame_categories(data, [columns[1]])
+
+    costs = cost_actions.drop_duplicates(subset=COST_COLUMNS[0], keep='last').set_index(COST_COLUMNS[0])[COST_COLUMNS[1]]
+    action_costs = pd.to_numeric(costs.reindex(action_labels)).to_numpy(dtype=float)
+
+    if (np.any(np.isnan(action_costs))):
+        raise ValueError('No cost is given for the actions {}.'.format(list(action_labels[np.isnan(action_costs)])))
+
+    return action_costs, action_labels
+
+def rewards_from_frame(data, cost_actions, reward_factor, state='state', follow_up_state='follow_up_state', columns=LABEL_COLUMNS):
+
+    """
+    rewards_from_frame(...) builds the reward tensor and the mdp_rewards.csv
+    frame from a frame of (S,A,S') rows and the cost of every action.
+
+    :param data: Dataframe, e.g. probabilities_mdp.csv
+    :param cost_actions: Dataframe with (action, cost)
+    :param reward_factor: weight of the CLV change against the cost
+    :param state: column holding the CLV of the state
+    :param follow_up_state: column holding the CLV of the follow-up state
+    :param columns: names of the state, action and follow-up state columns
+
+    :return: dict with "Rewards", "Frame", "State Values", "Action Costs", "State Labels", "Action Labels"
+    """
+
+    state_values, state_labels = state_values_from_frame(data, state, follow_up_state, columns)
+    action_costs, action_labels = action_costs_from_frame(data, cost_actions, columns)
+
+    rewards = reward_tensor(state_values, action_costs, reward_factor)
+
+    result_dict = dict()
+    result_dict["Rewards"] = rewards
+    result_dict["Frame"] = reward_frame(rewards, action_costs)
+    result_dict["State Values"] = state_values
+    result_dict["Action Costs"] = action_costs
+    result_dict["State Labels"] = state_labels
+    result_dict["Action Labels"] = action_labels
+
+    return result_dict
+
+def reward_decomposition(state_values, action_costs):
+
+    """
+    reward_decomposition(...) splits the rewards into the parts which do
+    not depend on the reward factor, such that any number of factors
+    can be blended from them without touching the inputs again.
+
+    :param state_values: (S,) CLV of every state category
+    :param action_costs: (A,) cost of every action category
+
+    :return: dict with "State Values", "Delta CLV" (S,S) and "Action Costs" (A,)
+    """
+
+    state_values = np.asarray(state_values, dtype=float)
+
+    result_dict = dict()
+    result_dict["State Values"] = state_values
+    result_dict["Delta CLV"] = state_values[None, :] - state_values[:, None]
+    result_dict["Action Costs"] = np.asarray(action_costs, dtype=float)
+
+    return result_dict
+
+def sweep_reward_tensors(decomposition, reward_factors):
+
+    """
+    sweep_reward_tensors(...) blends the reward tensors of all reward
+    factors in one broadcast.
+
+    :param decomposition: dict from reward_decomposition(...)
+    :param reward_factors: (K,) reward factors
+
+    :return: (K,A,S,S) array, entry k equals reward_tensor(..., reward_factors[k])
+    """
+
+    factors = np.asarray(reward_factors, dtype=float)[:, None, None, None]
+    delta_clv = decomposition["Delta CLV"][None, None, :, :]
+    action_costs = decomposition["Action Costs"][None, :, None, None]
+
+    return factors * delta_clv - (1 - factors) * action_costs
+
+def sweep_expected_rewards(transition, decomposition, reward_factors):
+
+    """
+    sweep_expected_rewards(...) computes the expected reward r(a,s) of every
+    reward factor without building the (K,A,S,S) rewards. As CLV(S') - CLV(S)
+    is linear, its expectation is (P_a CLV)(s) - CLV(s) * sum_s' P(s'|s,a),
+    which is one product with the stacked transition matrices for all factors.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param decomposition: dict from reward_decomposition(...)
+    :param reward_factors: (K,) reward factors
+
+    :return: (K,A,S) array
+    """
+
+    number_actions, number_states = bellman_dependencies.transition_shape(transition)
+    stacked = bellman_dependencies.stack_transitions(transition)
+    state_values = decomposition["State Values"]
+
+    row_sums = np.asarray(stacked.sum(axis=1)).reshape((number_actions, number_states))
+    expected_delta = np.asarray(stacked @ state_values).reshape((number_actions, number_states)) - state_values[None, :] * row_sums
+    expected_cost = decomposition["Action Costs"][:, None] * row_sums
+
+    factors = np.asarray(reward_factors, dtype=float)[:, None, None]
+
+    return factors * expected_delta[None, :, :] - (1 - factors) * expected_cost[None, :, :]
+
+def sweep_policies(transition, decomposition, reward_factors, discount, epsilon=0.01, max_iter=1000):
+
+    """
+    sweep_policies(...) finds the optimal policy of every reward factor
+    with one batched value iteration.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param decomposition: dict from reward_decomposition(...)
+    :param reward_factors: (K,) reward factors
+    :param discount: discount factor
+    :param epsilon: epsilon-optimality of the policies
+    :param max_iter: maximum number of iterations
+
+    :return: dict from bellman_dependencies.batched_value_iteration(...) with "Reward Factors"
+    """
+
+    reward_batch = sweep_expected_rewards(transition, decomposition, reward_factors)
+
+    result_dict = bellman_dependencies.batched_value_iteration(transition, reward_batch, discount, epsilon, max_iter)
+    result_dict["Reward Factors"] = np.asarray(reward_factors, dtype=float)
+
+    return result_dict
+
+def sweep_frame_policies(data, cost_actions, reward_factors, discount, state='state', follow_up_state='follow_up_state', columns=LABEL_COLUMNS):
+
+    """
+    sweep_frame_policies(...) runs sweep_policies(...) on a probabilities
+    frame. The transition tensor, the CLV of every state and the labels are
+    all taken from the category codes of that one frame, such that the
+    policies line up with the states they are reported for.
+
+    :param data: Dataframe with the (S,A,S') categories and 'Probability Triple'
+    :param cost_actions: Dataframe with (action, cost)
+    :param reward_factors: (K,) reward factors
+    :param discount: discount factor
+    :param state: column holding the CLV of the state
+    :param follow_up_state: column holding the CLV of the follow-up state
+    :param columns: names of the state, action and follow-up state columns
+
+    :return: dict from sweep_policies(...) with "State Labels" and "Action Labels"
+    """
+
+    state_values, state_labels = state_values_from_frame(data, state, follow_up_state, columns)
+    action_costs, action_labels = action_costs_from_frame(data, cost_actions, columns)
+
+    transition, _ = tensor_dependencies.build_transition_tensor(data, len(action_labels), len(state_labels))
+
+    result_dict = sweep_policies(transition, reward_decomposition(state_values, action_costs), reward_factors, discount)
+    result_dict["State Labels"] = state_labels
+    result_dict["Action Labels"] = action_labels
+
+    return result_dict
@@ -9,10 +9,12 @@ from sklearn import tree
 import plotly.express as px
 import plotly.graph_objects as go
 import graphviz
+from model_dependencies import tree_dependencies
+from model_dependencies import cart_dependencies
 
-def segment_customer_using(data, target_columns, y_column_target):
+def segment_customer_using(data, target_columns, y_column_target, grid=None):
 
-    """This function bring all inputs for CART Algorithm together."""
+    """This function bring all inputs for CART Algorithm together. With a grid, the parameters are tuned first."""
 
     # Select data for modeling
     X = data[target_columns]
@@ -21,11 +23,15 @@ def segment_customer_using(data, target_columns, y_column_target):
     y = data[y_column_target].values
     # st.write(y)
 
+    parameters = dict(cart_dependencies.CART_PARAMETERS)
+    if (grid is not None):
+        parameters.update(display_tuning(X, y, grid))
+
     # Fit the model and display results
-    X_train, X_test, y_train, y_test, clf, graph = fitting(X, y, 'gini', 'best', 
-                                                        mdepth=3, 
-                                                        clweight=None,
-                                                        minleaf=1000)
+    X_train, X_test, y_train, y_test, clf, graph = fitting(X, y, parameters['criterion'], parameters['splitter'], 
+                                                        mdepth=parameters['max_depth'], 
+                                                        clweight=parameters['class_weight'],
+                                                        minleaf=parameters['min_samples_leaf'])
 
     if (len(target_columns) == 2):
         Plot_3D(X, X_test, y_test, clf, x1=target_columns[0], x2=target_columns[1], mesh_size=1, margin=1)
@@ -36,6 +42,54 @@ def segment_customer_using(data, target_columns, y_column_target):
     # get_lineage(clf, clf.tree_.feature)
     tree_to_code(clf, clf.tree_.feature)
 
+    compiled = tree_dependencies.compile_tree(clf, target_columns, y_column_target)
+    display_segmentation(data, compiled)
+
+    return compiled
+
+def display_tuning(X, y, grid):
+
+    """
+    display_tuning(...) cross-validates every configuration of the grid on
+    the training split of fitting(...) and reports score and fit time of
+    each. Configurations scored before are read from the cache.
+
+    :return: dict with the best criterion, max_depth and min_samples_leaf
+    """
+
+    X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=0)
+
+    with st.spinner('Cross-validating the CART parameters'):
+        result_dict = cart_dependencies.grid_search(X_train, y_train, grid)
+
+    st.write('---')
+    st.markdown('## Parameter Tuning')
+
+    st.info('Best parameters: {parameters}, found in {time:.1f} seconds'.format(parameters = result_dict["Best Parameters"], time = result_dict["Time"]))
+    st.table(result_dict["Results"])
+
+    return result_dict["Best Parameters"]
+
+def display_segmentation(data, compiled):
+
+    """
+    display_segmentation(...) assigns every customer of the data to a
+    segment of the fitted tree and offers the segmented data and the
+    tree itself, which can be reloaded without sklearn, for download.
+    """
+
+    st.markdown('---')
+    st.markdown('## Segmented Data')
+
+    segmented = tree_dependencies.segment_frame(data, compiled)
+
+    st.table(tree_dependencies.segment_summary(compiled))
+    st.write(segmented)
+
+    c1, c2 = st.columns(2)
+    c1.download_button('Download Segmented Data', segmented.to_csv(index=False).encode('utf-8'), file_name='segmented_customers.csv', mime='text/csv')
+    c2.download_button('Download Tree', tree_dependencies.tree_to_bytes(compiled), file_name='segmentation_tree.npz', mime='application/octet-stream')
+
 def apply_weigthing_function(number_weights, data, column_names):
 
     weights = np.zeros(number_weights)
@@ -65,15 +119,14 @@ def fitting(X, y, criterion, splitter, mdepth, clweight, minleaf):
     # Create training and testing samples
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
 
-    # Fit the model
-    model = tree.DecisionTreeClassifier(criterion=criterion, 
-                                        splitter=splitter, 
-                                        max_depth=mdepth,
-                                        class_weight=clweight,
-                                        min_samples_leaf=minleaf, 
-                                        random_state=0, 
-                                  )
-    clf = model.fit(X_train, y_train)
+    # Fit the model, or reuse the tree fitted on the same data with the same parameters
+    fitted = cart_dependencies.cached_fit(X_train, y_train, {"criterion": criterion, 
+                                                             "splitter": splitter, 
+                                                             "max_depth": mdepth,
+                                                             "class_weight": clweight,
+                                                             "min_samples_leaf": minleaf,
+                                                            })
+    model = clf = fitted["Tree"]
 
     # Predict class labels on training data
     pred_labels_tr = model.predict(X_train)
@@ -87,6 +140,7 @@ def fitting(X, y, criterion, splitter, mdepth, clweight, minleaf):
         'Tree Depth: ': clf.tree_.max_depth,
         'No. of leaves: ': clf.tree_.n_leaves,
         'No. of features: ': clf.n_features_in_,
+        'Fit Time (s): ': fitted["Fit Time"],
     }
 
     st.table(pd.DataFrame.from_dict(summary_dict))
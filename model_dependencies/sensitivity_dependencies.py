@@ -0,0 +1,112 @@
+# Dependencies
+import time
+import numpy as np
+from model_dependencies import bellman_dependencies
+
+def discount_factor(wacc, periods):
+
+    """
+    discount_factor(...) converts a yearly WACC into the discount
+    factor of one decision period, as the MDP page does.
+
+    :param wacc: yearly weighted average cost of capital
+    :param periods: number of decision periods in one year
+
+    :return: discount factor
+    """
+
+    return np.power(1 / (1 + np.asarray(wacc, dtype=float)), 1 / np.asarray(periods, dtype=float))
+
+def snake_order(number_rows, number_columns):
+
+    """
+    snake_order(...) walks a grid row by row, reversing every other row,
+    such that consecutive grid points are always neighbours.
+
+    :return: list of (row, column)
+    """
+
+    order = []
+    for row in range(number_rows):
+        columns = range(number_columns) if (row % 2 == 0) else reversed(range(number_columns))
+        order.extend((row, column) for column in columns)
+
+    return order
+
+def policy_switches(policies):
+
+    """
+    policy_switches(...) marks the grid points whose optimal policy differs
+    from the one of the previous WACC or the previous number of periods.
+
+    :param policies: (W,P,S) optimal policy of every grid point
+
+    :return: (W,P) int array with the number of states whose action changes
+    """
+
+    switches = np.zeros(policies.shape[:2], dtype=np.int64)
+
+    wacc_changes = (policies[1:] != policies[:-1]).sum(axis=2)
+    period_changes = (policies[:, 1:] != policies[:, :-1]).sum(axis=2)
+
+    switches[1:] = np.maximum(switches[1:], wacc_changes)
+    switches[:, 1:] = np.maximum(switches[:, 1:], period_changes)
+
+    return switches
+
+def discount_sensitivity(transition, rewards, waccs, periods, method='Policy Iteration', **options):
+
+    """
+    discount_sensitivity(...) solves the MDP for every combination of WACC
+    and decision periods per year. The grid is walked in snake order and
+    every solve starts from the value function of the previous, neighbouring
+    grid point, whose discount factor is close and so is its solution.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param rewards: rewards in any shape mdptoolbox accepts
+    :param waccs: (W,) yearly WACC values
+    :param periods: (P,) numbers of decision periods per year
+    :param method: name of a solver in bellman_dependencies.SOLVERS
+    :param options: further arguments of the solver
+
+    :return: dict with "WACC", "Periods", "Discount Factors", "Value Functions", "Optimal Policies",
+             "Policy Index", "Policy Switches", "Iterations" and "Time"
+    """
+
+    started = time.perf_counter()
+
+    waccs = np.asarray(waccs, dtype=float)
+    periods = np.asarray(periods, dtype=np.int64)
+    discount_factors = discount_factor(waccs[:, None], periods[None, :])
+
+    # Expected rewards are the same for every discount factor, hence reduced once
+    reward = bellman_dependencies.expected_rewards(transition, rewards).T
+    number_states = reward.shape[0]
+
+    values = np.zeros((len(waccs), len(periods), number_states))
+    policies = np.zeros((len(waccs), len(periods), number_states), dtype=np.int64)
+    iterations = np.zeros((len(waccs), len(periods)), dtype=np.int64)
+
+    value = None
+    for row, column in snake_order(len(waccs), len(periods)):
+        result_dict = bellman_dependencies.solve(transition, reward, discount_factors[row, column], method, initial_value=value, **options)
+
+        value = result_dict.get("Value Function")
+        values[row, column] = value
+        policies[row, column] = result_dict.get("Optimal Policy")
+        iterations[row, column] = result_dict.get("Iterations")
+
+    _, policy_index = np.unique(policies.reshape((-1, number_states)), axis=0, return_inverse=True)
+
+    result_dict = dict()
+    result_dict["WACC"] = waccs
+    result_dict["Periods"] = periods
+    result_dict["Discount Factors"] = discount_factors
+    result_dict["Value Functions"] = values
+    result_dict["Optimal Policies"] = policies
+    result_dict["Policy Index"] = policy_index.reshape(iterations.shape)
+    result_dict["Policy Switches"] = policy_switches(policies)
+    result_dict["Iterations"] = iterations
+    result_dict["Time"] = time.perf_counter() - started
+
+    return result_dict
@@ -0,0 +1,695 @@
+# Dependencies
+import time
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import scipy.sparse as sparse_matrix
+from model_dependencies import tensor_dependencies
+
+def policy_transition_matrix(transition, policy):
+
+    """
+    policy_transition_matrix(...) builds the Markov chain the customer
+    follows under the policy: row s is P(.|s, policy(s)).
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param policy: (S,) action category per state category
+
+    :return: (S,S) CSR matrix
+    """
+
+    policy = np.asarray(policy, dtype=np.int64)
+    number_states = len(policy)
+    rows = policy * number_states + np.arange(number_states)
+
+    if (tensor_dependencies.is_sparse(transition)):
+        stacked = sparse_matrix.vstack(transition, format='csr')
+    else:
+        stacked = np.asarray(transition, dtype=float).reshape((-1, number_states))
+
+    return sparse_matrix.csr_matrix(stacked[rows])
+
+def cumulative_lookup(chain):
+
+    """
+    cumulative_lookup(...) prepares the chain for sampling: the cumulative
+    probabilities of every row are shifted by the row number, such that
+    all rows form one increasing array and the follow-up state of a customer
+    in state s with uniform draw u is found by one binary search for s + u.
+    Rows without probability mass keep the customer in his state.
+
+    :param chain: (S,S) CSR matrix from policy_transition_matrix(...)
+
+    :return: dict with "Cumulative", "States", "Row End"
+    """
+
+    chain = sparse_matrix.csr_matrix(chain, dtype=float, copy=True)
+    chain.eliminate_zeros()
+
+    number_states = chain.shape[0]
+    empty = np.flatnonzero(np.diff(chain.indptr) == 0)
+    if (len(empty) > 0):
+        chain = chain + sparse_matrix.csr_matrix((np.ones(len(empty)), (empty, empty)), shape=chain.shape)
+
+    chain.sort_indices()
+    row_of_entry = np.repeat(np.arange(number_states), np.diff(chain.indptr))
+
+    row_sums = np.asarray(chain.sum(axis=1)).ravel()
+    cumulative = np.cumsum(chain.data / row_sums[row_of_entry])
+
+    # Restart the running sum in every row and shift it by the row number
+    row_offset = np.concatenate(([0.0], cumulative[chain.indptr[1:-1] - 1]))
+    cumulative = cumulative - row_offset[row_of_entry] + row_of_entry
+    cumulative[chain.indptr[1:] - 1] = np.arange(1, number_states + 1)
+
+    lookup = dict()
+    lookup["Cumulative"] = cumulative
+    lookup["States"] = chain.indices.astype(np.int64)
+    lookup["Row End"] = chain.indptr[1:].astype(np.int64)
+
+    return lookup
+
+def sample_next_states(lookup, states, rng):
+
+    """
+    sample_next_states(...) draws the follow-up state of every
+    simulated customer at once according to the transition probabilities.
+
+    :param lookup: dict from cumulative_lookup(...)
+    :param states: (N,) current state categories
+    :param rng: numpy Generator
+
+    :return: (N,) follow-up state categories
+    """
+
+    draws = states + rng.random(len(states))
+    position = np.searchsorted(lookup["Cumulative"], draws, side='right')
+
+    # Guards against s + u being rounded up to s + 1
+    position = np.minimum(position, lookup["Row End"][states] - 1)
+
+    return lookup["States"][position]
+
+def simulate_campaign(transition, policy, initial_state, periods, simulations, seed=None):
+
+    """
+    simulate_campaign(...) applies the optimal policy to all simulated customers
+    together: in every period each customer receives the action of his current
+    state and moves to a follow-up state drawn from the transition probabilities.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param policy: (S,) action category per state category
+    :param initial_state: initial state category of every customer
+    :param periods: number of decision periods
+    :param simulations: number of simulated customers
+    :param seed: seed or numpy Generator for reproducible runs
+
+    :return actions: (simulations, periods) action category applied in every period
+    :return states: (simulations, periods) state category reached after every period
+    """
+
+    policy = np.asarray(policy, dtype=np.int64)
+    lookup = cumulative_lookup(policy_transition_matrix(transition, policy))
+
+    return simulate_chain(lookup, policy, initial_state, periods, simulations, seed)
+
+def simulate_chain(lookup, policy, initial_state, periods, simulations, seed=None):
+
+    """
+    simulate_chain(...) is simulate_campaign(...) on an already prepared
+    lookup, such that chunked runs prepare the Markov chain only once.
+
+    :param lookup: dict from cumulative_lookup(...)
+    :param policy: (S,) action category per state category
+
+    :return actions: (simulations, periods) action category applied in every period
+    :return states: (simulations, periods) state category reached after every period
+    """
+
+    rng = np.random.default_rng(seed)
+    policy = np.asarray(policy, dtype=np.int64)
+
+    actions = np.empty((simulations, periods), dtype=np.int32)
+    states = np.empty((simulations, periods), dtype=np.int32)
+
+    current = np.full(simulations, initial_state, dtype=np.int64)
+
+    for t in range(periods):
+        actions[:, t] = policy[current]
+        current = sample_next_states(lookup, current, rng)
+        states[:, t] = current
+
+    return actions, states
+
+def propagate_state_distribution(transition, policy, initial_state, periods):
+
+    """
+    propagate_state_distribution(...) follows the state distribution of a
+    customer under the policy exactly, one vector-matrix product per period.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param policy: (S,) action category per state category
+    :param initial_state: initial state category
+    :param periods: number of decision periods
+
+    :return: (periods + 1, S) array, row t is the distribution before period t + 1
+    """
+
+    chain_transposed = policy_transition_matrix(transition, policy).T.tocsr()
+    number_states = chain_transposed.shape[0]
+
+    distributions = np.zeros((periods + 1, number_states))
+    distributions[0, initial_state] = 1.0
+
+    for t in range(periods):
+        distributions[t + 1] = chain_transposed @ distributions[t]
+
+    return distributions
+
+def expected_campaign(transition, policy, initial_state, periods, state_values, action_costs):
+
+    """
+    expected_campaign(...) is the exact counterpart of simulate_campaign(...):
+    it returns the expected outcome of infinitely many simulations without
+    sampling noise.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param policy: (S,) action category per state category
+    :param initial_state: initial state category
+    :param periods: number of decision periods
+    :param state_values: (S,) CLV of every state category
+    :param action_costs: (A,) cost of every action category
+
+    :return: dict with "State Distributions", "Action Shares", "Expected CLV",
+             "Expected CLV Change", "Expected Cost" and "Expected Total Cost"
+    """
+
+    policy = np.asarray(policy, dtype=np.int64)
+    state_values = np.asarray(state_values, dtype=float)
+    action_costs = np.asarray(action_costs, dtype=float)
+
+    distributions = propagate_state_distribution(transition, policy, initial_state, periods)
+    before, after = distributions[:-1], distributions[1:]
+
+    # Share of customers receiving every action: mass of the states the policy maps to it
+    policy_actions = np.zeros((len(policy), len(action_costs)))
+    policy_actions[np.arange(len(policy)), policy] = 1.0
+    action_shares = before @ policy_actions
+
+    result_dict = dict()
+    result_dict["State Distributions"] = before
+    result_dict["Action Shares"] = action_shares
+    result_dict["Expected CLV"] = after @ state_values
+    result_dict["Expected CLV Change"] = (after - before) @ state_values
+    result_dict["Expected Cost"] = action_shares @ action_costs
+    result_dict["Expected Total Cost"] = result_dict["Expected Cost"].sum()
+
+    return result_dict
+
+def build_campaign_summary(action_frequencies, clv_change, actions, action_costs):
+
+    """
+    build_campaign_summary(...) turns per-period statistics of a campaign
+    into the summary table and its averages.
+
+    :param action_frequencies: (periods, A) share of customers receiving every action
+    :param clv_change: (periods,) average CLV change in every period
+    :param actions: set actions
+    :param action_costs: (A,) cost of every action category
+
+    :return result: summary table per period
+    :return averages: averages of the action shares, the best action cost and the CLV change
+    :return total_cost: Total Cost of Overall Best Campaign
+    """
+
+    action_names = actions.sort_values(by=['Actions Category'])['Actions'].to_list()
+    action_frequencies = np.asarray(action_frequencies, dtype=float)
+
+    best_action = action_frequencies.argmax(axis=1)
+
+    result = pd.DataFrame(action_frequencies, columns = action_names)
+    result['Cost Overall Best Action'] = np.asarray(action_costs)[best_action]
+    result['Average CLV Change'] = clv_change
+
+    averages = result.mean(axis = 0)
+    total_cost = result['Cost Overall Best Action'].sum()
+
+    result['Overall Best Action'] = np.array(action_names, dtype=object)[best_action]
+    result['Period'] = result.index + 1
+
+    result = result.reindex(columns=['Period'] + action_names + ['Overall Best Action', 'Cost Overall Best Action'])
+
+    return result, averages, total_cost
+
+def summarize_trajectories(actions, states, initial_state, state_values, action_costs):
+
+    """
+    summarize_trajectories(...) reduces simulated trajectories to the
+    per-period statistics of the campaign with one bincount each, the
+    sampled counterpart of expected_campaign(...).
+
+    :param actions: (simulations, periods) action categories from simulate_campaign(...)
+    :param states: (simulations, periods) state categories from simulate_campaign(...)
+    :param initial_state: initial state category
+    :param state_values: (S,) CLV of every state category
+    :param action_costs: (A,) cost of every action category
+
+    :return: dict with "Action Shares", "Average CLV", "Average CLV Change",
+             "Average Cost", "Average Total Cost" and "CLV Delta"
+    """
+
+    state_values = np.asarray(state_values, dtype=float)
+    action_costs = np.asarray(action_costs, dtype=float)
+
+    simulations, periods = actions.shape
+    number_actions, number_states = len(action_costs), len(state_values)
+
+    # Offsetting the codes by period counts every (period, category) pair in one bincount
+    period_offset = np.arange(periods)
+    action_counts = np.bincount((actions + period_offset * number_actions).ravel(), minlength=periods * number_actions)
+    state_counts = np.bincount((states + period_offset * number_states).ravel(), minlength=periods * number_states)
+
+    action_shares = action_counts.reshape((periods, number_actions)) / simulations
+    state_shares = state_counts.reshape((periods, number_states)) / simulations
+
+    average_clv = state_shares @ state_values
+    clv_before = np.concatenate(([state_values[initial_state]], average_clv[:-1]))
+
+    result_dict = dict()
+    result_dict["Action Shares"] = action_shares
+    result_dict["Average CLV"] = average_clv
+    result_dict["Average CLV Change"] = average_clv - clv_before
+    result_dict["Average Cost"] = action_shares @ action_costs
+    result_dict["Average Total Cost"] = result_dict["Average Cost"].sum()
+    result_dict["CLV Delta"] = average_clv[-1] - state_values[initial_state]
+
+    return result_dict
+
+class CampaignStatistics:
+
+    """
+    CampaignStatistics accumulates the statistics of summarize_trajectories(...)
+    chunk by chunk, such that trajectories can be dropped right after they were
+    simulated and memory does not grow with the number of simulations. Means and
+    variances are updated with Welford's algorithm in its pairwise form (Chan et al.),
+    hence two accumulators can also be merged.
+    """
+
+    def __init__(self, initial_state, state_values, action_costs, periods):
+
+        self.initial_state = initial_state
+        self.state_values = np.asarray(state_values, dtype=float)
+        self.action_costs = np.asarray(action_costs, dtype=float)
+        self.periods = periods
+
+        self.count = 0
+        self.action_counts = np.zeros((periods, len(self.action_costs)), dtype=np.int64)
+
+        # Welford moments: CLV after every period, CLV change start to end, campaign cost
+        # and the share of periods in which a customer receives every action
+        self.clv_mean = np.zeros(periods)
+        self.clv_m2 = np.zeros(periods)
+        self.delta_mean = 0.0
+        self.delta_m2 = 0.0
+        self.cost_mean = 0.0
+        self.cost_m2 = 0.0
+        self.frequency_mean = np.zeros(len(self.action_costs))
+        self.frequency_m2 = np.zeros(len(self.action_costs))
+
+    def update(self, actions, states):
+
+        """
+        update(...) adds a chunk of trajectories from simulate_campaign(...)
+        """
+
+        chunk = len(actions)
+        if (chunk == 0):
+            return self
+
+        number_actions = len(self.action_costs)
+        period_offset = np.arange(self.periods) * number_actions
+        counts = np.bincount((actions + period_offset).ravel(), minlength=self.periods * number_actions)
+
+        clv = self.state_values[states]
+        delta = clv[:, -1] - self.state_values[self.initial_state]
+        cost = self.action_costs[actions].sum(axis=1)
+
+        customer_offset = np.arange(chunk)[:, None] * number_actions
+        frequency = np.bincount((actions + customer_offset).ravel(), minlength=chunk * number_actions)
+        frequency = frequency.reshape((chunk, number_actions)) / self.periods
+
+        chunk_moments = (clv.mean(axis=0), ((clv - clv.mean(axis=0)) ** 2).sum(axis=0),
+                         delta.mean(), ((delta - delta.mean()) ** 2).sum(),
+                         cost.mean(), ((cost - cost.mean()) ** 2).sum(),
+                         frequency.mean(axis=0), ((frequency - frequency.mean(axis=0)) ** 2).sum(axis=0))
+
+        self.action_counts += counts.reshape((self.periods, number_actions))
+        self.combine(chunk, chunk_moments)
+
+        return self
+
+    def merge(self, other):
+
+        """
+        merge(...) adds the statistics of another accumulator of the same campaign
+        """
+
+        self.action_counts += other.action_counts
+        self.combine(other.count, (other.clv_mean, other.clv_m2, other.delta_mean, other.delta_m2,
+                                   other.cost_mean, other.cost_m2, other.frequency_mean, other.frequency_m2))
+
+        return self
+
+    def combine(self, count, moments):
+
+        """
+        combine(...) merges count and (mean, M2) pairs into the running moments
+        """
+
+        if (count == 0):
+            return
+
+        total = self.count + count
+        current = (self.clv_mean, self.clv_m2, self.delta_mean, self.delta_m2,
+                   self.cost_mean, self.cost_m2, self.frequency_mean, self.frequency_m2)
+        merged = []
+
+        for i in range(0, len(current), 2):
+            difference = moments[i] - current[i]
+            merged.append(current[i] + difference * count / total)
+            merged.append(current[i + 1] + moments[i + 1] + difference ** 2 * self.count * count / total)
+
+        (self.clv_mean, self.clv_m2, self.delta_mean, self.delta_m2,
+         self.cost_mean, self.cost_m2, self.frequency_mean, self.frequency_m2) = merged
+        self.count = total
+
+    def summary(self):
+
+        """
+        summary(...) returns the same dict as summarize_trajectories(...)
+        together with the sample variances of the averages' ingredients.
+        """
+
+        action_shares = self.action_counts / max(self.count, 1)
+        clv_before = np.concatenate(([self.state_values[self.initial_state]], self.clv_mean[:-1]))
+        degrees = max(self.count - 1, 1)
+
+        result_dict = dict()
+        result_dict["Simulations"] = self.count
+        result_dict["Action Shares"] = action_shares
+        result_dict["Average CLV"] = self.clv_mean.copy()
+        result_dict["Average CLV Change"] = self.clv_mean - clv_before
+        result_dict["Average Cost"] = action_shares @ self.action_costs
+        result_dict["Average Total Cost"] = self.cost_mean
+        result_dict["CLV Delta"] = self.delta_mean
+        result_dict["CLV Variance"] = self.clv_m2 / degrees
+        result_dict["CLV Delta Variance"] = self.delta_m2 / degrees
+        result_dict["Total Cost Variance"] = self.cost_m2 / degrees
+        result_dict["Action Frequency Variance"] = self.frequency_m2 / degrees
+
+        return result_dict
+
+    def half_widths(self, confidence=0.95):
+
+        """
+        half_widths(...) returns the half-widths of the normal confidence intervals
+        of the averages shown by the campaign planner, i.e. the average share of
+        every action over all periods and the average CLV change per period.
+
+        :param confidence: confidence level of the intervals
+
+        :return: dict with "Action Frequency" (A,) and "Average CLV Change"
+        """
+
+        # The standard library quantile spares the app the import of scipy.stats
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        degrees = max(self.count - 1, 1)
+        count = max(self.count, 1)
+
+        result_dict = dict()
+        result_dict["Action Frequency"] = z * np.sqrt(self.frequency_m2 / degrees / count)
+        # The average CLV change per period is the CLV delta spread over all periods
+        result_dict["Average CLV Change"] = z * np.sqrt(self.delta_m2 / degrees / count) / self.periods
+
+        return result_dict
+
+def simulate_campaign_statistics(transition, policy, initial_state, periods, simulations, state_values, action_costs, seed=None, chunk_size=100000, workers=1):
+
+    """
+    simulate_campaign_statistics(...) runs simulate_campaign(...) in chunks
+    and keeps only their statistics, such that memory depends on the chunk
+    size and not on the number of simulations. Every chunk draws from its own
+    random stream spawned from the seed and chunks are merged in their order,
+    hence the result for a given seed does not depend on the number of workers.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param policy: (S,) action category per state category
+    :param initial_state: initial state category
+    :param periods: number of decision periods
+    :param simulations: number of simulated customers
+    :param state_values: (S,) CLV of every state category
+    :param action_costs: (A,) cost of every action category
+    :param seed: seed or numpy SeedSequence for reproducible runs
+    :param chunk_size: number of customers simulated at once
+    :param workers: number of processes sharing the chunks
+
+    :return: CampaignStatistics
+    """
+
+    policy = np.asarray(policy, dtype=np.int64)
+    chunks = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed) if (not isinstance(seed, np.random.SeedSequence)) else seed
+    tasks = [(initial_state, periods, chunk, chunk_seed, state_values, action_costs) for chunk, chunk_seed in zip(chunks, seeds.spawn(len(chunks)))]
+
+    statistics = CampaignStatistics(initial_state, state_values, action_costs, periods)
+    lookup = cumulative_lookup(policy_transition_matrix(transition, policy))
+
+    if (workers <= 1 or len(tasks) <= 1):
+        for task in tasks:
+            statistics.merge(simulate_chunk_statistics(lookup, policy, *task))
+        return statistics
+
+    executor, blocks = start_workers(lookup, policy, min(workers, len(tasks)))
+
+    try:
+        for chunk_statistics in executor.map(simulate_worker_chunk, tasks):
+            statistics.merge(chunk_statistics)
+    finally:
+        stop_workers(executor, blocks)
+
+    return statistics
+
+def start_workers(lookup, policy, workers):
+
+    """
+    start_workers(...) starts the process pool of the campaign simulations.
+    The workers only follow the Markov chain of the policy, hence only its
+    lookup is placed in shared memory, once instead of being pickled for
+    every chunk, and not the transition model of all A actions.
+
+    :param lookup: dict from cumulative_lookup(...)
+    :param policy: (S,) action category per state category
+    :param workers: number of processes
+
+    :return executor: ProcessPoolExecutor whose workers run simulate_worker_chunk(...)
+    :return blocks: SharedMemory blocks, released by stop_workers(...)
+    """
+
+    descriptors, blocks = share_lookup(lookup)
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=attach_worker, initargs=(descriptors, np.asarray(policy, dtype=np.int64)))
+    except Exception:
+        release_blocks(blocks)
+        raise
+
+    return executor, blocks
+
+def stop_workers(executor, blocks):
+
+    """stop_workers(...) shuts the pool of start_workers(...) down and releases its shared memory"""
+
+    try:
+        executor.shutdown()
+    finally:
+        release_blocks(blocks)
+
+def release_blocks(blocks):
+
+    """release_blocks(...) closes and unlinks shared memory blocks"""
+
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+def simulate_chunk_statistics(lookup, policy, initial_state, periods, simulations, seed, state_values, action_costs):
+
+    """
+    simulate_chunk_statistics(...) simulates one chunk of customers
+    and returns its CampaignStatistics.
+    """
+
+    actions, states = simulate_chain(lookup, policy, initial_state, periods, simulations, seed)
+
+    return CampaignStatistics(initial_state, state_values, action_costs, periods).update(actions, states)
+
+def share_array(array):
+
+    """
+    share_array(...) copies an array into a new shared memory block.
+
+    :return descriptor: (name, shape, dtype) to attach to the block
+    :return block: SharedMemory, to be closed and unlinked by the owner
+    """
+
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+    return (block.name, array.shape, array.dtype.str), block
+
+def attach_array(descriptor):
+
+    """
+    attach_array(...) maps a block created by share_array(...) without copying it.
+
+    :return array: view on the shared memory
+    :return block: SharedMemory, to be kept open as long as the array is used
+    """
+
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf), block
+
+def share_lookup(lookup):
+
+    """
+    share_lookup(...) places the arrays of a lookup from cumulative_lookup(...) in shared memory.
+
+    :return descriptors: dict with the descriptor of every shared array
+    :return blocks: list of SharedMemory blocks
+    """
+
+    descriptors, blocks = dict(), []
+    for key, array in lookup.items():
+        descriptors[key], block = share_array(array)
+        blocks.append(block)
+
+    return descriptors, blocks
+
+# Per-process state of the pool workers, set once by attach_worker(...)
+worker_state = dict()
+
+def attach_worker(descriptors, policy):
+
+    """
+    attach_worker(...) initializes a pool worker: it maps the shared
+    lookup of the policy's Markov chain without copying it.
+    """
+
+    lookup, blocks = dict(), []
+    for key, descriptor in descriptors.items():
+        lookup[key], block = attach_array(descriptor)
+        blocks.append(block)
+
+    worker_state["Lookup"] = lookup
+    worker_state["Policy"] = policy
+    worker_state["Blocks"] = blocks
+
+def simulate_worker_chunk(task):
+
+    """
+    simulate_worker_chunk(...) runs simulate_chunk_statistics(...) inside a pool worker.
+    """
+
+    return simulate_chunk_statistics(worker_state["Lookup"], worker_state["Policy"], *task)
+
+def simulate_to_precision(transition, policy, initial_state, periods, state_values, action_costs, frequency_half_width, clv_half_width,
+                          confidence=0.95, batch_size=10000, max_simulations=None, time_budget=None, seed=None, chunk_size=2500, workers=1):
+
+    """
+    simulate_to_precision(...) simulates the campaign in batches until the
+    confidence intervals of the average action shares and of the average CLV
+    change are narrower than requested, the time budget is spent or the
+    maximum number of simulations is reached.
+
+    :param transition: (A,S,S) array or list of sparse matrices
+    :param policy: (S,) action category per state category
+    :param initial_state: initial state category
+    :param periods: number of decision periods
+    :param state_values: (S,) CLV of every state category
+    :param action_costs: (A,) cost of every action category
+    :param frequency_half_width: target half-width of every average action share
+    :param clv_half_width: target half-width of the average CLV change
+    :param confidence: confidence level of the intervals
+    :param batch_size: number of customers simulated between two checks
+    :param max_simulations: upper limit of simulated customers (None for no limit)
+    :param time_budget: upper limit of seconds spent simulating (None for no limit)
+    :param seed: seed or numpy SeedSequence for reproducible runs
+    :param chunk_size: number of customers simulated at once, a batch is spread over the workers in chunks
+    :param workers: number of processes sharing the chunks
+
+    :return statistics: CampaignStatistics
+    :return stop_reason: "Precision Reached", "Time Budget" or "Simulation Limit"
+    """
+
+    if (max_simulations is None and time_budget is None and (frequency_half_width <= 0 or clv_half_width <= 0)):
+        raise ValueError('Without positive precision targets a time budget or simulation limit is required.')
+
+    policy = np.asarray(policy, dtype=np.int64)
+    seeds = np.random.SeedSequence(seed) if (not isinstance(seed, np.random.SeedSequence)) else seed
+    statistics = CampaignStatistics(initial_state, state_values, action_costs, periods)
+
+    # As in simulate_campaign_statistics(...) every chunk has its own random stream,
+    # hence the result for a given seed does not depend on the number of workers
+    def batch_tasks(batch):
+        chunks = [min(chunk_size, batch - start) for start in range(0, batch, chunk_size)]
+        return [(initial_state, periods, chunk, chunk_seed, state_values, action_costs) for chunk, chunk_seed in zip(chunks, seeds.spawn(len(chunks)))]
+
+    lookup = cumulative_lookup(policy_transition_matrix(transition, policy))
+
+    if (workers <= 1):
+        simulate_batch = lambda batch: (simulate_chunk_statistics(lookup, policy, *task) for task in batch_tasks(batch))
+        return precision_loop(statistics, simulate_batch, frequency_half_width, clv_half_width, confidence, batch_size, max_simulations, time_budget)
+
+    # The pool lives as long as the loop instead of being started for every batch
+    executor, blocks = start_workers(lookup, policy, workers)
+    simulate_batch = lambda batch: executor.map(simulate_worker_chunk, batch_tasks(batch))
+
+    try:
+        return precision_loop(statistics, simulate_batch, frequency_half_width, clv_half_width, confidence, batch_size, max_simulations, time_budget)
+    finally:
+        stop_workers(executor, blocks)
+
+def precision_loop(statistics, simulate_batch, frequency_half_width, clv_half_width, confidence, batch_size, max_simulations, time_budget):
+
+    """
+    precision_loop(...) is the stopping rule of simulate_to_precision(...):
+    it merges the chunk statistics of simulate_batch(...) batch by batch
+    until one of the targets or limits is reached.
+
+    :return statistics: CampaignStatistics
+    :return stop_reason: "Precision Reached", "Time Budget" or "Simulation Limit"
+    """
+
+    start = time.perf_counter()
+
+    while (True):
+        batch = batch_size if (max_simulations is None) else min(batch_size, max_simulations - statistics.count)
+        for chunk_statistics in simulate_batch(batch):
+            statistics.merge(chunk_statistics)
+
+        # Two batches at least, such that the variance estimates are not taken from a single batch
+        if (statistics.count >= 2 * batch_size):
+            precision = statistics.half_widths(confidence)
+            if (precision["Action Frequency"].max() <= frequency_half_width and precision["Average CLV Change"] <= clv_half_width):
+                return statistics, "Precision Reached"
+
+        if (time_budget is not None and time.perf_counter() - start >= time_budget):
+            return statistics, "Time Budget"
+
+        if (max_simulations is not None and statistics.count >= max_simulations):
+            return statistics, "Simulation Limit"
@@ -0,0 +1,303 @@
+# Dependencies
+import hashlib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse_matrix
+
+# Columns of the long-format MDP frames (see mdp_rewards.csv & mdp_transitions.csv)
+TRIPLE_COLUMNS = ['state_category', 'action_category', 'follow_up_state_category']
+REWARD_COLUMN = 'Reward (state, action, follow_up_state)'
+PROBABILITY_COLUMN = 'Probability Triple'
+
+def tensor_shape(data):
+
+    """
+    tensor_shape(...) derives the number of actions and states
+    from the category columns of a long-format MDP frame.
+
+    :param data: Dataframe with (state_category, action_category, follow_up_state_category)
+
+    :return number_actions: Number Actions
+    :return number_states: Number States
+    """
+
+    number_actions = int(data['action_category'].max()) + 1
+    number_states = int(max(data['state_category'].max(), data['follow_up_state_category'].max())) + 1
+
+    return number_actions, number_states
+
+def triple_index(data, number_actions, number_states):
+
+    """
+    triple_index(...) encodes every (S,A,S') row of the frame as
+    its flat position inside an (A,S,S) array.
+
+    :param data: Dataframe with (state_category, action_category, follow_up_state_category)
+    :param number_actions: Number Actions
+    :param number_states: Number States
+
+    :return: array with one flat index per row
+    """
+
+    states = data['state_category'].to_numpy(dtype=np.int64)
+    actions = data['action_category'].to_numpy(dtype=np.int64)
+    follow_up_states = data['follow_up_state_category'].to_numpy(dtype=np.int64)
+
+    if (len(states) > 0):
+        if (min(states.min(), actions.min(), follow_up_states.min()) < 0):
+            raise ValueError('Category columns must not contain negative codes.')
+        if (actions.max() >= number_actions or max(states.max(), follow_up_states.max()) >= number_states):
+            raise ValueError('Category codes exceed the shape ({}, {}, {}).'.format(number_actions, number_states, number_states))
+
+    return (actions * number_states + states) * number_states + follow_up_states
+
+def unravel_triples(flat_index, number_actions, number_states):
+
+    """
+    unravel_triples(...) turns flat (A,S,S) positions back into
+    a dataframe of (S,A,S') categories.
+    """
+
+    actions, states, follow_up_states = np.unravel_index(flat_index, (number_actions, number_states, number_states))
+
+    return pd.DataFrame({TRIPLE_COLUMNS[0]: states, TRIPLE_COLUMNS[1]: actions, TRIPLE_COLUMNS[2]: follow_up_states})
+
+def scatter_triples(data, column, number_actions=None, number_states=None):
+
+    """
+    scatter_triples(...) writes one value column of a long-format frame
+    into a dense (A,S,S) array in a single pass over the rows. Triples
+    occurring more than once keep the value of their last row and
+    triples without any row stay zero; both are reported.
+
+    :param data: Dataframe with (state_category, action_category, follow_up_state_category)
+    :param column: Name of the value column
+    :param number_actions: Number Actions (derived from data if None)
+    :param number_states: Number States (derived from data if None)
+
+    :return tensor: (A,S,S) array
+    :return report: dict with "Duplicate Triples" and "Missing Triples" dataframes
+    """
+
+    if (number_actions is None or number_states is None):
+        number_actions, number_states = tensor_shape(data)
+
+    size = number_actions * number_states * number_states
+    flat_index = triple_index(data, number_actions, number_states)
+    values = data[column].to_numpy(dtype=float)
+
+    occurrences = np.bincount(flat_index, minlength=size)
+    tensor = np.zeros(size)
+
+    if (occurrences.max(initial=0) > 1):
+        # Keep the last row of every triple, as the old row-by-row loop did
+        last_row = np.full(size, -1, dtype=np.int64)
+        np.maximum.at(last_row, flat_index, np.arange(len(flat_index)))
+        filled = last_row >= 0
+        tensor[filled] = values[last_row[filled]]
+    else:
+        tensor[flat_index] = values
+
+    report = dict()
+    report["Duplicate Triples"] = unravel_triples(np.flatnonzero(occurrences > 1), number_actions, number_states)
+    report["Missing Triples"] = unravel_triples(np.flatnonzero(occurrences == 0), number_actions, number_states)
+
+    return tensor.reshape((number_actions, number_states, number_states)), report
+
+def build_reward_tensor(data, number_actions=None, number_states=None, sparse=False):
+
+    """
+    build_reward_tensor(...) transforms the dataframe of rewards
+    into an (A,S,S) array with the reward of every (S,A,S') triple.
+
+    :param data: Rewards Dataframe
+    :param number_actions: Number Actions (derived from data if None)
+    :param number_states: Number States (derived from data if None)
+    :param sparse: return a list of (S,S) CSR matrices instead of a dense array
+
+    :return reward_tensor: (A,S,S) array or list of CSR matrices
+    :return report: dict with "Duplicate Triples" and "Missing Triples" dataframes
+    """
+
+    if (sparse):
+        stacked, report = scatter_sparse_triples(data, REWARD_COLUMN, number_actions, number_states)
+        return split_actions(stacked), report
+
+    return scatter_triples(data, REWARD_COLUMN, number_actions, number_states)
+
+def build_transition_tensor(data, number_actions=None, number_states=None, normalize=True, tolerance=1e-8, sparse=False):
+
+    """
+    build_transition_tensor(...) transforms the dataframe of transition
+    probabilities into an (A,S,S) array. In the same pass every (S,A) row
+    is checked to be row-stochastic: rows which do not sum to one are
+    rescaled and rows without any probability mass are made absorbing,
+    such that the solvers always receive valid transition matrices.
+
+    :param data: Trans. Prob. Dataframe
+    :param number_actions: Number Actions (derived from data if None)
+    :param number_states: Number States (derived from data if None)
+    :param normalize: whether rows should be rescaled to sum up to one
+    :param tolerance: allowed deviation of a row sum from one
+    :param sparse: return a list of (S,S) CSR matrices instead of a dense array
+
+    :return transition_tensor: (A,S,S) array or list of CSR matrices
+    :return report: dict with "Duplicate Triples", "Missing Triples", "Rescaled Rows" and "Empty Rows"
+    """
+
+    if (sparse):
+        return build_sparse_transition_matrices(data, number_actions, number_states, normalize, tolerance)
+
+    transition_tensor, report = scatter_triples(data, PROBABILITY_COLUMN, number_actions, number_states)
+
+    if (transition_tensor.min(initial=0) < 0):
+        raise ValueError('Transition probabilities must not be negative.')
+
+    row_sums = transition_tensor.sum(axis=2)
+    empty = row_sums == 0
+    rescaled = ~empty & (np.abs(row_sums - 1) > tolerance)
+
+    number_states = transition_tensor.shape[1]
+    report["Rescaled Rows"] = unravel_rows(np.flatnonzero(rescaled), number_states)
+    report["Empty Rows"] = unravel_rows(np.flatnonzero(empty), number_states)
+
+    if (normalize):
+        scale = np.where(empty, 1, row_sums)
+        transition_tensor /= scale[:, :, None]
+
+        # Rows without observations keep the customer in his state
+        actions, states = np.nonzero(empty)
+        transition_tensor[actions, states, states] = 1.0
+
+    return transition_tensor, report
+
+def build_sparse_transition_matrices(data, number_actions=None, number_states=None, normalize=True, tolerance=1e-8):
+
+    """
+    build_sparse_transition_matrices(...) is the sparse counterpart of
+    build_transition_tensor(...). Only observed (S,A,S') triples are stored,
+    hence memory grows with the number of rows instead of A*S*S and large
+    segmentations fit into memory. Absent triples are not reported as missing.
+
+    :param data: Trans. Prob. Dataframe
+    :param number_actions: Number Actions (derived from data if None)
+    :param number_states: Number States (derived from data if None)
+    :param normalize: whether rows should be rescaled to sum up to one
+    :param tolerance: allowed deviation of a row sum from one
+
+    :return transition_matrices: list of (S,S) CSR matrices, one per action
+    :return report: dict with "Duplicate Triples", "Missing Triples", "Rescaled Rows" and "Empty Rows"
+    """
+
+    stacked, report = scatter_sparse_triples(data, PROBABILITY_COLUMN, number_actions, number_states)
+
+    if (stacked.nnz > 0 and stacked.data.min() < 0):
+        raise ValueError('Transition probabilities must not be negative.')
+
+    number_states = stacked.shape[1]
+    row_sums = np.asarray(stacked.sum(axis=1)).ravel()
+    empty = row_sums == 0
+    rescaled = ~empty & (np.abs(row_sums - 1) > tolerance)
+
+    report["Rescaled Rows"] = unravel_rows(np.flatnonzero(rescaled), number_states)
+    report["Empty Rows"] = unravel_rows(np.flatnonzero(empty), number_states)
+
+    if (normalize):
+        stacked = sparse_matrix.diags(1 / np.where(empty, 1, row_sums)) @ stacked
+
+        # Rows without observations keep the customer in his state
+        empty_rows = np.flatnonzero(empty)
+        absorbing = sparse_matrix.csr_matrix((np.ones(len(empty_rows)), (empty_rows, empty_rows % number_states)), shape=stacked.shape)
+        stacked = (stacked + absorbing).tocsr()
+
+    return split_actions(stacked), report
+
+def scatter_sparse_triples(data, column, number_actions=None, number_states=None):
+
+    """
+    scatter_sparse_triples(...) writes one value column of a long-format frame
+    into an (A*S,S) CSR matrix, where row a*S+s holds the (s,a) row. As in
+    scatter_triples(...) the last row of a duplicated triple wins.
+
+    :param data: Dataframe with (state_category, action_category, follow_up_state_category)
+    :param column: Name of the value column
+    :param number_actions: Number Actions (derived from data if None)
+    :param number_states: Number States (derived from data if None)
+
+    :return stacked: (A*S,S) CSR matrix
+    :return report: dict with "Duplicate Triples" and an empty "Missing Triples" dataframe
+    """
+
+    if (number_actions is None or number_states is None):
+        number_actions, number_states = tensor_shape(data)
+
+    flat_index = triple_index(data, number_actions, number_states)
+    values = data[column].to_numpy(dtype=float)
+
+    # Sorting groups duplicates, the stable order keeps the last row at the end of its group
+    order = np.argsort(flat_index, kind='stable')
+    flat_sorted = flat_index[order]
+    last = np.ones(len(flat_sorted), dtype=bool)
+    last[:-1] = flat_sorted[1:] != flat_sorted[:-1]
+
+    duplicated = ~last
+    duplicated_index = np.unique(flat_sorted[duplicated])
+
+    unique_index = flat_sorted[last]
+    rows, columns = np.divmod(unique_index, number_states)
+    stacked = sparse_matrix.csr_matrix((values[order][last], (rows, columns)), shape=(number_actions * number_states, number_states))
+    stacked.eliminate_zeros()
+
+    report = dict()
+    report["Duplicate Triples"] = unravel_triples(duplicated_index, number_actions, number_states)
+    report["Missing Triples"] = unravel_triples(np.array([], dtype=np.int64), number_actions, number_states)
+
+    return stacked, report
+
+def split_actions(stacked):
+
+    """
+    split_actions(...) cuts an (A*S,S) matrix into the list of
+    (S,S) matrices per action which mdptoolbox accepts.
+    """
+
+    number_states = stacked.shape[1]
+    number_actions = stacked.shape[0] // number_states
+
+    return [stacked[a * number_states:(a + 1) * number_states].tocsr() for a in range(number_actions)]
+
+def is_sparse(matrices):
+
+    """
+    is_sparse(...) tells whether the transition/reward
+    matrices are a list of sparse matrices.
+    """
+
+    return isinstance(matrices, (list, tuple)) and len(matrices) > 0 and sparse_matrix.issparse(matrices[0])
+
+def unravel_rows(flat_index, number_states):
+
+    """
+    unravel_rows(...) turns flat (A,S) row positions back into
+    a dataframe of (S,A) categories.
+    """
+
+    actions, states = np.divmod(flat_index, number_states)
+
+    return pd.DataFrame({TRIPLE_COLUMNS[0]: states, TRIPLE_COLUMNS[1]: actions})
+
+def frame_fingerprint(data, columns):
+
+    """
+    frame_fingerprint(...) hashes the content of the given columns,
+    such that identical inputs can be recognized across reruns.
+
+    :param data: Dataframe
+    :param columns: Columns to consider
+
+    :return: hex digest
+    """
+
+    row_hashes = pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
@@ -0,0 +1,714 @@
+# Dependencies
+import csv
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from model_dependencies import data_dependencies
+
+# Columns of the raw interaction log and of probabilities_mdp.csv
+TRANSITION_COLUMNS = ['state', 'action', 'follow_up_state']
+BLOCK_SIZE = 64 * 1024 * 1024
+PROBABILITY_COLUMNS = ["Triple", "Probability Triple", 'state', 'state_category', 'action', 'action_category', 'follow_up_state', 'follow_up_state_category']
+
+def factorize_labels(values):
+
+    """
+    factorize_labels(...) hashes the values once and casts only the
+    unique values to str, such that large int columns never have to be
+    converted row by row.
+
+    :param values: array-like of any dtype
+
+    :return codes: (N,) int64 array, position of each value in uniques
+    :return uniques: array of the unique values as str
+    """
+
+    # The default NaN sentinel (-1) is the only behaviour pandas 1.4 and later versions share
+    codes, uniques = pd.factorize(pd.Series(values), sort=False)
+    codes = codes.astype(np.int64)
+    uniques = [str(unique) for unique in uniques]
+
+    # Missing values become one more label, 'nan', as str(value) would give
+    missing = codes < 0
+    if (missing.any()):
+        codes[missing] = len(uniques)
+        uniques.append(str(np.nan))
+
+    return codes, np.asarray(uniques, dtype=object)
+
+def encode_labels(values, labels=None):
+
+    """
+    encode_labels(...) replaces every value by the position of its
+    label in the lexicographically sorted labels, i.e. the codes
+    astype('category').cat.codes assigns to str columns.
+
+    :param values: array-like of any dtype, compared by its str
+    :param labels: sorted labels to encode with (derived from values if None)
+
+    :return codes: (N,) int64 array
+    :return labels: sorted array of labels
+    """
+
+    codes, uniques = factorize_labels(values)
+
+    if (labels is None):
+        labels = np.unique(uniques)
+
+    return relabel(uniques, labels)[codes], labels
+
+def relabel(uniques, labels):
+
+    """
+    relabel(...) looks up the position of every str value in the sorted labels.
+
+    :param uniques: array of str
+    :param labels: sorted array of str
+
+    :return: int64 array of positions
+    """
+
+    labels = np.asarray(labels, dtype=object)
+    uniques = np.asarray(uniques, dtype=object)
+
+    # Sorting only the few unique labels is much faster than sorting all values
+    position = np.searchsorted(labels, uniques)
+    position = np.minimum(position, max(len(labels) - 1, 0))
+    if (len(uniques) > 0 and np.any(labels[position] != uniques)):
+        raise ValueError('Values {} are not part of the labels.'.format(list(uniques[labels[position] != uniques])))
+
+    return position.astype(np.int64)
+
+def encode_transitions(data, columns=TRANSITION_COLUMNS):
+
+    """
+    encode_transitions(...) encodes the (S,A,S') columns of an interaction
+    log as the categories of their str values. States and follow-up
+    states share one encoding over the union of both columns.
+
+    :param data: Dataframe with one row per observed transition
+    :param columns: names of the state, action and follow-up state columns
+
+    :return: dict with "States", "Actions", "Follow Up States" codes and "State Labels", "Action Labels"
+    """
+
+    state, action, follow_up_state = columns
+
+    state_codes, state_uniques = factorize_labels(data[state])
+    follow_up_state_codes, follow_up_state_uniques = factorize_labels(data[follow_up_state])
+    state_labels = np.unique(np.concatenate((state_uniques, follow_up_state_uniques)))
+
+    action_codes, action_labels = encode_labels(data[action])
+
+    result_dict = dict()
+    result_dict["States"] = relabel(state_uniques, state_labels)[state_codes]
+    result_dict["Actions"] = action_codes
+    result_dict["Follow Up States"] = relabel(follow_up_state_uniques, state_labels)[follow_up_state_codes]
+    result_dict["State Labels"] = state_labels
+    result_dict["Action Labels"] = action_labels
+
+    return result_dict
+
+def count_transitions(states, actions, follow_up_states, number_states):
+
+    """
+    count_transitions(...) counts how often every observed (S,A,S') triple
+    occurs, with one np.unique over the flat (A,S,S) index of the rows.
+    Triples which never occur are not materialized, hence memory grows with
+    the log and the observed triples instead of A*S*S.
+
+    :param states: (N,) state categories
+    :param actions: (N,) action categories
+    :param follow_up_states: (N,) follow-up state categories
+    :param number_states: Number States
+
+    :return triples: (K,) sorted flat (A,S,S) index of the observed triples
+    :return counts: (K,) int64 count of every observed triple
+    """
+
+    flat_index = (np.asarray(actions, dtype=np.int64) * number_states + states) * number_states + follow_up_states
+    triples, counts = np.unique(flat_index, return_counts=True)
+
+    return triples, counts.astype(np.int64)
+
+def normalize_triples(triples, counts, number_states):
+
+    """
+    normalize_triples(...) is normalize_counts(...) on the observed triples
+    of count_transitions(...): every count is divided by the count of its
+    (S,A) tuple.
+
+    :param triples: (K,) sorted flat (A,S,S) index of the observed triples
+    :param counts: (K,) counts of the triples
+    :param number_states: Number States
+
+    :return: (K,) transition probabilities
+    """
+
+    # The flat index without the follow-up state is the (A,S) tuple, sorted as well
+    tuples, inverse = np.unique(np.asarray(triples) // number_states, return_inverse=True)
+    tuple_counts = np.bincount(inverse.ravel(), weights=counts, minlength=len(tuples))
+
+    return np.asarray(counts, dtype=float) / tuple_counts[inverse.ravel()]
+
+def normalize_counts(counts):
+
+    """
+    normalize_counts(...) divides the count of every (S,A,S') triple by the
+    count of its (S,A) tuple. Tuples which never occurred get probability 0.
+
+    :param counts: (A,S,S) array of counts
+
+    :return: (A,S,S) array of transition probabilities
+    """
+
+    counts = np.asarray(counts, dtype=float)
+    tuple_counts = counts.sum(axis=2, keepdims=True)
+
+    return np.divide(counts, tuple_counts, out=np.zeros_like(counts), where=tuple_counts > 0)
+
+def probability_frame(probabilities, state_labels, action_labels):
+
+    """
+    probability_frame(...) lists every (S,A,S') triple with its probability
+    in the shape of probabilities_mdp.csv, sorted by the categories.
+
+    :param probabilities: (A,S,S) array of transition probabilities
+    :param state_labels: sorted state labels, label i has category i
+    :param action_labels: sorted action labels, label i has category i
+
+    :return: Dataframe with PROBABILITY_COLUMNS
+    """
+
+    number_actions, number_states, _ = probabilities.shape
+
+    # Rows are ordered by (state, action, follow-up state)
+    states, actions, follow_up_states = np.unravel_index(np.arange(number_states * number_actions * number_states), (number_states, number_actions, number_states))
+
+    return triple_frame(states, actions, follow_up_states, probabilities.transpose((1, 0, 2)).ravel(), state_labels, action_labels)
+
+def observed_probability_frame(triples, probabilities, state_labels, action_labels):
+
+    """
+    observed_probability_frame(...) is probability_frame(...) restricted to
+    the observed triples, such that large state spaces never build the full
+    grid. Triples which are not listed have probability 0, which is what the
+    sparse tensor builders of tensor_dependencies assume.
+
+    :param triples: (K,) flat (A,S,S) index of the observed triples
+    :param probabilities: (K,) transition probabilities
+    :param state_labels: sorted state labels, label i has category i
+    :param action_labels: sorted action labels, label i has category i
+
+    :return: Dataframe with PROBABILITY_COLUMNS
+    """
+
+    number_states = len(state_labels)
+    actions, states, follow_up_states = np.unravel_index(np.asarray(triples, dtype=np.int64), (len(action_labels), number_states, number_states))
+
+    # Same row order as probability_frame(...)
+    order = np.lexsort((follow_up_states, actions, states))
+
+    return triple_frame(states[order], actions[order], follow_up_states[order], np.asarray(probabilities)[order], state_labels, action_labels)
+
+def triple_frame(states, actions, follow_up_states, probabilities, state_labels, action_labels):
+
+    """
+    triple_frame(...) lays (S,A,S') categories and their probabilities
+    out in the columns of probabilities_mdp.csv.
+
+    :return: Dataframe with PROBABILITY_COLUMNS
+    """
+
+    state_labels = np.asarray(state_labels, dtype=object)
+    action_labels = np.asarray(action_labels, dtype=object)
+
+    final_probabilities = pd.DataFrame({
+        "Triple": list(zip(states.tolist(), actions.tolist(), follow_up_states.tolist())),
+        "Probability Triple": probabilities,
+        'state': state_labels[states],
+        'state_category': states,
+        'action': action_labels[actions],
+        'action_category': actions,
+        'follow_up_state': state_labels[follow_up_states],
+        'follow_up_state_category': follow_up_states
+    })
+
+    return final_probabilities
+
+def estimate_transition_probabilities(data, columns=TRANSITION_COLUMNS, full_grid=True):
+
+    """
+    estimate_transition_probabilities(...) estimates the transition
+    probabilities of an interaction log: the number of occurrences of
+    every (S,A,S') triple divided by the number of occurrences of its
+    (S,A) tuple. Only the observed triples are counted; the full grid of
+    states and actions is built at the end, for the page and its csv.
+
+    :param data: Dataframe with one row per observed transition
+    :param columns: names of the state, action and follow-up state columns
+    :param full_grid: whether unobserved triples are listed with probability 0
+
+    :return: Dataframe in the shape of probabilities_mdp.csv
+    """
+
+    encoded = encode_transitions(data, columns)
+    state_labels, action_labels = encoded.get("State Labels"), encoded.get("Action Labels")
+    number_states, number_actions = len(state_labels), len(action_labels)
+
+    triples, counts = count_transitions(encoded.get("States"), encoded.get("Actions"), encoded.get("Follow Up States"), number_states)
+    probabilities = normalize_triples(triples, counts, number_states)
+
+    if (not full_grid):
+        return observed_probability_frame(triples, probabilities, state_labels, action_labels)
+
+    grid = np.zeros(number_actions * number_states * number_states)
+    grid[triples] = probabilities
+
+    return probability_frame(grid.reshape((number_actions, number_states, number_states)), state_labels, action_labels)
+
+def empty_counts():
+
+    """
+    empty_counts() starts the partial counts of a streamed log. Labels
+    are numbered in order of appearance, such that new states and actions
+    only append to the dictionaries and never move existing counts.
+
+    :return: dict with "Counts", "State Labels", "Action Labels", "Offset" and "Source",
+             the data_dependencies.source_signature(...) of the file the offset belongs to
+    """
+
+    result_dict = dict()
+    result_dict["Counts"] = np.zeros((0, 0, 0), dtype=np.int64)
+    result_dict["State Labels"] = dict()
+    result_dict["Action Labels"] = dict()
+    result_dict["Offset"] = 0
+    result_dict["Source"] = None
+
+    return result_dict
+
+def grow_labels(label_dict, uniques):
+
+    """
+    grow_labels(...) appends unseen labels to the dictionary.
+
+    :param label_dict: dict of label -> index, updated in place
+    :param uniques: array of str labels
+
+    :return: int64 array with the index of every label in uniques
+    """
+
+    for unique in uniques:
+        if (unique not in label_dict):
+            label_dict[unique] = len(label_dict)
+
+    return np.asarray([label_dict[unique] for unique in uniques], dtype=np.int64)
+
+def add_transitions(partial_counts, data, columns=TRANSITION_COLUMNS):
+
+    """
+    add_transitions(...) adds the (S,A,S') triples of a chunk to the
+    partial counts. The count array is padded with zeros whenever the
+    chunk introduces new states or actions.
+
+    :param partial_counts: dict from empty_counts(), updated in place
+    :param data: Dataframe chunk with one row per observed transition
+    :param columns: names of the state, action and follow-up state columns
+
+    :return: partial_counts
+    """
+
+    state, action, follow_up_state = columns
+
+    state_codes, state_uniques = factorize_labels(data[state])
+    action_codes, action_uniques = factorize_labels(data[action])
+    follow_up_state_codes, follow_up_state_uniques = factorize_labels(data[follow_up_state])
+
+    states = grow_labels(partial_counts["State Labels"], state_uniques)[state_codes]
+    actions = grow_labels(partial_counts["Action Labels"], action_uniques)[action_codes]
+    follow_up_states = grow_labels(partial_counts["State Labels"], follow_up_state_uniques)[follow_up_state_codes]
+
+    number_states = len(partial_counts["State Labels"])
+    number_actions = len(partial_counts["Action Labels"])
+
+    counts = partial_counts["Counts"]
+    if (counts.shape != (number_actions, number_states, number_states)):
+        counts = np.pad(counts, [(0, number_actions - counts.shape[0]), (0, number_states - counts.shape[1]), (0, number_states - counts.shape[2])])
+
+    # The partial counts are an (A,S,S) array, the chunk only adds to its observed triples
+    triples, chunk_counts = count_transitions(states, actions, follow_up_states, number_states)
+    counts[np.unravel_index(triples, counts.shape)] += chunk_counts
+    partial_counts["Counts"] = counts
+
+    return partial_counts
+
+def sorted_counts(partial_counts):
+
+    """
+    sorted_counts(...) reorders the partial counts from order of appearance
+    to the sorted labels, i.e. to the categories encode_transitions(...)
+    assigns to the full log.
+
+    :param partial_counts: dict from empty_counts()
+
+    :return: dict with "Counts", "State Labels", "Action Labels"
+    """
+
+    state_labels = np.asarray(list(partial_counts["State Labels"]), dtype=object)
+    action_labels = np.asarray(list(partial_counts["Action Labels"]), dtype=object)
+
+    state_order = np.argsort(state_labels, kind='stable')
+    action_order = np.argsort(action_labels, kind='stable')
+
+    result_dict = dict()
+    result_dict["Counts"] = partial_counts["Counts"][np.ix_(action_order, state_order, state_order)]
+    result_dict["State Labels"] = state_labels[state_order]
+    result_dict["Action Labels"] = action_labels[action_order]
+
+    return result_dict
+
+def save_counts(partial_counts, path):
+
+    """
+    save_counts(...) writes the partial counts to an .npz file, such that
+    an interrupted stream can be resumed with load_counts(...).
+
+    :param partial_counts: dict from empty_counts()
+    :param path: path of the .npz file
+    """
+
+    # Write to a temporary file first such that an interruption never leaves a broken checkpoint
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        write_counts(partial_counts, file)
+
+    os.replace(temporary_path, path)
+
+def write_counts(partial_counts, file):
+
+    """
+    write_counts(...) writes the partial counts as .npz to a file object.
+
+    :param partial_counts: dict from empty_counts()
+    :param file: writable binary file object
+    """
+
+    np.savez(file,
+        counts=partial_counts["Counts"],
+        state_labels=np.asarray(list(partial_counts["State Labels"]), dtype=str),
+        action_labels=np.asarray(list(partial_counts["Action Labels"]), dtype=str),
+        offset=partial_counts["Offset"],
+        source=np.asarray(json.dumps(partial_counts.get("Source"))))
+
+def load_counts(path):
+
+    """
+    load_counts(...) reads partial counts written by save_counts(...).
+
+    :param path: path or file object of the .npz file
+
+    :return: dict in the shape of empty_counts()
+    """
+
+    with np.load(path, allow_pickle=False) as saved:
+        result_dict = dict()
+        result_dict["Counts"] = saved["counts"]
+        result_dict["State Labels"] = {label: index for index, label in enumerate(saved["state_labels"].tolist())}
+        result_dict["Action Labels"] = {label: index for index, label in enumerate(saved["action_labels"].tolist())}
+        result_dict["Offset"] = int(saved["offset"])
+        # Counts saved before the source was recorded cannot be matched to a file
+        result_dict["Source"] = json.loads(str(saved["source"])) if ("source" in saved.files) else None
+
+    return result_dict
+
+def read_header(path):
+
+    """
+    read_header(...) reads the column names of a csv log.
+
+    :param path: path of the csv file
+
+    :return names: list of column names
+    :return offset: byte offset of the first data row
+    """
+
+    with open(path, 'rb') as file:
+        header = file.readline()
+
+    return next(csv.reader([header.decode('utf-8')])), len(header)
+
+def read_blocks(path, names, columns, start, block_size=BLOCK_SIZE, end=None):
+
+    """
+    read_blocks(...) reads the csv from a byte offset in blocks of about
+    block_size bytes. Every block is extended to the end of its last line,
+    such that no row is split between two blocks. Values are parsed as
+    str, so every block yields the same labels whatever it contains.
+
+    :param path: path of the csv file
+    :param names: column names from read_header(...)
+    :param columns: columns to parse
+    :param start: byte offset of a line start
+    :param block_size: bytes read per block
+    :param end: stop after the line containing this offset (end of file if None)
+
+    :return: generator of (Dataframe, byte offset after the block)
+    """
+
+    with open(path, 'rb') as file:
+        file.seek(start)
+        position = start
+
+        while (end is None or position < end):
+            size = block_size if (end is None) else min(block_size, end - position)
+            block = file.read(size)
+            if (not block):
+                break
+            if (not block.endswith(b'\n')):
+                block += file.readline()
+
+            position = file.tell()
+            data = pd.read_csv(io.BytesIO(block), header=None, names=names, usecols=columns, dtype=str)
+            yield data, position
+
+def stream_transition_counts(path, columns=TRANSITION_COLUMNS, block_size=BLOCK_SIZE, partial_counts=None, checkpoint=None):
+
+    """
+    stream_transition_counts(...) counts the (S,A,S') triples of a csv log
+    block by block. Memory depends on the number of states and actions,
+    not on the size of the log.
+
+    :param path: path of the csv file
+    :param columns: names of the state, action and follow-up state columns
+    :param block_size: bytes read per block
+    :param partial_counts: counts to resume from, e.g. from load_counts(...)
+    :param checkpoint: path of an .npz file the counts are saved to after every block
+
+    :return: dict in the shape of empty_counts()
+    """
+
+    names, header_offset = read_header(path)
+    source = data_dependencies.source_signature(path)
+
+    if (partial_counts is None):
+        partial_counts = empty_counts()
+
+    # Resuming at a byte offset is only sound in the very file version the offset was taken in
+    if (partial_counts["Offset"] > 0 and partial_counts.get("Source") != source):
+        raise ValueError('The partial counts stopped at byte {} of {}, not of {} as it is now. Remove the checkpoint to count from the start.'.format(
+            partial_counts["Offset"], (partial_counts.get("Source") or dict()).get("Path", 'an unrecorded file'), source["Path"]))
+
+    partial_counts["Offset"] = max(partial_counts["Offset"], header_offset)
+    partial_counts["Source"] = source
+
+    for data, offset in read_blocks(path, names, list(columns), partial_counts["Offset"], block_size):
+        add_transitions(partial_counts, data, columns)
+        partial_counts["Offset"] = offset
+
+        if (checkpoint is not None):
+            save_counts(partial_counts, checkpoint)
+
+    return partial_counts
+
+def estimate_transition_probabilities_from_file(path, columns=TRANSITION_COLUMNS, block_size=BLOCK_SIZE, checkpoint=None, workers=1):
+
+    """
+    estimate_transition_probabilities_from_file(...) is the streaming
+    counterpart of estimate_transition_probabilities(...) for logs which
+    do not fit into memory. If the checkpoint exists, counting resumes
+    where it stopped, provided it was taken in the same version of the
+    file. With more than one worker the file is counted in parallel
+    shards instead, which cannot be checkpointed.
+
+    :param path: path of the csv file
+    :param columns: names of the state, action and follow-up state columns
+    :param block_size: bytes read per block
+    :param checkpoint: path of an .npz file for the partial counts
+    :param workers: number of processes counting byte ranges of the file
+
+    :return: Dataframe in the shape of probabilities_mdp.csv
+    """
+
+    if (workers > 1 and checkpoint is not None):
+        raise ValueError('Parallel counting cannot be checkpointed, use either workers or a checkpoint.')
+
+    if (workers > 1):
+        return counts_to_probabilities(parallel_transition_counts(path, columns, workers, block_size))
+
+    partial_counts = None
+    if (checkpoint is not None and os.path.exists(checkpoint)):
+        partial_counts = load_counts(checkpoint)
+
+    partial_counts = stream_transition_counts(path, columns, block_size, partial_counts, checkpoint)
+
+    return counts_to_probabilities(partial_counts)
+
+def counts_to_probabilities(partial_counts):
+
+    """
+    counts_to_probabilities(...) normalizes partial counts into the
+    probabilities_mdp.csv frame.
+
+    :param partial_counts: dict from empty_counts()
+
+    :return: Dataframe in the shape of probabilities_mdp.csv
+    """
+
+    result = sorted_counts(partial_counts)
+
+    return probability_frame(normalize_counts(result.get("Counts")), result.get("State Labels"), result.get("Action Labels"))
+
+def update_transition_counts(partial_counts, data, columns=TRANSITION_COLUMNS, decay=1.0):
+
+    """
+    update_transition_counts(...) adds a new batch of interactions to
+    saved counts without rereading the history. With decay < 1 the
+    existing counts are weighted down before the batch is added, such that
+    a batch observed k updates ago weighs decay^k and recent behaviour
+    dominates the probabilities. Decayed counts are kept as floats.
+
+    :param partial_counts: dict from empty_counts() or load_counts(...), updated in place
+    :param data: Dataframe with one row per observed transition of the new batch
+    :param columns: names of the state, action and follow-up state columns
+    :param decay: weight of the existing counts, in (0, 1]
+
+    :return: partial_counts
+    """
+
+    if (not 0 < decay <= 1):
+        raise ValueError('The decay factor has to be in (0, 1], got {}.'.format(decay))
+
+    if (decay < 1):
+        partial_counts["Counts"] = partial_counts["Counts"].astype(float) * decay
+
+    return add_transitions(partial_counts, data, columns)
+
+def counts_to_bytes(partial_counts):
+
+    """
+    counts_to_bytes(...) serializes partial counts in the .npz format of
+    save_counts(...), e.g. for a download button.
+
+    :param partial_counts: dict from empty_counts()
+
+    :return: bytes
+    """
+
+    buffer = io.BytesIO()
+    write_counts(partial_counts, buffer)
+
+    return buffer.getvalue()
+
+def shard_offsets(path, shards):
+
+    """
+    shard_offsets(...) splits the data rows of a csv file into byte ranges
+    of about equal size. Every boundary is moved to the next line start.
+
+    :param path: path of the csv file
+    :param shards: number of byte ranges
+
+    :return: list of (start, end) byte offsets
+    """
+
+    _, header_offset = read_header(path)
+    size = os.path.getsize(path)
+
+    boundaries = [header_offset]
+    with open(path, 'rb') as file:
+        for shard in range(1, shards):
+            file.seek(max(header_offset + (size - header_offset) * shard // shards - 1, boundaries[-1]))
+            file.readline()
+            boundaries.append(max(file.tell(), boundaries[-1]))
+    boundaries.append(size)
+
+    return [(start, end) for start, end in zip(boundaries[:-1], boundaries[1:]) if (start < end)]
+
+def count_shard(task):
+
+    """
+    count_shard(...) counts the (S,A,S') triples of one byte range. Module
+    level such that it can be sent to the worker processes.
+
+    :param task: (path, names, columns, start, end, block_size)
+
+    :return: dict in the shape of empty_counts()
+    """
+
+    path, names, columns, start, end, block_size = task
+    partial_counts = empty_counts()
+
+    for data, offset in read_blocks(path, names, list(columns), start, block_size, end):
+        add_transitions(partial_counts, data, columns)
+        partial_counts["Offset"] = offset
+
+    return partial_counts
+
+def merge_counts(partial_counts, other):
+
+    """
+    merge_counts(...) adds the counts of another shard. The labels of the
+    other shard are translated into the encoding of partial_counts, which
+    grows by the labels it has not seen yet.
+
+    :param partial_counts: dict from empty_counts(), updated in place
+    :param other: dict from empty_counts()
+
+    :return: partial_counts
+    """
+
+    states = grow_labels(partial_counts["State Labels"], list(other["State Labels"]))
+    actions = grow_labels(partial_counts["Action Labels"], list(other["Action Labels"]))
+
+    number_states = len(partial_counts["State Labels"])
+    number_actions = len(partial_counts["Action Labels"])
+
+    counts = partial_counts["Counts"]
+    if (counts.shape != (number_actions, number_states, number_states)):
+        counts = np.pad(counts, [(0, number_actions - counts.shape[0]), (0, number_states - counts.shape[1]), (0, number_states - counts.shape[2])])
+
+    # Labels are unique within a shard, hence the fancy index never hits a cell twice
+    counts = counts.astype(np.result_type(counts, other["Counts"]), copy=False)
+    counts[np.ix_(actions, states, states)] += other["Counts"]
+
+    partial_counts["Counts"] = counts
+    partial_counts["Offset"] = max(partial_counts["Offset"], other["Offset"])
+
+    return partial_counts
+
+def parallel_transition_counts(path, columns=TRANSITION_COLUMNS, workers=None, block_size=BLOCK_SIZE):
+
+    """
+    parallel_transition_counts(...) counts the (S,A,S') triples of a csv
+    log in one byte range per process and reduces the shard counts in
+    file order, such that the labels are numbered as in
+    stream_transition_counts(...).
+
+    :param path: path of the csv file
+    :param columns: names of the state, action and follow-up state columns
+    :param workers: number of processes (all cores if None)
+    :param block_size: bytes read per block within a shard
+
+    :return: dict in the shape of empty_counts()
+    """
+
+    workers = workers or os.cpu_count() or 1
+    names, _ = read_header(path)
+    tasks = [(path, names, list(columns), start, end, block_size) for start, end in shard_offsets(path, workers)]
+
+    partial_counts = empty_counts()
+    partial_counts["Source"] = data_dependencies.source_signature(path)
+
+    if (workers <= 1 or len(tasks) <= 1):
+        for task in tasks:
+            merge_counts(partial_counts, count_shard(task))
+        return partial_counts
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        for shard_counts in executor.map(count_shard, tasks):
+            merge_counts(partial_counts, shard_counts)
+
+    return partial_counts
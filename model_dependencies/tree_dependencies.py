@@ -0,0 +1,386 @@
+# Dependencies
+import io
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Columns the segmented frame gets: the leaf a customer falls into and the class of that leaf
+SEGMENT_COLUMN = 'segment'
+PREDICTION_COLUMN = 'predicted_{}'
+
+# Streamed segmentations number the customers by their row in the input file
+ROW_COLUMN = 'row'
+CHUNK_ROWS = 1000000
+
+# Node id sklearn uses for the missing children of a leaf
+LEAF = -1
+
+def compile_tree(clf, feature_names, target=None):
+
+    """
+    compile_tree(...) copies the arrays of a fitted DecisionTreeClassifier
+    which are needed to classify customers, such that segments can be
+    assigned with NumPy only and the tree can be stored without sklearn.
+
+    :param clf: fitted DecisionTreeClassifier with a single output
+    :param feature_names: names of the columns the tree was fitted on
+    :param target: name of the target column
+
+    :return: dict with "Feature", "Threshold", "Children Left", "Children Right", "Missing Left",
+             "Value", "Leaf Class", "Classes", "Feature Names", "Target" and "Depth"
+    """
+
+    tree_ = clf.tree_
+
+    if (tree_.n_outputs != 1):
+        raise ValueError('Only trees with a single target can be compiled, but this one has {} targets.'.format(tree_.n_outputs))
+
+    value = np.asarray(tree_.value[:, 0, :], dtype=float)
+    classes = np.asarray(clf.classes_)
+    if (classes.dtype == object):
+        classes = classes.astype(str)
+
+    # Trees fitted with missing values (sklearn >= 1.3) know where NaN goes, older ones reject NaN
+    missing_left = getattr(tree_, 'missing_go_to_left', None)
+
+    result_dict = dict()
+    result_dict["Feature"] = np.asarray(tree_.feature, dtype=np.int64)
+    result_dict["Threshold"] = np.asarray(tree_.threshold, dtype=float)
+    result_dict["Children Left"] = np.asarray(tree_.children_left, dtype=np.int64)
+    result_dict["Children Right"] = np.asarray(tree_.children_right, dtype=np.int64)
+    result_dict["Missing Left"] = None if (missing_left is None) else np.asarray(missing_left, dtype=bool)
+    result_dict["Value"] = value
+    result_dict["Leaf Class"] = np.argmax(value, axis=1)
+    result_dict["Classes"] = classes
+    result_dict["Feature Names"] = np.asarray([str(name) for name in feature_names], dtype=str)
+    result_dict["Target"] = None if (target is None) else str(target)
+    result_dict["Depth"] = int(tree_.max_depth)
+
+    return result_dict
+
+def assign_leaves(compiled, X):
+
+    """
+    assign_leaves(...) sends all customers down the tree at once. Every
+    step moves each customer which is still on a split node one level
+    down, hence the loop runs at most depth times, whatever the number
+    of customers. Like sklearn, the features are compared as float32.
+
+    :param compiled: dict from compile_tree(...)
+    :param X: (N,F) features in the order of "Feature Names"
+
+    :return: (N,) id of the leaf node of every customer
+    """
+
+    X = np.asarray(X, dtype=np.float32)
+
+    feature = compiled["Feature"]
+    threshold = compiled["Threshold"]
+    children_left = compiled["Children Left"]
+    children_right = compiled["Children Right"]
+    missing_left = compiled["Missing Left"]
+
+    if (missing_left is None and np.isnan(X).any()):
+        raise ValueError('The features contain NaN, which this tree was not fitted to handle.')
+
+    nodes = np.zeros(len(X), dtype=np.int64)
+    rows = np.arange(len(X))
+
+    for _ in range(compiled["Depth"]):
+        # Customers which reached a leaf drop out, such that later levels touch fewer rows
+        rows = rows[children_left[nodes[rows]] != LEAF]
+        if (len(rows) == 0):
+            break
+
+        current = nodes[rows]
+        values = X[rows, feature[current]]
+        go_left = values <= threshold[current]
+
+        if (missing_left is not None):
+            missing = np.isnan(values)
+            go_left[missing] = missing_left[current[missing]]
+
+        nodes[rows] = np.where(go_left, children_left[current], children_right[current])
+
+    return nodes
+
+def predict_classes(compiled, leaves):
+
+    """predict_classes(...) returns the class of the leaf of every customer, as clf.predict(...) would"""
+
+    return compiled["Classes"][compiled["Leaf Class"][leaves]]
+
+def segment_frame(data, compiled):
+
+    """
+    segment_frame(...) assigns every customer of a frame to its segment,
+    i.e. the leaf of the tree, and to the class of that leaf.
+
+    :param data: Dataframe holding the columns in "Feature Names"
+    :param compiled: dict from compile_tree(...) or load_tree(...)
+
+    :return: copy of data with SEGMENT_COLUMN and the predicted class
+    """
+
+    features = list(compiled["Feature Names"])
+
+    missing_columns = [name for name in features if (name not in data.columns)]
+    if (len(missing_columns) > 0):
+        raise ValueError('The tree needs the columns {}, which the data does not have.'.format(missing_columns))
+
+    leaves = assign_leaves(compiled, data[features].to_numpy(dtype=np.float32))
+
+    segmented = data.copy()
+    segmented[SEGMENT_COLUMN] = leaves
+    segmented[PREDICTION_COLUMN.format(compiled["Target"] or 'class')] = predict_classes(compiled, leaves)
+
+    return segmented
+
+def segment_summary(compiled):
+
+    """
+    segment_summary(...) describes every leaf of the tree as a segment.
+
+    :param compiled: dict from compile_tree(...)
+
+    :return: Dataframe with the segment, its class and its share of the training data
+    """
+
+    leaves = np.flatnonzero(compiled["Children Left"] == LEAF)
+    value = compiled["Value"][leaves]
+
+    summary = pd.DataFrame({
+        SEGMENT_COLUMN: leaves,
+        'class': compiled["Classes"][compiled["Leaf Class"][leaves]],
+        'purity': value.max(axis=1) / value.sum(axis=1),
+    })
+
+    return summary
+
+def write_tree(compiled, file):
+
+    """
+    write_tree(...) writes a compiled tree as .npz to a file object. It
+    only holds plain arrays, hence it loads without sklearn or pickle.
+
+    :param compiled: dict from compile_tree(...)
+    :param file: writable binary file object
+    """
+
+    arrays = dict(
+        feature=compiled["Feature"],
+        threshold=compiled["Threshold"],
+        children_left=compiled["Children Left"],
+        children_right=compiled["Children Right"],
+        value=compiled["Value"],
+        leaf_class=compiled["Leaf Class"],
+        classes=compiled["Classes"],
+        feature_names=compiled["Feature Names"],
+        depth=compiled["Depth"])
+
+    if (compiled["Missing Left"] is not None):
+        arrays["missing_left"] = compiled["Missing Left"]
+    if (compiled["Target"] is not None):
+        arrays["target"] = np.asarray(compiled["Target"], dtype=str)
+
+    np.savez_compressed(file, **arrays)
+
+def save_tree(compiled, path):
+
+    """
+    save_tree(...) writes a compiled tree to an .npz file.
+
+    :param compiled: dict from compile_tree(...)
+    :param path: path of the .npz file
+    """
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        write_tree(compiled, file)
+
+    os.replace(temporary_path, path)
+
+def tree_to_bytes(compiled):
+
+    """
+    tree_to_bytes(...) serializes a compiled tree in the .npz format of
+    save_tree(...), e.g. for a download button.
+
+    :param compiled: dict from compile_tree(...)
+
+    :return: bytes
+    """
+
+    buffer = io.BytesIO()
+    write_tree(compiled, buffer)
+
+    return buffer.getvalue()
+
+def load_tree(path):
+
+    """
+    load_tree(...) reads a tree written by save_tree(...) or tree_to_bytes(...).
+
+    :param path: path or file object of the .npz file
+
+    :return: dict in the shape of compile_tree(...)
+    """
+
+    with np.load(path, allow_pickle=False) as saved:
+        result_dict = dict()
+        result_dict["Feature"] = saved["feature"]
+        result_dict["Threshold"] = saved["threshold"]
+        result_dict["Children Left"] = saved["children_left"]
+        result_dict["Children Right"] = saved["children_right"]
+        result_dict["Missing Left"] = saved["missing_left"] if ("missing_left" in saved.files) else None
+        result_dict["Value"] = saved["value"]
+        result_dict["Leaf Class"] = saved["leaf_class"]
+        result_dict["Classes"] = saved["classes"]
+        result_dict["Feature Names"] = saved["feature_names"]
+        result_dict["Target"] = str(saved["target"]) if ("target" in saved.files) else None
+        result_dict["Depth"] = int(saved["depth"])
+
+    return result_dict
+
+def empty_segment_statistics(compiled, columns):
+
+    """
+    empty_segment_statistics(...) creates the running sums from which
+    stream_segments(...) reports the customers of every segment.
+
+    :param compiled: dict from compile_tree(...)
+    :param columns: numeric columns summarized per segment, e.g. Recency, Frequency, Monetary
+
+    :return: dict with "Columns", "Customers" (nodes,), "Count", "Sum", "Squares", "Minimum" and "Maximum" (nodes, columns)
+    """
+
+    shape = (len(compiled["Feature"]), len(columns))
+
+    result_dict = dict()
+    result_dict["Columns"] = list(columns)
+    result_dict["Customers"] = np.zeros(shape[0], dtype=np.int64)
+    result_dict["Count"] = np.zeros(shape, dtype=np.int64)
+    result_dict["Sum"] = np.zeros(shape)
+    result_dict["Squares"] = np.zeros(shape)
+    result_dict["Minimum"] = np.full(shape, np.inf)
+    result_dict["Maximum"] = np.full(shape, -np.inf)
+
+    return result_dict
+
+def add_segment_statistics(statistics, leaves, values):
+
+    """
+    add_segment_statistics(...) adds the customers of one chunk to the
+    running sums, with one bincount per column. NaN is left out.
+
+    :param statistics: dict from empty_segment_statistics(...)
+    :param leaves: (N,) leaf of every customer of the chunk
+    :param values: (N,C) values of the summarized columns
+    """
+
+    number_nodes = len(statistics["Customers"])
+    statistics["Customers"] += np.bincount(leaves, minlength=number_nodes)
+
+    for column in range(values.shape[1]):
+        value = values[:, column]
+        present = ~np.isnan(value)
+        leaf, value = leaves[present], value[present]
+
+        statistics["Count"][:, column] += np.bincount(leaf, minlength=number_nodes)
+        statistics["Sum"][:, column] += np.bincount(leaf, weights=value, minlength=number_nodes)
+        statistics["Squares"][:, column] += np.bincount(leaf, weights=value * value, minlength=number_nodes)
+        np.minimum.at(statistics["Minimum"][:, column], leaf, value)
+        np.maximum.at(statistics["Maximum"][:, column], leaf, value)
+
+def statistics_frame(compiled, statistics):
+
+    """
+    statistics_frame(...) turns the running sums into one row per segment.
+
+    :param compiled: dict from compile_tree(...)
+    :param statistics: dict from empty_segment_statistics(...)
+
+    :return: Dataframe with segment, class, customers, share and mean/std/min/max of every column
+    """
+
+    leaves = np.flatnonzero(compiled["Children Left"] == LEAF)
+    customers = statistics["Customers"][leaves]
+
+    summary = pd.DataFrame({
+        SEGMENT_COLUMN: leaves,
+        'class': compiled["Classes"][compiled["Leaf Class"][leaves]],
+        'customers': customers,
+        'share': customers / max(customers.sum(), 1),
+    })
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        count = statistics["Count"][leaves]
+        mean = statistics["Sum"][leaves] / count
+        variance = np.maximum(statistics["Squares"][leaves] / count - mean * mean, 0.0)
+
+    for index, column in enumerate(statistics["Columns"]):
+        empty = count[:, index] == 0
+        summary['mean_{}'.format(column)] = mean[:, index]
+        summary['std_{}'.format(column)] = np.sqrt(variance[:, index])
+        summary['min_{}'.format(column)] = np.where(empty, np.nan, statistics["Minimum"][leaves, index])
+        summary['max_{}'.format(column)] = np.where(empty, np.nan, statistics["Maximum"][leaves, index])
+
+    return summary
+
+def stream_segments(path, compiled, output_path, summary_columns=None, id_columns=None, chunk_rows=CHUNK_ROWS):
+
+    """
+    stream_segments(...) segments the customers of a csv file chunk by
+    chunk and writes their segment ids to output_path. The summary per
+    segment is collected in the same pass, hence memory depends on the
+    chunk size and the tree, not on the number of customers.
+
+    :param path: path of the csv file with the columns in "Feature Names"
+    :param compiled: dict from compile_tree(...) or load_tree(...)
+    :param output_path: path of the csv file with the segment of every customer
+    :param summary_columns: numeric columns summarized per segment, by default the features
+    :param id_columns: columns copied to the output, by default only the row number
+    :param chunk_rows: customers read per chunk
+
+    :return: dict with "Summary", "Customers", "Output" and "Time"
+    """
+
+    started = time.perf_counter()
+
+    features = list(compiled["Feature Names"])
+    summary_columns = features if (summary_columns is None) else list(summary_columns)
+    id_columns = [] if (id_columns is None) else list(id_columns)
+    prediction = PREDICTION_COLUMN.format(compiled["Target"] or 'class')
+
+    use_columns = list(dict.fromkeys(id_columns + features + summary_columns))
+    statistics = empty_segment_statistics(compiled, summary_columns)
+
+    customers = 0
+    temporary_path = output_path + '.tmp'
+
+    with open(temporary_path, 'w', newline='') as file:
+        # The header is written up front, such that a file without customers still gets one
+        pd.DataFrame(columns=[ROW_COLUMN] + id_columns + [SEGMENT_COLUMN, prediction]).to_csv(file, index=False)
+
+        for chunk in pd.read_csv(path, usecols=use_columns, chunksize=chunk_rows):
+            leaves = assign_leaves(compiled, chunk[features].to_numpy(dtype=np.float32))
+            add_segment_statistics(statistics, leaves, chunk[summary_columns].to_numpy(dtype=float))
+
+            segmented = chunk[id_columns].copy()
+            segmented.insert(0, ROW_COLUMN, np.arange(customers, customers + len(chunk)))
+            segmented[SEGMENT_COLUMN] = leaves
+            segmented[prediction] = predict_classes(compiled, leaves)
+            segmented.to_csv(file, header=False, index=False)
+
+            customers += len(chunk)
+
+    os.replace(temporary_path, output_path)
+
+    result_dict = dict()
+    result_dict["Summary"] = statistics_frame(compiled, statistics)
+    result_dict["Customers"] = customers
+    result_dict["Output"] = output_path
+    result_dict["Time"] = time.perf_counter() - started
+
+    return result_dict
@@ -0,0 +1,88 @@
+# Dependencies
+import numpy as np
+import pytest
+import mdptoolbox.example
+import mdptoolbox.mdp
+from model_dependencies import bellman_dependencies
+
+DISCOUNT = 0.9
+
+def example_problems():
+
+    """example_problems(...) returns the forest example and a random MDP of mdptoolbox"""
+
+    np.random.seed(0)
+    return [mdptoolbox.example.forest(S=5), mdptoolbox.example.rand(8, 3)]
+
+@pytest.mark.parametrize('problem', range(2))
+def test_value_iteration_matches_mdptoolbox(problem):
+
+    """The native value iterations find the policy of mdptoolbox.mdp.ValueIteration"""
+
+    transition, rewards = example_problems()[problem]
+
+    toolbox = mdptoolbox.mdp.ValueIteration(transition, rewards, DISCOUNT, epsilon=0.0001)
+    toolbox.run()
+
+    for method in ['Value Iteration', 'Gauss-Seidel Value Iteration']:
+        result_dict = bellman_dependencies.solve(transition, rewards, DISCOUNT, method, epsilon=0.0001)
+        assert tuple(result_dict["Optimal Policy"]) == tuple(toolbox.policy)
+
+@pytest.mark.parametrize('problem', range(2))
+def test_policy_iteration_matches_mdptoolbox(problem):
+
+    """Policy iteration and modified policy iteration agree with mdptoolbox.mdp.PolicyIteration"""
+
+    transition, rewards = example_problems()[problem]
+
+    toolbox = mdptoolbox.mdp.PolicyIteration(transition, rewards, DISCOUNT)
+    toolbox.run()
+
+    result_dict = bellman_dependencies.solve(transition, rewards, DISCOUNT, 'Policy Iteration')
+    assert tuple(result_dict["Optimal Policy"]) == tuple(toolbox.policy)
+    np.testing.assert_allclose(result_dict["Value Function"], toolbox.V, rtol=1e-8)
+
+    result_dict = bellman_dependencies.solve(transition, rewards, DISCOUNT, 'Modified Policy Iteration', epsilon=0.0001)
+    assert tuple(result_dict["Optimal Policy"]) == tuple(toolbox.policy)
+
+def batch_problems():
+
+    """batch_problems(...) returns three random MDPs of one shape, each with its own discount factor"""
+
+    np.random.seed(1)
+    problems = [mdptoolbox.example.rand(6, 3) for _ in range(3)]
+
+    return [problem[0] for problem in problems], [problem[1] for problem in problems], [0.8, 0.9, 0.95]
+
+@pytest.mark.parametrize('method', ['Value Iteration', 'Policy Iteration'])
+def test_solve_batch_matches_separate_solves(method):
+
+    """Models of one shape are solved together and agree with solving each on its own"""
+
+    transitions, rewards, discounts = batch_problems()
+
+    batch = bellman_dependencies.solve_batch(transitions, rewards, discounts, method)
+
+    assert batch["Batched"]
+    for index, discount in enumerate(discounts):
+        result_dict = bellman_dependencies.solve(transitions[index], rewards[index], discount, method)
+        assert tuple(batch["Optimal Policies"][index]) == tuple(result_dict["Optimal Policy"])
+        np.testing.assert_allclose(batch["Value Functions"][index], result_dict["Value Function"], rtol=1e-6)
+
+def test_solve_batch_pools_models_without_batched_solver():
+
+    """Models of different shapes go to the process pool and keep their order"""
+
+    transitions, rewards, discounts = batch_problems()
+    forest = mdptoolbox.example.forest(S=5)
+    transitions.append(forest[0])
+    rewards.append(forest[1])
+    discounts.append(DISCOUNT)
+
+    batch = bellman_dependencies.solve_batch(transitions, rewards, discounts, 'Policy Iteration', workers=2)
+
+    assert not batch["Batched"] and len(batch["Optimal Policies"]) == 4
+    for index, discount in enumerate(discounts):
+        result_dict = bellman_dependencies.solve(transitions[index], rewards[index], discount, 'Policy Iteration')
+        assert tuple(batch["Optimal Policies"][index]) == tuple(result_dict["Optimal Policy"])
+        np.testing.assert_allclose(batch["Value Functions"][index], result_dict["Value Function"])
@@ -0,0 +1,103 @@
+# Dependencies
+import os
+import numpy as np
+import mdptoolbox.example
+import scipy.sparse as sparse_matrix
+from model_dependencies import bellman_dependencies
+from model_dependencies import cache_dependencies
+
+DISCOUNT = 0.9
+
+def forest():
+
+    """forest() returns the forest example of mdptoolbox as (A,S,S) tensors"""
+
+    transition, rewards = mdptoolbox.example.forest(S=5)
+    rewards = np.repeat(rewards.T[:, :, None], 5, axis=2)
+
+    return transition, rewards
+
+def entry_size(directory, key):
+
+    """entry_size(...) returns the bytes taken by the files of one cache entry"""
+
+    return sum(os.path.getsize(path) for path in cache_dependencies.entry_paths(key, directory))
+
+def age(directory, key, seconds):
+
+    """age(...) sets the last use of a cache entry to a fixed time"""
+
+    for path in cache_dependencies.entry_paths(key, directory):
+        os.utime(path, (seconds, seconds))
+
+def test_miss_then_hit(tmp_path, monkeypatch):
+
+    """The first solve is stored, the second is served from disk without touching the solver"""
+
+    transition, rewards = forest()
+
+    missed = cache_dependencies.cached_solve(transition, rewards, DISCOUNT, 'Policy Iteration', directory=str(tmp_path))
+
+    def no_solve(*args, **kwargs):
+        raise AssertionError('the solver ran on a cache hit')
+
+    monkeypatch.setattr(bellman_dependencies, 'solve', no_solve)
+    hit = cache_dependencies.cached_solve(transition, rewards, DISCOUNT, 'Policy Iteration', directory=str(tmp_path))
+
+    assert not missed["Cached"] and hit["Cached"]
+    np.testing.assert_array_equal(hit["Optimal Policy"], missed["Optimal Policy"])
+    np.testing.assert_array_equal(hit["Value Function"], missed["Value Function"])
+    assert hit["Iterations"] == missed["Iterations"]
+
+def test_key_follows_content():
+
+    """Equal content gives the same key, any change of the inputs a new one"""
+
+    transition, rewards = forest()
+    key = cache_dependencies.solution_key(transition, rewards, DISCOUNT, 'Policy Iteration', 1000)
+
+    assert cache_dependencies.solution_key(transition.copy(), rewards.copy(), DISCOUNT, 'Policy Iteration', 1000) == key
+    assert cache_dependencies.solution_key(transition, rewards, 0.95, 'Policy Iteration', 1000) != key
+    assert cache_dependencies.solution_key(transition, rewards, DISCOUNT, 'Value Iteration', 1000) != key
+    assert cache_dependencies.solution_key(transition, rewards + 1, DISCOUNT, 'Policy Iteration', 1000) != key
+
+    # Sparse matrices hash their canonical CSR form, whatever their format
+    sparse = [sparse_matrix.csr_matrix(matrix) for matrix in transition]
+    assert cache_dependencies.solution_key(sparse, rewards, DISCOUNT, 'Policy Iteration', 1000) == cache_dependencies.solution_key([matrix.tocoo() for matrix in sparse], rewards, DISCOUNT, 'Policy Iteration', 1000)
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+
+    """Beyond max_bytes the entry used longest ago goes, a hit keeps an entry alive"""
+
+    transition, rewards = forest()
+    directory = str(tmp_path)
+    keys = [cache_dependencies.solution_key(transition, rewards, discount, 'Policy Iteration', 1000) for discount in (0.8, 0.9, 0.95)]
+
+    cache_dependencies.cached_solve(transition, rewards, 0.8, 'Policy Iteration', directory=directory)
+    cache_dependencies.cached_solve(transition, rewards, 0.9, 'Policy Iteration', directory=directory)
+    age(directory, keys[0], 1000)
+    age(directory, keys[1], 2000)
+
+    # A hit on the older entry makes the other one the least recently used
+    assert cache_dependencies.load_solution(keys[0], directory)["Cached"]
+
+    # Room for two entries but not three, whatever the exact size of the new one
+    max_bytes = entry_size(directory, keys[0]) + entry_size(directory, keys[1]) + entry_size(directory, keys[0]) // 2
+    cache_dependencies.cached_solve(transition, rewards, 0.95, 'Policy Iteration', directory=directory, max_bytes=max_bytes)
+
+    assert cache_dependencies.load_solution(keys[0], directory) is not None
+    assert cache_dependencies.load_solution(keys[1], directory) is None
+    assert cache_dependencies.load_solution(keys[2], directory) is not None
+
+def test_unwritable_cache_still_solves(tmp_path):
+
+    """A cache directory which cannot be created does not break the solve"""
+
+    transition, rewards = forest()
+    blocked = tmp_path / 'file'
+    blocked.write_text('')
+
+    result_dict = cache_dependencies.cached_solve(transition, rewards, DISCOUNT, 'Policy Iteration', directory=str(blocked / 'cache'))
+
+    assert not result_dict["Cached"]
+    assert tuple(result_dict["Optimal Policy"]) == tuple(bellman_dependencies.solve(transition, rewards, DISCOUNT, 'Policy Iteration')["Optimal Policy"])
@@ -0,0 +1,125 @@
+# Dependencies
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import sklearn
+from model_dependencies import cart_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+FEATURES = ['Recency', 'Frequency', 'Monetary']
+SEGMENTS = os.path.join(DATA, 'customer_segmentation', 'segments.csv')
+
+GRID = {"criterion": ['gini', 'entropy'], "max_depth": [2, 4]}
+
+@pytest.fixture
+def fresh_process(monkeypatch):
+
+    """fresh_process forgets the trees fitted so far, as a restarted app would"""
+
+    monkeypatch.setattr(cart_dependencies, 'fitted_trees', dict())
+
+def training_data():
+
+    """training_data(...) returns the features and target of the CART page on the authors' data"""
+
+    data = pd.read_csv(SEGMENTS)
+
+    return data[FEATURES], data['state'].to_numpy()
+
+def no_fit(*args, **kwargs):
+
+    """no_fit(...) replaces the cross-validation where every score must come from the cache"""
+
+    raise AssertionError('a configuration was fitted again')
+
+def test_cached_fit_reuses_trees(tmp_path, fresh_process, monkeypatch):
+
+    """A tree is fitted once, then served from the process and after a restart from disk"""
+
+    X, y = training_data()
+    parameters = {"max_depth": 3, "min_samples_leaf": 10}
+
+    fitted = cart_dependencies.cached_fit(X, y, parameters, directory=str(tmp_path))
+    remembered = cart_dependencies.cached_fit(X, y, parameters, directory=str(tmp_path))
+
+    monkeypatch.setattr(cart_dependencies, 'fitted_trees', dict())
+    loaded = cart_dependencies.cached_fit(X, y, parameters, directory=str(tmp_path))
+
+    assert not fitted["Cached"] and remembered["Cached"] and loaded["Cached"]
+    assert remembered["Tree"] is fitted["Tree"]
+    np.testing.assert_array_equal(loaded["Tree"].predict(X), fitted["Tree"].predict(X))
+
+def test_tree_key_follows_data_parameters_and_sklearn(monkeypatch):
+
+    """Other data, parameters, folds or another sklearn release address another tree"""
+
+    X, y = training_data()
+    fingerprint = cart_dependencies.data_fingerprint(X, y)
+    key = cart_dependencies.tree_key(fingerprint, {"max_depth": 3, "criterion": 'gini'})
+
+    assert cart_dependencies.tree_key(cart_dependencies.data_fingerprint(X.copy(), y.copy()), {"criterion": 'gini', "max_depth": 3}) == key
+    assert cart_dependencies.tree_key(cart_dependencies.data_fingerprint(X.iloc[1:], y[1:]), {"max_depth": 3, "criterion": 'gini'}) != key
+    assert cart_dependencies.tree_key(fingerprint, {"max_depth": 4, "criterion": 'gini'}) != key
+    assert cart_dependencies.tree_key(fingerprint, {"max_depth": 3, "criterion": 'gini'}, 5) != key
+
+    monkeypatch.setattr(sklearn, '__version__', sklearn.__version__ + '.post1')
+    assert cart_dependencies.tree_key(fingerprint, {"max_depth": 3, "criterion": 'gini'}) != key
+
+def test_fitted_trees_are_capped(tmp_path, fresh_process, monkeypatch):
+
+    """The process keeps at most FITTED_TREES trees and drops the least recently used"""
+
+    X, y = training_data()
+    monkeypatch.setattr(cart_dependencies, 'FITTED_TREES', 2)
+    fingerprint = cart_dependencies.data_fingerprint(X, y)
+    keys = [cart_dependencies.tree_key(fingerprint, {"max_depth": depth}) for depth in (2, 3, 4)]
+
+    cart_dependencies.cached_fit(X, y, {"max_depth": 2}, fingerprint, str(tmp_path))
+    cart_dependencies.cached_fit(X, y, {"max_depth": 3}, fingerprint, str(tmp_path))
+    cart_dependencies.cached_fit(X, y, {"max_depth": 2}, fingerprint, str(tmp_path))
+    cart_dependencies.cached_fit(X, y, {"max_depth": 4}, fingerprint, str(tmp_path))
+
+    assert list(cart_dependencies.fitted_trees) == [keys[0], keys[2]]
+
+def test_disk_cache_evicts_beyond_its_size(tmp_path, fresh_process, monkeypatch):
+
+    """Beyond CACHE_SIZE the tree used longest ago is removed from disk"""
+
+    X, y = training_data()
+    directory = str(tmp_path)
+
+    cart_dependencies.cached_fit(X, y, {"max_depth": 2}, directory=directory)
+    first = [os.path.join(directory, name) for name in os.listdir(directory)][0]
+    os.utime(first, (1000, 1000))
+
+    monkeypatch.setattr(cart_dependencies, 'CACHE_SIZE', int(os.path.getsize(first) * 1.5))
+    cart_dependencies.cached_fit(X, y, {"max_depth": 2, "criterion": 'entropy'}, directory=directory)
+
+    assert not os.path.exists(first)
+    assert len(os.listdir(directory)) == 1
+
+def test_grid_search_ranks_and_caches_scores(tmp_path, fresh_process, monkeypatch):
+
+    """Every configuration is cross-validated once, ranked best first, and a rerun only reads the cache"""
+
+    X, y = training_data()
+
+    searched = cart_dependencies.grid_search(X, y, GRID, folds=3, workers=1, directory=str(tmp_path))
+    results = searched["Results"]
+
+    assert len(results) == 4 and not results["Cached"].any()
+    assert list(results["Mean Score"]) == sorted(results["Mean Score"], reverse=True)
+    assert searched["Best Parameters"] == results.iloc[0][list(GRID)].to_dict()
+
+    best = cart_dependencies.evaluate_parameters(X, y, searched["Best Parameters"], 3)
+    assert best["Mean Score"] == results["Mean Score"].iloc[0]
+    assert searched["Tree"].get_params()["max_depth"] == searched["Best Parameters"]["max_depth"]
+
+    monkeypatch.setattr(cart_dependencies, 'evaluate_parameters', no_fit)
+    rerun = cart_dependencies.grid_search(X, y, GRID, folds=3, workers=1, directory=str(tmp_path))
+
+    assert rerun["Results"]["Cached"].all()
+    pd.testing.assert_frame_equal(rerun["Results"].drop(columns='Cached'), results.drop(columns='Cached'))
@@ -0,0 +1,68 @@
+# Dependencies
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+import cli
+from model_dependencies import pipeline_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+DATA = os.path.join(ROOT, 'data', 'datasets', 'official')
+
+TRANSITIONS = os.path.join(DATA, 'customer_dynamics', 'transitions_input.csv')
+COSTS = os.path.join(DATA, 'actions', 'actions_cost.csv')
+
+def run(output, *arguments):
+
+    """run(...) runs the command line on the bundled data, without touching the solution cache"""
+
+    return cli.main([TRANSITIONS, COSTS, '--output', str(output), '--no-cache', '--seed', '1', '--simulations', '200'] + list(arguments))
+
+@pytest.mark.parametrize('mode', pipeline_dependencies.CAMPAIGN_MODES)
+def test_cli_writes_results_and_timings(tmp_path, mode):
+
+    """A run writes the policy, the campaign and the time of every stage, and reproduces the bundled MDP inputs"""
+
+    run(tmp_path, '--mode', mode, '--save-intermediate')
+
+    policy = pd.read_csv(tmp_path / 'mcp_optimal_policy.csv', index_col=0)
+    assert list(policy['action']) == ['agent', 'agent', 'agent', 'no contact', 'no contact', 'agent']
+
+    summary = pd.read_csv(tmp_path / 'campaign_summary.csv')
+    assert len(summary) == 12
+    assert os.path.exists(tmp_path / 'averages.csv')
+
+    with open(tmp_path / 'timings.json') as file:
+        timings = json.load(file)
+    assert list(timings) == pipeline_dependencies.STAGES and all(seconds >= 0 for seconds in timings.values())
+
+    # The estimated probabilities and the rewards are those the app ships for the MDP Solver page
+    for name, bundled in [('probabilities_mdp.csv', 'mdp_transitions.csv'), ('mdp_rewards.csv', 'mdp_rewards.csv')]:
+        written = pd.read_csv(tmp_path / name, index_col=0)
+        expected = pd.read_csv(os.path.join(DATA, 'markov_decision_process', bundled), index_col=0)
+        numeric = expected.select_dtypes('number').columns
+        np.testing.assert_allclose(written[numeric].to_numpy(dtype=float), expected[numeric].to_numpy(dtype=float))
+
+def test_cli_is_reproducible_with_a_seed(tmp_path):
+
+    """Two runs with the same seed write the same campaign"""
+
+    run(tmp_path / 'first')
+    run(tmp_path / 'second')
+
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'first' / 'campaign_summary.csv'), pd.read_csv(tmp_path / 'second' / 'campaign_summary.csv'))
+
+def test_cli_runs_without_streamlit(tmp_path):
+
+    """The command line runs in a fresh interpreter without ever importing Streamlit"""
+
+    probe = 'import runpy, sys; sys.argv = sys.argv[1:]; runpy.run_path("cli.py", run_name="__main__"); print(any(name.split(".")[0] == "streamlit" for name in sys.modules))'
+    completed = subprocess.run([sys.executable, '-c', probe, 'cli.py', TRANSITIONS, COSTS, '--output', str(tmp_path), '--no-cache', '--simulations', '50'], cwd=ROOT, capture_output=True, text=True)
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip().splitlines()[-1] == 'False'
+    assert os.path.exists(tmp_path / 'mcp_optimal_policy.csv')
@@ -0,0 +1,126 @@
+# Dependencies
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from model_dependencies import data_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+TRANSITIONS = os.path.join(DATA, 'markov_decision_process', 'mdp_transitions.csv')
+
+class Upload:
+
+    """Upload stands in for the file object of st.file_uploader(...)"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.content = file.read()
+
+    def getvalue(self):
+        return self.content
+
+@pytest.fixture
+def fresh_process(monkeypatch):
+
+    """fresh_process forgets the tables loaded so far, as a restarted app would"""
+
+    monkeypatch.setattr(data_dependencies, 'loaded_tables', dict())
+
+def no_parse(*args, **kwargs):
+
+    """no_parse(...) replaces pd.read_csv where the csv must not be parsed again"""
+
+    raise AssertionError('the csv was parsed again')
+
+def test_dataset_equals_csv_without_index(tmp_path, fresh_process):
+
+    """A loaded dataset holds the csv without its index column, text columns as categoricals"""
+
+    data = data_dependencies.load_dataset(TRANSITIONS, directory=str(tmp_path))
+    expected = pd.read_csv(TRANSITIONS).iloc[: , 1:]
+
+    assert list(data.columns) == list(expected.columns)
+    assert isinstance(data['action'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(data.astype({'Triple': str, 'action': str}), expected.astype({'Triple': str, 'action': str}), check_dtype=False)
+
+def test_loads_share_the_table(tmp_path, fresh_process, monkeypatch):
+
+    """Later loads reuse the table: no parsing, and the numeric columns are read-only views of the same memory"""
+
+    first = data_dependencies.load_dataset(TRANSITIONS, directory=str(tmp_path))
+
+    monkeypatch.setattr(pd, 'read_csv', no_parse)
+    second = data_dependencies.load_dataset(TRANSITIONS, directory=str(tmp_path))
+
+    probabilities = first['Probability Triple'].to_numpy()
+    assert np.shares_memory(probabilities, second['Probability Triple'].to_numpy())
+    assert not probabilities.flags.writeable
+
+    # Whole columns may still be added and replaced, without the other load seeing it
+    second['Probability Triple'] = 0.0
+    assert first['Probability Triple'].sum() > 0
+
+def test_arrow_file_is_reused_across_processes(tmp_path, fresh_process, monkeypatch):
+
+    """A restarted app memory-maps the Arrow file instead of parsing the csv"""
+
+    expected = data_dependencies.load_dataset(TRANSITIONS, directory=str(tmp_path))
+
+    monkeypatch.setattr(data_dependencies, 'loaded_tables', dict())
+    monkeypatch.setattr(pd, 'read_csv', no_parse)
+
+    pd.testing.assert_frame_equal(data_dependencies.load_dataset(TRANSITIONS, directory=str(tmp_path)), expected)
+
+def test_edited_csv_invalidates_the_cache(tmp_path, fresh_process):
+
+    """A csv with a new modification time or size is parsed again, in and across processes"""
+
+    path = str(tmp_path / 'transitions.csv')
+    shutil.copy(TRANSITIONS, path)
+    directory = str(tmp_path / 'cache')
+
+    before = data_dependencies.load_dataset(path, directory=directory)
+
+    edited = pd.read_csv(path, index_col=0)
+    edited['Probability Triple'] = 1.0
+    edited.to_csv(path)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+
+    after = data_dependencies.load_dataset(path, directory=directory)
+
+    assert before['Probability Triple'].min() < 1
+    assert (after['Probability Triple'] == 1).all()
+    assert data_dependencies.read_cache(data_dependencies.source_signature(path) | {"Drop Index": 'True'}, data_dependencies.cache_path(path, True, directory)) is not None
+
+def test_uploads_are_parsed_once_per_content(fresh_process, monkeypatch):
+
+    """The same upload content is parsed once, and loads like the dataset it came from"""
+
+    first = data_dependencies.load_upload(Upload(TRANSITIONS))
+
+    monkeypatch.setattr(pd, 'read_csv', no_parse)
+    second = data_dependencies.load_upload(Upload(TRANSITIONS))
+
+    pd.testing.assert_frame_equal(first, second)
+    assert np.shares_memory(first['Probability Triple'].to_numpy(), second['Probability Triple'].to_numpy())
+
+def test_stream_paths_stay_in_the_directory(tmp_path):
+
+    """File names resolve inside the streaming directory, anything leading out of it is rejected"""
+
+    directory = tmp_path / 'stream'
+    directory.mkdir()
+    (directory / 'customers.csv').write_text('')
+    os.symlink(str(tmp_path), str(directory / 'outside'))
+
+    assert data_dependencies.resolve_stream_path('customers.csv', str(directory)) == os.path.realpath(str(directory / 'customers.csv'))
+
+    for name in ['../customers.csv', str(tmp_path / 'customers.csv'), 'outside/customers.csv', '.']:
+        with pytest.raises(ValueError):
+            data_dependencies.resolve_stream_path(name, str(directory))
+
+    with pytest.raises(ValueError):
+        data_dependencies.resolve_stream_path('customers.csv', None)
@@ -0,0 +1,34 @@
+# Dependencies
+import importlib.util
+import pytest
+import streamlit
+import benchmark_imports
+
+# Pages which may not pull in any heavy package when they are opened
+LIGHT_PAGES = ['Home Page', 'Preprocessing', '1. States', '3. Transitional Rewards', 'Simulation History', 'Documentation', 'Videos']
+
+# Pages decorated with st.cache, which newer Streamlit releases no longer have
+CACHED_PAGES = ['2. Transitional Probabilities', '4. MDP Solver', '5. Marketing Campaign Planner']
+
+def test_every_page_resolves():
+
+    """Every module of the PAGES table of app.py exists"""
+
+    pages = benchmark_imports.read_pages()
+
+    assert set(pages) == set(LIGHT_PAGES + CACHED_PAGES)
+    for module, _ in pages.values():
+        assert importlib.util.find_spec(module) is not None
+
+@pytest.mark.parametrize('page', LIGHT_PAGES + CACHED_PAGES)
+def test_opening_a_page_skips_heavy_imports(page):
+
+    """Importing a page in a fresh interpreter loads none of sklearn, mdptoolbox, gspread, gsheetsdb or graphviz"""
+
+    if (page in CACHED_PAGES and not hasattr(streamlit, 'cache')):
+        pytest.skip('st.cache is not available in Streamlit {}'.format(streamlit.__version__))
+
+    result_dict = benchmark_imports.probe_import(benchmark_imports.read_pages()[page][0])
+
+    assert result_dict["Error"] is None
+    assert set(result_dict["Modules"]).isdisjoint(['sklearn', 'mdptoolbox', 'gspread', 'gsheetsdb', 'graphviz'])
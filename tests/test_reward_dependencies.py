@@ -0,0 +1,83 @@
+# Dependencies
+import os
+import numpy as np
+import pandas as pd
+from model_dependencies import bellman_dependencies
+from model_dependencies import reward_dependencies
+from model_dependencies import sensitivity_dependencies
+from model_dependencies import tensor_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+REWARDS = os.path.join(DATA, 'rewards', 'reward_input.csv')
+COSTS = os.path.join(DATA, 'actions', 'actions_cost.csv')
+
+def test_frame_categories_keep_the_codes_of_the_frame():
+
+    """The *_category codes of reward_input.csv are kept, they sort the CLV states as text"""
+
+    data = pd.read_csv(REWARDS, index_col=0)
+
+    state_values, state_labels = reward_dependencies.state_values_from_frame(data)
+
+    assert list(state_labels.astype(str)) == ['100', '130', '150', '170', '200', '50']
+    np.testing.assert_array_equal(state_values, [100, 130, 150, 170, 200, 50])
+
+def test_frame_categories_fall_back_to_unique():
+
+    """Without category columns the labels are encoded in sorted order"""
+
+    data = pd.read_csv(REWARDS, index_col=0).drop(columns=['state_category', 'follow_up_state_category'])
+
+    state_values, state_labels = reward_dependencies.state_values_from_frame(data)
+
+    np.testing.assert_array_equal(state_values, np.sort(state_values))
+    assert len(state_labels) == 6
+
+def test_bundled_rewards_match_the_page():
+
+    """mdp_rewards.csv is what the Rewards page generates from reward_input.csv at a reward factor of 0.5"""
+
+    data = pd.read_csv(REWARDS, index_col=0)
+    bundled = pd.read_csv(os.path.join(DATA, 'markov_decision_process', 'mdp_rewards.csv'), index_col=0)
+
+    frame = reward_dependencies.rewards_from_frame(data, pd.read_csv(COSTS), 0.5)["Frame"]
+
+    assert list(frame.columns) == list(bundled.columns)
+    assert list(frame["Triple"].astype(str)) == list(bundled["Triple"])
+    np.testing.assert_allclose(frame.iloc[:, 1:].to_numpy(dtype=float), bundled.iloc[:, 1:].to_numpy(dtype=float))
+
+def test_sweep_uses_the_encoding_of_the_frame():
+
+    """
+    The sweep reads states, actions and the transition tensor from the same
+    category codes, hence the policy is reported for the right CLV states.
+    The codes of reward_input.csv are not in the order of np.unique of the values.
+    """
+
+    data = pd.read_csv(REWARDS, index_col=0)
+    discount = float(sensitivity_dependencies.discount_factor(0.07, 12))
+
+    sweep = reward_dependencies.sweep_frame_policies(data, pd.read_csv(COSTS), [0.5], discount)
+
+    assert list(sweep["State Labels"].astype(str)) == ['100', '130', '150', '170', '200', '50']
+    policy = sweep["Action Labels"][sweep["Optimal Policies"][0]]
+    assert list(policy) == ['agent', 'agent', 'agent', 'no contact', 'no contact', 'agent']
+
+def test_sweep_matches_separate_solves():
+
+    """Every reward factor of the sweep yields the policy of solving its own reward tensor"""
+
+    data = pd.read_csv(REWARDS, index_col=0)
+    cost_actions = pd.read_csv(COSTS)
+    discount = float(sensitivity_dependencies.discount_factor(0.07, 12))
+    reward_factors = [0.1, 0.5, 0.9]
+
+    sweep = reward_dependencies.sweep_frame_policies(data, cost_actions, reward_factors, discount)
+    transition, _ = tensor_dependencies.build_transition_tensor(data)
+
+    for reward_factor, policy in zip(reward_factors, sweep["Optimal Policies"]):
+        rewards = reward_dependencies.rewards_from_frame(data, cost_actions, reward_factor)["Rewards"]
+        solved = bellman_dependencies.solve(transition, rewards, discount, 'Policy Iteration')
+        np.testing.assert_array_equal(policy, solved["Optimal Policy"])
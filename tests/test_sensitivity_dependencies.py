@@ -0,0 +1,80 @@
+# Dependencies
+import os
+import numpy as np
+import pandas as pd
+from model_dependencies import bellman_dependencies
+from model_dependencies import sensitivity_dependencies
+from model_dependencies import tensor_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+REWARDS = os.path.join(DATA, 'markov_decision_process', 'mdp_rewards.csv')
+TRANSITIONS = os.path.join(DATA, 'markov_decision_process', 'mdp_transitions.csv')
+
+WACCS = [0.01, 0.07, 0.2, 0.5]
+PERIODS = [1, 4, 12]
+
+def mdp():
+
+    """mdp() returns the transition and reward tensors of the bundled MDP example"""
+
+    transition, _ = tensor_dependencies.build_transition_tensor(pd.read_csv(TRANSITIONS, index_col=0))
+    rewards, _ = tensor_dependencies.build_reward_tensor(pd.read_csv(REWARDS, index_col=0))
+
+    return transition, rewards
+
+def test_snake_order_visits_neighbours():
+
+    """Every grid point is visited once and consecutive points are neighbours"""
+
+    order = sensitivity_dependencies.snake_order(3, 4)
+
+    assert sorted(order) == [(row, column) for row in range(3) for column in range(4)]
+    assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(order, order[1:]))
+
+def test_policy_switches_count_changed_states():
+
+    """A grid point counts the states whose action differs from the previous WACC or number of periods"""
+
+    policies = np.zeros((2, 2, 3), dtype=np.int64)
+    policies[0, 1] = [1, 0, 0]
+    policies[1, 1] = [1, 1, 1]
+
+    switches = sensitivity_dependencies.policy_switches(policies)
+
+    np.testing.assert_array_equal(switches, [[0, 1], [0, 3]])
+
+def test_grid_matches_separate_solves():
+
+    """Warm started grid points yield the policies and values of solving every discount factor from scratch"""
+
+    transition, rewards = mdp()
+
+    grid = sensitivity_dependencies.discount_sensitivity(transition, rewards, WACCS, PERIODS)
+
+    assert grid["Optimal Policies"].shape == (len(WACCS), len(PERIODS), 6)
+    for row, wacc in enumerate(WACCS):
+        for column, periods in enumerate(PERIODS):
+            discount = float(sensitivity_dependencies.discount_factor(wacc, periods))
+            result_dict = bellman_dependencies.solve(transition, rewards, discount, 'Policy Iteration')
+
+            assert grid["Discount Factors"][row, column] == discount
+            np.testing.assert_array_equal(grid["Optimal Policies"][row, column], result_dict["Optimal Policy"])
+            np.testing.assert_allclose(grid["Value Functions"][row, column], result_dict["Value Function"])
+
+    # The example changes its policy over this grid, and every distinct policy gets one index
+    policies = grid["Optimal Policies"].reshape((-1, 6))
+    assert len(np.unique(policies, axis=0)) == grid["Policy Index"].max() + 1 > 1
+    np.testing.assert_array_equal(grid["Policy Switches"], sensitivity_dependencies.policy_switches(grid["Optimal Policies"]))
+
+def test_warm_start_saves_iterations():
+
+    """Value iteration needs fewer sweeps over the grid when started from the neighbouring solution"""
+
+    transition, rewards = mdp()
+
+    grid = sensitivity_dependencies.discount_sensitivity(transition, rewards, WACCS, PERIODS, 'Value Iteration')
+    cold = sum(bellman_dependencies.solve(transition, rewards, float(discount), 'Value Iteration')["Iterations"] for discount in grid["Discount Factors"].ravel())
+
+    assert grid["Iterations"].sum() < cold
@@ -0,0 +1,135 @@
+# Dependencies
+import numpy as np
+import scipy.sparse as sparse_matrix
+from model_dependencies import simulation_dependencies
+
+def campaign():
+
+    """campaign(...) returns a small random campaign: transition, policy, state values and action costs"""
+
+    rng = np.random.default_rng(0)
+    transition = rng.random((3, 4, 4))
+    transition /= transition.sum(axis=2, keepdims=True)
+
+    return transition, np.array([0, 2, 1, 2]), np.array([50.0, 100.0, 150.0, 200.0]), np.array([1.0, 2.5, 4.0])
+
+def test_expected_campaign_matches_matrix_powers():
+
+    """The propagated distributions are the rows of the powers of the policy's chain"""
+
+    transition, policy, state_values, action_costs = campaign()
+    periods, initial_state = 6, 1
+
+    expected = simulation_dependencies.expected_campaign(transition, policy, initial_state, periods, state_values, action_costs)
+
+    chain = transition[policy, np.arange(len(policy))]
+    distributions = np.array([np.linalg.matrix_power(chain, t)[initial_state] for t in range(periods + 1)])
+
+    np.testing.assert_allclose(expected["State Distributions"], distributions[:-1])
+    np.testing.assert_allclose(expected["Expected CLV"], distributions[1:] @ state_values)
+    np.testing.assert_allclose(expected["Action Shares"].sum(axis=1), 1)
+    np.testing.assert_allclose(expected["Expected Total Cost"], (distributions[:-1] @ action_costs[policy]).sum())
+
+def test_expected_campaign_is_the_limit_of_the_simulation():
+
+    """Many simulated customers average out to the exact expectation"""
+
+    transition, policy, state_values, action_costs = campaign()
+    periods, initial_state = 6, 1
+
+    expected = simulation_dependencies.expected_campaign(transition, policy, initial_state, periods, state_values, action_costs)
+
+    actions, states = simulation_dependencies.simulate_campaign(transition, policy, initial_state, periods, 200000, seed=0)
+    simulated = simulation_dependencies.summarize_trajectories(actions, states, initial_state, state_values, action_costs)
+
+    np.testing.assert_allclose(simulated["Action Shares"], expected["Action Shares"], atol=0.01)
+    np.testing.assert_allclose(simulated["Average CLV Change"], expected["Expected CLV Change"], atol=1.0)
+    np.testing.assert_allclose(simulated["Average Total Cost"], expected["Expected Total Cost"], rtol=0.01)
+
+def test_merged_statistics_match_batch_summary():
+
+    """CampaignStatistics merged from chunks summarizes like summarize_trajectories(...) on all trajectories"""
+
+    transition, policy, state_values, action_costs = campaign()
+    periods, initial_state = 6, 1
+
+    actions, states = simulation_dependencies.simulate_campaign(transition, policy, initial_state, periods, 3000, seed=0)
+    batch = simulation_dependencies.summarize_trajectories(actions, states, initial_state, state_values, action_costs)
+
+    merged = simulation_dependencies.CampaignStatistics(initial_state, state_values, action_costs, periods)
+    for start, end in [(0, 1000), (1000, 1001), (1001, 3000)]:
+        chunk = simulation_dependencies.CampaignStatistics(initial_state, state_values, action_costs, periods)
+        merged.merge(chunk.update(actions[start:end], states[start:end]))
+
+    summary = merged.summary()
+
+    assert summary["Simulations"] == 3000
+    for name in ["Action Shares", "Average CLV", "Average CLV Change", "Average Cost", "Average Total Cost", "CLV Delta"]:
+        np.testing.assert_allclose(summary[name], batch[name])
+
+    # The merged variance is the variance of all customers at once
+    clv_delta = state_values[states[:, -1]] - state_values[initial_state]
+    np.testing.assert_allclose(summary["CLV Delta Variance"], np.var(clv_delta, ddof=1))
+    np.testing.assert_allclose(summary["CLV Variance"], np.var(state_values[states], axis=0, ddof=1))
+
+def test_simulate_to_precision_stops_at_the_target():
+
+    """Target precision stops with intervals narrower than requested, or at the simulation limit"""
+
+    transition, policy, state_values, action_costs = campaign()
+
+    statistics, stop_reason = simulation_dependencies.simulate_to_precision(transition, policy, 1, 6, state_values, action_costs, 0.005, 0.5, batch_size=5000, seed=0)
+    precision = statistics.half_widths()
+
+    assert stop_reason == "Precision Reached"
+    assert precision["Action Frequency"].max() <= 0.005 and precision["Average CLV Change"] <= 0.5
+    assert statistics.count % 5000 == 0 and statistics.count >= 10000
+
+    statistics, stop_reason = simulation_dependencies.simulate_to_precision(transition, policy, 1, 6, state_values, action_costs, 0.0, 0.0, batch_size=5000, max_simulations=12000, seed=0)
+
+    assert stop_reason == "Simulation Limit" and statistics.count == 12000
+
+def test_simulate_to_precision_does_not_depend_on_workers():
+
+    """The batches of the target precision mode give the same statistics on one or several processes"""
+
+    transition, policy, state_values, action_costs = campaign()
+    arguments = (transition, policy, 1, 6, state_values, action_costs, 0.005, 0.5)
+
+    single, _ = simulation_dependencies.simulate_to_precision(*arguments, batch_size=5000, seed=3)
+    pooled, _ = simulation_dependencies.simulate_to_precision(*arguments, batch_size=5000, seed=3, workers=2)
+
+    assert pooled.count == single.count
+    np.testing.assert_array_equal(pooled.action_counts, single.action_counts)
+    np.testing.assert_allclose(pooled.summary()["CLV Delta"], single.summary()["CLV Delta"])
+
+def test_process_pool_matches_single_process():
+
+    """Spreading the chunks over processes keeps the result of a seed, on dense and sparse transitions"""
+
+    transition, policy, state_values, action_costs = campaign()
+    sparse = [sparse_matrix.csr_matrix(matrix) for matrix in transition]
+
+    single = simulation_dependencies.simulate_campaign_statistics(transition, policy, 1, 6, 10000, state_values, action_costs, seed=5, chunk_size=1500)
+
+    for model in [transition, sparse]:
+        pooled = simulation_dependencies.simulate_campaign_statistics(model, policy, 1, 6, 10000, state_values, action_costs, seed=5, chunk_size=1500, workers=3)
+        np.testing.assert_array_equal(pooled.action_counts, single.action_counts)
+        np.testing.assert_allclose(pooled.clv_m2, single.clv_m2)
+
+def test_shared_lookup_is_the_policy_chain():
+
+    """Workers attach to the lookup of the policy's chain, which is S rows and not the A*S rows of the tensor"""
+
+    transition, policy, _, _ = campaign()
+    lookup = simulation_dependencies.cumulative_lookup(simulation_dependencies.policy_transition_matrix(transition, policy))
+
+    descriptors, blocks = simulation_dependencies.share_lookup(lookup)
+    try:
+        for key, descriptor in descriptors.items():
+            array, block = simulation_dependencies.attach_array(descriptor)
+            np.testing.assert_array_equal(array, lookup[key])
+            block.close()
+        assert len(lookup["Row End"]) == len(policy)
+    finally:
+        simulation_dependencies.release_blocks(blocks)
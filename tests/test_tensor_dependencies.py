@@ -0,0 +1,127 @@
+# Dependencies
+import os
+import numpy as np
+import pandas as pd
+from model_dependencies import bellman_dependencies
+from model_dependencies import simulation_dependencies
+from model_dependencies import tensor_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+REWARDS = os.path.join(DATA, 'markov_decision_process', 'mdp_rewards.csv')
+TRANSITIONS = os.path.join(DATA, 'markov_decision_process', 'mdp_transitions.csv')
+
+def looped_tensor(data, column):
+
+    """looped_tensor(...) fills the (A,S,S) array row by row, as the pages did before the scatter pass"""
+
+    number_actions, number_states = tensor_dependencies.tensor_shape(data)
+    tensor = np.zeros((number_actions, number_states, number_states))
+
+    for _, row in data.iterrows():
+        tensor[int(row['action_category']), int(row['state_category']), int(row['follow_up_state_category'])] = row[column]
+
+    return tensor
+
+def test_reward_tensor_matches_loop():
+
+    """The scatter pass yields the tensor of the row by row loop on mdp_rewards.csv"""
+
+    data = pd.read_csv(REWARDS, index_col=0)
+
+    tensor, report = tensor_dependencies.build_reward_tensor(data)
+
+    assert tensor.shape == (6, 6, 6)
+    np.testing.assert_array_equal(tensor, looped_tensor(data, tensor_dependencies.REWARD_COLUMN))
+    assert report["Duplicate Triples"].empty and report["Missing Triples"].empty
+
+def test_reward_tensor_reports_duplicate_and_missing_triples():
+
+    """A repeated triple keeps its last row and is reported, a dropped triple stays zero and is reported"""
+
+    data = pd.read_csv(REWARDS, index_col=0)
+    missing = data.loc[7, tensor_dependencies.TRIPLE_COLUMNS].tolist()
+    duplicate = data.iloc[[5]].assign(**{tensor_dependencies.REWARD_COLUMN: 99.0})
+    data = pd.concat([data.drop(index=7), duplicate])
+
+    tensor, report = tensor_dependencies.build_reward_tensor(data)
+
+    state, action, follow_up_state = data.loc[5, tensor_dependencies.TRIPLE_COLUMNS].iloc[0]
+    assert tensor[action, state, follow_up_state] == 99.0
+    assert report["Duplicate Triples"].values.tolist() == [[state, action, follow_up_state]]
+    assert report["Missing Triples"].values.tolist() == [missing]
+    assert tensor[missing[1], missing[0], missing[2]] == 0
+
+def test_transition_tensor_matches_loop():
+
+    """The transition tensor of mdp_transitions.csv equals the row by row loop and is row-stochastic"""
+
+    data = pd.read_csv(TRANSITIONS, index_col=0)
+
+    tensor, report = tensor_dependencies.build_transition_tensor(data)
+
+    np.testing.assert_allclose(tensor, looped_tensor(data, tensor_dependencies.PROBABILITY_COLUMN))
+    np.testing.assert_allclose(tensor.sum(axis=2), 1)
+    assert report["Rescaled Rows"].empty and report["Empty Rows"].empty
+
+def test_transition_tensor_repairs_rows():
+
+    """Rows not summing to one are rescaled and rows without mass become absorbing, and both are reported"""
+
+    data = pd.read_csv(TRANSITIONS, index_col=0)
+    rows = data[tensor_dependencies.TRIPLE_COLUMNS[:2]]
+
+    # (state 0, action 0) gets twice its mass and (state 1, action 2) none at all
+    doubled = (rows['state_category'] == 0) & (rows['action_category'] == 0)
+    emptied = (rows['state_category'] == 1) & (rows['action_category'] == 2)
+    data.loc[doubled, tensor_dependencies.PROBABILITY_COLUMN] *= 2
+    data.loc[emptied, tensor_dependencies.PROBABILITY_COLUMN] = 0
+
+    tensor, report = tensor_dependencies.build_transition_tensor(data)
+    expected = looped_tensor(pd.read_csv(TRANSITIONS, index_col=0), tensor_dependencies.PROBABILITY_COLUMN)
+
+    np.testing.assert_allclose(tensor[0, 0], expected[0, 0])
+    np.testing.assert_array_equal(tensor[2, 1], np.eye(6)[1])
+    assert report["Rescaled Rows"].values.tolist() == [[0, 0]]
+    assert report["Empty Rows"].values.tolist() == [[1, 2]]
+
+def test_sparse_matrices_match_dense_tensor():
+
+    """The CSR matrices per action hold the dense tensor and its reward counterpart, and only the observed triples"""
+
+    transitions = pd.read_csv(TRANSITIONS, index_col=0)
+    rewards = pd.read_csv(REWARDS, index_col=0)
+
+    dense, _ = tensor_dependencies.build_transition_tensor(transitions)
+    matrices, report = tensor_dependencies.build_transition_tensor(transitions, sparse=True)
+
+    assert tensor_dependencies.is_sparse(matrices) and len(matrices) == 6
+    np.testing.assert_allclose(np.stack([matrix.toarray() for matrix in matrices]), dense)
+    assert sum(matrix.nnz for matrix in matrices) == np.count_nonzero(dense)
+    assert report["Empty Rows"].empty
+
+    reward_matrices, _ = tensor_dependencies.build_reward_tensor(rewards, sparse=True)
+    np.testing.assert_allclose(np.stack([matrix.toarray() for matrix in reward_matrices]), tensor_dependencies.build_reward_tensor(rewards)[0])
+
+def test_sparse_path_solves_and_simulates_like_dense():
+
+    """Solver and campaign simulator give the same results on the CSR matrices as on the dense tensor"""
+
+    transitions = pd.read_csv(TRANSITIONS, index_col=0)
+    rewards = pd.read_csv(REWARDS, index_col=0)
+
+    dense = (tensor_dependencies.build_transition_tensor(transitions)[0], tensor_dependencies.build_reward_tensor(rewards)[0])
+    sparse = (tensor_dependencies.build_transition_tensor(transitions, sparse=True)[0], tensor_dependencies.build_reward_tensor(rewards, sparse=True)[0])
+
+    for method in bellman_dependencies.SOLVERS:
+        dense_result = bellman_dependencies.solve(*dense, 0.95, method)
+        sparse_result = bellman_dependencies.solve(*sparse, 0.95, method)
+        np.testing.assert_array_equal(sparse_result["Optimal Policy"], dense_result["Optimal Policy"])
+        np.testing.assert_allclose(sparse_result["Value Function"], dense_result["Value Function"])
+
+    policy = dense_result["Optimal Policy"]
+    dense_run = simulation_dependencies.simulate_campaign(dense[0], policy, 0, 12, 500, seed=1)
+    sparse_run = simulation_dependencies.simulate_campaign(sparse[0], policy, 0, 12, 500, seed=1)
+    for dense_array, sparse_array in zip(dense_run, sparse_run):
+        np.testing.assert_array_equal(sparse_array, dense_array)
@@ -0,0 +1,168 @@
+# Dependencies
+import io
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from model_dependencies import tensor_dependencies
+from model_dependencies import transition_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+TRANSITIONS = os.path.join(DATA, 'customer_dynamics', 'transitions_input.csv')
+PROBABILITIES = os.path.join(DATA, 'markov_decision_process', 'mdp_transitions.csv')
+
+def test_estimator_matches_bundled_probabilities():
+
+    """The estimate of transitions_input.csv is the bundled mdp_transitions.csv"""
+
+    estimated = transition_dependencies.estimate_transition_probabilities(pd.read_csv(TRANSITIONS))
+    bundled = pd.read_csv(PROBABILITIES, index_col=0)
+
+    assert list(estimated.columns) == transition_dependencies.PROBABILITY_COLUMNS
+    np.testing.assert_allclose(estimated['Probability Triple'], bundled['Probability Triple'])
+    for column in ['state', 'action', 'follow_up_state'] + tensor_dependencies.TRIPLE_COLUMNS:
+        assert estimated[column].astype(str).tolist() == bundled[column].astype(str).tolist()
+
+def test_observed_triples_only():
+
+    """Without the full grid only observed triples are listed, and they build the same transition model"""
+
+    data = pd.read_csv(TRANSITIONS)
+    full = transition_dependencies.estimate_transition_probabilities(data)
+    observed = transition_dependencies.estimate_transition_probabilities(data, full_grid=False)
+
+    pd.testing.assert_frame_equal(observed, full[full['Probability Triple'] > 0].reset_index(drop=True))
+
+    dense, _ = tensor_dependencies.build_transition_tensor(full)
+    sparse, _ = tensor_dependencies.build_transition_tensor(observed, 6, 6, sparse=True)
+    np.testing.assert_allclose(np.stack([matrix.toarray() for matrix in sparse]), dense)
+
+def test_count_transitions_counts_observed_triples():
+
+    """Counts are kept for the observed triples only, normalized per (S,A) tuple"""
+
+    states, actions, follow_up_states = np.array([0, 0, 0, 2]), np.array([1, 1, 1, 0]), np.array([2, 2, 1, 2])
+
+    triples, counts = transition_dependencies.count_transitions(states, actions, follow_up_states, 1000)
+
+    assert triples.tolist() == [(0 * 1000 + 2) * 1000 + 2, (1 * 1000 + 0) * 1000 + 1, (1 * 1000 + 0) * 1000 + 2]
+    assert counts.tolist() == [1, 1, 2]
+    np.testing.assert_allclose(transition_dependencies.normalize_triples(triples, counts, 1000), [1, 1 / 3, 2 / 3])
+
+def test_streamed_counts_match_in_memory_counts():
+
+    """Estimating from the file block by block gives the in-memory probabilities"""
+
+    expected = transition_dependencies.estimate_transition_probabilities(pd.read_csv(TRANSITIONS))
+
+    streamed = transition_dependencies.estimate_transition_probabilities_from_file(TRANSITIONS, block_size=512)
+    pd.testing.assert_frame_equal(streamed, expected)
+
+def test_interrupted_stream_resumes_from_checkpoint(tmp_path, monkeypatch):
+
+    """A stream stopped after a few blocks resumes from its checkpoint and ends with the in-memory probabilities"""
+
+    expected = transition_dependencies.estimate_transition_probabilities(pd.read_csv(TRANSITIONS))
+    checkpoint = str(tmp_path / 'counts.npz')
+
+    save_counts = transition_dependencies.save_counts
+    def interrupted(partial_counts, path):
+        save_counts(partial_counts, path)
+        if (partial_counts["Offset"] > 2000):
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(transition_dependencies, 'save_counts', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        transition_dependencies.estimate_transition_probabilities_from_file(TRANSITIONS, block_size=512, checkpoint=checkpoint)
+    monkeypatch.undo()
+
+    assert 0 < transition_dependencies.load_counts(checkpoint)["Offset"] < os.path.getsize(TRANSITIONS)
+
+    resumed = transition_dependencies.estimate_transition_probabilities_from_file(TRANSITIONS, block_size=512, checkpoint=checkpoint)
+    pd.testing.assert_frame_equal(resumed, expected)
+
+def test_checkpoint_of_another_file_is_rejected(tmp_path):
+
+    """A checkpoint only resumes the file version it was taken in"""
+
+    log, checkpoint = tmp_path / 'log.csv', str(tmp_path / 'counts.npz')
+    pd.read_csv(TRANSITIONS).to_csv(log, index=False)
+
+    transition_dependencies.estimate_transition_probabilities_from_file(str(log), block_size=512, checkpoint=checkpoint)
+    assert transition_dependencies.load_counts(checkpoint)["Source"]["Path"] == os.path.abspath(log)
+
+    with pytest.raises(ValueError):
+        transition_dependencies.estimate_transition_probabilities_from_file(TRANSITIONS, block_size=512, checkpoint=checkpoint)
+
+    # Appending to the log changes its version as well
+    with open(log, 'a') as file:
+        file.write('FVNIW,50,mail,50\n')
+    with pytest.raises(ValueError):
+        transition_dependencies.estimate_transition_probabilities_from_file(str(log), block_size=512, checkpoint=checkpoint)
+
+def test_checkpoint_and_workers_are_exclusive(tmp_path):
+
+    """Parallel counting cannot be checkpointed, asking for both raises"""
+
+    with pytest.raises(ValueError):
+        transition_dependencies.estimate_transition_probabilities_from_file(TRANSITIONS, checkpoint=str(tmp_path / 'counts.npz'), workers=2)
+
+def test_incremental_updates_match_the_full_history():
+
+    """Adding the log in batches without decay gives the counts and probabilities of the whole log"""
+
+    data = pd.read_csv(TRANSITIONS)
+
+    partial_counts = transition_dependencies.empty_counts()
+    for batch in np.array_split(np.arange(len(data)), 3):
+        transition_dependencies.update_transition_counts(partial_counts, data.iloc[batch])
+
+    # Saved counts resume the updates as well
+    partial_counts = transition_dependencies.load_counts(io.BytesIO(transition_dependencies.counts_to_bytes(partial_counts)))
+
+    pd.testing.assert_frame_equal(transition_dependencies.counts_to_probabilities(partial_counts), transition_dependencies.estimate_transition_probabilities(data))
+
+def test_decay_weighs_recent_batches():
+
+    """With decay d a batch observed k updates ago weighs d^k"""
+
+    old = pd.DataFrame({'state': [50, 50], 'action': ['mail', 'mail'], 'follow_up_state': [100, 100]})
+    new = pd.DataFrame({'state': [50], 'action': ['mail'], 'follow_up_state': [50]})
+
+    partial_counts = transition_dependencies.update_transition_counts(transition_dependencies.empty_counts(), old)
+    partial_counts = transition_dependencies.update_transition_counts(partial_counts, new, decay=0.25)
+
+    probabilities = transition_dependencies.counts_to_probabilities(partial_counts).set_index(['state', 'action', 'follow_up_state'])['Probability Triple']
+
+    # Two old rows weigh 2 * 0.25 = 0.5 against the one new row
+    assert probabilities[('50', 'mail', '100')] == pytest.approx(0.5 / 1.5)
+    assert probabilities[('50', 'mail', '50')] == pytest.approx(1 / 1.5)
+
+    with pytest.raises(ValueError):
+        transition_dependencies.update_transition_counts(partial_counts, new, decay=0)
+
+def test_parallel_shards_match_in_memory_counts():
+
+    """Counting byte ranges in several processes and reducing them gives the in-memory probabilities"""
+
+    expected = transition_dependencies.estimate_transition_probabilities(pd.read_csv(TRANSITIONS))
+
+    for workers in [2, 3]:
+        parallel = transition_dependencies.estimate_transition_probabilities_from_file(TRANSITIONS, block_size=512, workers=workers)
+        pd.testing.assert_frame_equal(parallel, expected)
+
+def test_shards_cover_every_row_once():
+
+    """The byte ranges start at line starts and cover the data rows without gaps or overlaps"""
+
+    ranges = transition_dependencies.shard_offsets(TRANSITIONS, 4)
+    _, header_offset = transition_dependencies.read_header(TRANSITIONS)
+
+    assert ranges[0][0] == header_offset and ranges[-1][1] == os.path.getsize(TRANSITIONS)
+    assert all(end == start for (_, end), (start, _) in zip(ranges[:-1], ranges[1:]))
+
+    with open(TRANSITIONS, 'rb') as file:
+        content = file.read()
+    assert all(content[start - 1:start] == b'\n' for start, _ in ranges)
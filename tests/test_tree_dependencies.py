@@ -0,0 +1,101 @@
+# Dependencies
+import io
+import os
+import numpy as np
+import pandas as pd
+from sklearn import tree
+from model_dependencies import tree_dependencies
+
+# Data shipped with the app, wherever pytest is run from
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'official')
+
+FEATURES = ['Recency', 'Frequency', 'Monetary']
+SEGMENTS = os.path.join(DATA, 'customer_segmentation', 'segments.csv')
+
+def fitted_tree():
+
+    """fitted_tree(...) fits the CART of the segmentation page on the authors' data"""
+
+    data = pd.read_csv(SEGMENTS)
+    clf = tree.DecisionTreeClassifier(random_state=0, max_depth=4).fit(data[FEATURES], data['state'])
+
+    return data, clf
+
+def test_assign_leaves_matches_apply():
+
+    """The compiled tree sends every customer to the leaf of clf.apply and predicts like clf.predict"""
+
+    data, clf = fitted_tree()
+    compiled = tree_dependencies.compile_tree(clf, FEATURES, 'state')
+
+    leaves = tree_dependencies.assign_leaves(compiled, data[FEATURES].to_numpy())
+
+    np.testing.assert_array_equal(leaves, clf.apply(data[FEATURES]))
+    np.testing.assert_array_equal(tree_dependencies.predict_classes(compiled, leaves), clf.predict(data[FEATURES]))
+
+def test_saved_tree_segments_without_sklearn_objects():
+
+    """A tree written with tree_to_bytes loads back as plain arrays and segments the frame like the fitted tree"""
+
+    data, clf = fitted_tree()
+    compiled = tree_dependencies.compile_tree(clf, FEATURES, 'state')
+
+    loaded = tree_dependencies.load_tree(io.BytesIO(tree_dependencies.tree_to_bytes(compiled)))
+    segmented = tree_dependencies.segment_frame(data, loaded)
+
+    assert loaded["Target"] == 'state' and list(loaded["Feature Names"]) == FEATURES
+    np.testing.assert_array_equal(segmented[tree_dependencies.SEGMENT_COLUMN], clf.apply(data[FEATURES]))
+    np.testing.assert_array_equal(segmented[tree_dependencies.PREDICTION_COLUMN.format('state')], clf.predict(data[FEATURES]))
+    assert set(tree_dependencies.segment_summary(loaded)[tree_dependencies.SEGMENT_COLUMN]) == set(np.flatnonzero(clf.tree_.children_left == tree_dependencies.LEAF))
+
+def test_stream_segments_matches_in_memory(tmp_path):
+
+    """Streaming a file in small chunks sends every customer to the leaf of clf.apply, in file order"""
+
+    data, clf = fitted_tree()
+    compiled = tree_dependencies.compile_tree(clf, FEATURES, 'state')
+
+    path, output_path = tmp_path / 'customers.csv', tmp_path / 'segments.csv'
+    data[FEATURES].to_csv(path, index=False)
+
+    result_dict = tree_dependencies.stream_segments(str(path), compiled, str(output_path), chunk_rows=50)
+    streamed = pd.read_csv(output_path)
+
+    assert result_dict["Customers"] == len(data)
+    np.testing.assert_array_equal(streamed[tree_dependencies.SEGMENT_COLUMN], clf.apply(data[FEATURES]))
+    np.testing.assert_array_equal(streamed[tree_dependencies.ROW_COLUMN], np.arange(len(data)))
+
+def test_stream_summary_matches_groupby(tmp_path):
+
+    """The running sums of the chunks give the customers and the mean/min/max per segment of a groupby"""
+
+    data, clf = fitted_tree()
+    compiled = tree_dependencies.compile_tree(clf, FEATURES, 'state')
+
+    path, output_path = tmp_path / 'customers.csv', tmp_path / 'segments.csv'
+    data[FEATURES].to_csv(path, index=False)
+
+    summary = tree_dependencies.stream_segments(str(path), compiled, str(output_path), chunk_rows=50)["Summary"]
+    summary = summary[summary['customers'] > 0].set_index(tree_dependencies.SEGMENT_COLUMN)
+    expected = data[FEATURES].groupby(clf.apply(data[FEATURES]))
+
+    np.testing.assert_array_equal(summary['customers'], expected.size().loc[summary.index])
+    for column in FEATURES:
+        np.testing.assert_allclose(summary['mean_{}'.format(column)], expected[column].mean().loc[summary.index])
+        np.testing.assert_allclose(summary['min_{}'.format(column)], expected[column].min().loc[summary.index])
+        np.testing.assert_allclose(summary['max_{}'.format(column)], expected[column].max().loc[summary.index])
+
+def test_stream_segments_writes_header_without_customers(tmp_path):
+
+    """An input without rows still yields an output with its header"""
+
+    _, clf = fitted_tree()
+    compiled = tree_dependencies.compile_tree(clf, FEATURES, 'state')
+
+    path, output_path = tmp_path / 'customers.csv', tmp_path / 'segments.csv'
+    pd.DataFrame(columns=FEATURES).to_csv(path, index=False)
+
+    result_dict = tree_dependencies.stream_segments(str(path), compiled, str(output_path))
+
+    assert result_dict["Customers"] == 0
+    assert list(pd.read_csv(output_path).columns) == [tree_dependencies.ROW_COLUMN, tree_dependencies.SEGMENT_COLUMN, tree_dependencies.PREDICTION_COLUMN.format('state')]